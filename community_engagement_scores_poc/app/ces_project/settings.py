@@ -145,6 +145,18 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_COOKIE_AGE = 12 * 60 * 60
 SWAE_TEMP_DIR = "swae_temp_dir"
 
+# Cache of databases built from uploaded zip files, shared by all sessions
+SWAE_CACHE_DIR = "swae_cache_dir"
+SWAE_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Include Parquet files of all tables in the results zip file, requires pyarrow
+SWAE_RESULTS_PARQUET = False
+
+# Tables left out of the Excel file in the results zip file, as glob patterns,
+# since the raw event tables and their filtered copies are large and already
+# contained in the SQLite file
+SWAE_RESULTS_EXCEL_EXCLUDE = ["*ratings", "*comments", "*reactions", "views"]
+
 # https://www.reddit.com/r/django/comments/s6daj0/csrf_verification_failed_django_nginx_docker
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 CSRF_TRUSTED_ORIGINS = ["http://127.0.0.1:8000"]
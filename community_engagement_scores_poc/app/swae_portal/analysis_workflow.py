@@ -34,7 +34,13 @@ class Workflow:
         # Convert
         sqlite_filename = "ces.sqlite"
         sqlite_filepath = os.path.join(dirpath, sqlite_filename)
-        con = swa.zip_to_sqlite(zip_filepath, sqlite_filepath)
+        cache_dirpath = os.path.join(settings.BASE_DIR, settings.SWAE_CACHE_DIR)
+        con = swa.zip_to_sqlite(
+            zip_filepath,
+            sqlite_filepath,
+            cache_dirpath=cache_dirpath,
+            cache_max_bytes=settings.SWAE_CACHE_MAX_BYTES,
+        )
         con.close()
 
         # Set
@@ -50,24 +56,51 @@ class Workflow:
         # Convert
         excel_filename = "ces.xlsx"
         excel_filepath = os.path.join(dirpath, excel_filename)
-        con = sqlite3.connect(sqlite_filepath)
-        swa.sqlite_to_excel(con, excel_filepath)
+        con = swa.utils.connect_read_only(sqlite_filepath)
+        swa.sqlite_to_excel(
+            con,
+            excel_filepath,
+            exclude=settings.SWAE_RESULTS_EXCEL_EXCLUDE,
+            streaming=True,
+        )
         con.close()
 
         # Set
         self.state.excel_filename = excel_filename
         self.state.excel_filepath = excel_filepath
 
-    def filter_missions(self, selected_mission_ids):
+    def convert_sqlite_to_parquet(self):
         # Get
         sqlite_filepath = self.state.sqlite_filepath
-        filter_id = self.state.filter_id
-        filter_id = 1 if filter_id is None else filter_id + 1
+        dirpath = self.state.dirpath
 
         # Convert
+        parquet_dirname = "parquet"
+        parquet_dirpath = os.path.join(dirpath, parquet_dirname)
+        con = swa.utils.connect_read_only(sqlite_filepath)
+        swa.sqlite_to_parquet(con, parquet_dirpath)
+        con.close()
+
+        # Set
+        self.state.parquet_dirpath = parquet_dirpath
+
+    def filter_missions(self, selected_mission_ids):
+        # Get
+        sqlite_filepath = self.state.sqlite_filepath
+        previous_filter_id = self.state.filter_id
+        filter_id = 1 if previous_filter_id is None else previous_filter_id + 1
+
+        # Convert: the selection is stored once in tables that the later steps
+        # read, and the tables of the previous selection are no longer needed
         con = sqlite3.connect(sqlite_filepath)
+        if previous_filter_id is not None:
+            swa.drop_filter(con, previous_filter_id)
         swa.create_filter_views(
-            con, filter_id, selected_mission_ids, extra_time_in_days=100
+            con,
+            filter_id,
+            selected_mission_ids,
+            extra_time_in_days=100,
+            materialize=True,
         )
         con.close()
 
@@ -162,7 +195,7 @@ class Workflow:
         filepath_scores = os.path.join(dirpath, filename_scores)
         filepath_agix = os.path.join(dirpath, filename_agix)
         filepath_vw = os.path.join(dirpath, filename_vw)
-        con = sqlite3.connect(sqlite_filepath)
+        con = swa.utils.connect_read_only(sqlite_filepath)
         fig1, fig2, fig3 = swa.plot_rewards(
             con, filter_id, variables_id, distribution_id
         )
@@ -341,6 +374,14 @@ class Workflow:
         with zipfile.ZipFile(filepath, "w") as f:
             for filepath in filepaths:
                 f.write(filepath, os.path.basename(filepath))
+            if self.state.parquet_dirpath:
+                parquet_dirpath = self.state.parquet_dirpath
+                parquet_dirname = os.path.basename(parquet_dirpath)
+                for filename in sorted(os.listdir(parquet_dirpath)):
+                    f.write(
+                        os.path.join(parquet_dirpath, filename),
+                        os.path.join(parquet_dirname, filename),
+                    )
 
         # Set
         self.state.results_filename = filename
@@ -351,7 +392,7 @@ class Workflow:
         sqlite_filepath = self.state.sqlite_filepath
 
         # Convert
-        con = sqlite3.connect(sqlite_filepath)
+        con = swa.utils.connect_read_only(sqlite_filepath)
         all_missions = swa.get_missions(con)
         con.close()
 
@@ -364,7 +405,7 @@ class Workflow:
         filter_id = self.state.filter_id
 
         # Convert
-        con = sqlite3.connect(sqlite_filepath)
+        con = swa.utils.connect_read_only(sqlite_filepath)
         user_information = swa.get_users(con, filter_id=filter_id)
         con.close()
 
@@ -1,6 +1,9 @@
 import os
 
+from ces import swae_analysis as swa
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.http import FileResponse, Http404, HttpResponseNotFound
 from django.shortcuts import render
@@ -233,7 +236,8 @@ class DataAnalysis(View):
             try:
                 users = wf.get_users()
                 calculate_rewards_form = CalculateRewardsForm(request.POST, users=users)
-                assert calculate_rewards_form.is_valid()
+                if not calculate_rewards_form.is_valid():
+                    raise ValueError(calculate_rewards_form.errors.as_text())
                 data = calculate_rewards_form.cleaned_data
                 filtered_user_ids = []
                 for name, val in data.items():
@@ -279,6 +283,17 @@ class DataAnalysis(View):
                 )
                 raise e
 
+            # Convert SQLite to Parquet files if they are included in the results
+            if settings.SWAE_RESULTS_PARQUET:
+                try:
+                    wf.convert_sqlite_to_parquet()
+                except Exception as e:
+                    error_message = (
+                        "Conversion of SQLite file to Parquet files "
+                        f"failed: {repr_exception(e)}"
+                    )
+                    raise e
+
             # Create visualizations
             try:
                 wf.create_visualizations()
@@ -494,10 +509,20 @@ class CalculateScoresForm(forms.Form):
         ]
 
 
+def validate_formula(value):
+    """Reject a reward formula that cannot be compiled."""
+    try:
+        swa.compile_formula(value)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+
 class CalculateRewardsForm(forms.Form):
-    function_agix_reward = forms.CharField(label="AGIX formula", initial="x**2")
+    function_agix_reward = forms.CharField(
+        label="AGIX formula", initial="x**2", validators=[validate_formula]
+    )
     function_voting_weight = forms.CharField(
-        label="Voting power formula", initial="x**2"
+        label="Voting power formula", initial="x**2", validators=[validate_formula]
     )
     threshold_percentile = forms.FloatField(label="Threshold percentile", initial=10.0)
     total_agix_reward = forms.FloatField(label="Total AGIX reward", initial=100_000.0)
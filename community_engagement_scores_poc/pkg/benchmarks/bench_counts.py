@@ -0,0 +1,65 @@
+"""Benchmark: time of create_counts_table and of the UPDATE-based reference script.
+
+The reference script in the test suite fills a counts row for every user with
+one UPDATE per activity, the current script groups each source entity once.
+Both run on the same database file for up to 100 missions, so that the amount
+of selected data is the same at each scale.
+
+Usage: python bench_counts.py [scale]
+
+"""
+
+import os
+import sys
+import tempfile
+
+from common import TESTS_DIRPATH, create_export, measure, report
+
+from ces import swae_analysis as swa
+from ces.swae_analysis import utils
+
+
+def main(scale=100):
+    with open(os.path.join(TESTS_DIRPATH, "reference_create_counts_table.sql")) as f:
+        reference_script = f.read().format(
+            filter_id=1,
+            create_indexes="\n".join(utils.get_index_statements("filter1_counts")),
+            positive_reactions=(
+                "'celebrate', 'clap', 'curious', 'genius', "
+                "'happy', 'hot', 'laugh', 'love'"
+            ),
+            negative_reactions="'anger', 'sad'",
+        )
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale)
+        con = swa.zip_to_sqlite(zip_filepath, os.path.join(dirpath, "swae.sqlite"))
+        mission_ids = [row[0] for row in swa.get_missions(con)][:100]
+        swa.create_filter_views(con, 1, mission_ids)
+        num_reactions = con.execute("SELECT COUNT(*) FROM filter1_reactions")
+        num_reactions = num_reactions.fetchone()[0]
+
+        def run(func):
+            con.execute("DROP TABLE IF EXISTS filter1_counts")
+            func()
+
+        rows = [
+            (
+                "reference script",
+                measure(run, lambda: con.executescript(reference_script)),
+            ),
+            (
+                "create_counts_table",
+                measure(run, lambda: swa.create_counts_table(con, 1)),
+            ),
+        ]
+        con.close()
+    report(
+        f"Counts of {len(mission_ids)} missions with {num_reactions:,} reactions "
+        f"(scale={scale})",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
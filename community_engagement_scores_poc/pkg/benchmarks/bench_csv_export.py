@@ -0,0 +1,94 @@
+"""Benchmark: peak memory and time of sqlite_to_csv.
+
+Each run happens in a child process, which exports all tables of a database file
+and reports the wall-clock time and its peak resident set size. The variant
+"fetchall" reproduces the previous implementation, which read each table as a
+whole before writing it, as reference for the batched export.
+
+Usage: python bench_csv_export.py [scale ...]
+
+"""
+
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+
+def _read_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+
+def _fetchall_to_csv(con, dirpath):
+    os.makedirs(dirpath, exist_ok=True)
+    query = (
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    )
+    for (table,) in con.execute(query).fetchall():
+        columns = [row[1] for row in con.execute(f"PRAGMA table_xinfo({table})")]
+        order = (
+            " ORDER BY creation_timestamp" if "creation_timestamp" in columns else ""
+        )
+        data = con.execute(f"SELECT * FROM {table}{order}").fetchall()
+        data.insert(0, columns)
+        with open(os.path.join(dirpath, f"{table}.csv"), "w") as f:
+            csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n").writerows(data)
+
+
+def child(db_filepath, dirpath, variant):
+    import sqlite3
+
+    from ces.swae_analysis import sqlite_to_csv
+
+    con = sqlite3.connect(db_filepath)
+    start = time.perf_counter()
+    if variant == "fetchall":
+        _fetchall_to_csv(con, dirpath)
+    elif variant == "batches":
+        sqlite_to_csv(con, dirpath)
+    elif variant == "gzip":
+        sqlite_to_csv(con, dirpath, compression="gzip")
+    elif variant == "workers=4":
+        sqlite_to_csv(con, dirpath, workers=4)
+    seconds = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(dirpath, f)) for f in os.listdir(dirpath))
+    print(
+        f"  {variant:<12}{seconds:>10.2f} s{size / 1024**2:>10.1f} MB"
+        f"{_read_status('VmHWM'):>12.0f} MB"
+    )
+
+
+def main(*scales):
+    from ces.swae_analysis import zip_to_sqlite
+
+    for scale in scales or (20, 100, 400):
+        with tempfile.TemporaryDirectory() as dirpath:
+            zip_filepath = create_export(
+                dirpath, scale, num_views_per_proposal=50, num_reactions_per_comment=10
+            )
+            db_filepath = os.path.join(dirpath, "swae.sqlite")
+            con = zip_to_sqlite(zip_filepath, db_filepath, streaming=True)
+            num_rows = con.execute("SELECT COUNT(*) FROM reactions").fetchone()[0]
+            con.close()
+            print(f"sqlite_to_csv (scale={scale}, {num_rows:,} reactions)")
+            print(f"  {'variant':<12}{'time':>12}{'files':>13}{'peak RSS':>15}")
+            for variant in ["fetchall", "batches", "gzip", "workers=4"]:
+                csv_dirpath = os.path.join(dirpath, "csv")
+                args = ["--child", db_filepath, csv_dirpath, variant]
+                subprocess.run([sys.executable, __file__, *args], check=True)
+                shutil.rmtree(csv_dirpath)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
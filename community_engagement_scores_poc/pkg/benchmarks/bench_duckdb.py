@@ -0,0 +1,58 @@
+"""Benchmark: time of ETL and derive steps on the SQLite and DuckDB backends.
+
+Each backend builds a database file from the same synthetic export and then
+derives filter views, counts, scores and rewards for up to 100 missions, so
+that the amount of selected data is the same at each scale. The default scales are 10 and 100 times the size of the test fixture.
+
+Usage: python bench_duckdb.py [scale ...]
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+from ces import swae_analysis as swa
+
+
+def run(zip_filepath, db_filepath, backend):
+    seconds = {}
+    start = time.perf_counter()
+    con = swa.zip_to_sqlite(zip_filepath, db_filepath, backend=backend)
+    seconds["zip_to_sqlite"] = time.perf_counter() - start
+
+    mission_ids = [row[0] for row in swa.get_missions(con)][:100]
+    steps = [
+        ("create_filter_views", swa.create_filter_views, (1, mission_ids)),
+        ("create_counts_table", swa.create_counts_table, (1,)),
+        ("create_engagement_score_table", swa.create_engagement_score_table, (1, 1)),
+        ("create_rewards_table", swa.create_rewards_table, (1, 1, 1)),
+    ]
+    for label, func, args in steps:
+        start = time.perf_counter()
+        func(con, *args)
+        seconds[label] = time.perf_counter() - start
+    con.close()
+    return seconds
+
+
+def main(*scales):
+    for scale in scales or (10, 100):
+        with tempfile.TemporaryDirectory() as dirpath:
+            zip_filepath = create_export(dirpath, scale)
+            results = {
+                backend: run(zip_filepath, os.path.join(dirpath, backend), backend)
+                for backend in swa.utils.BACKENDS
+            }
+        print(f"Backends at {scale}x the test fixture size")
+        print(f"  {'step':<32}" + "".join(f"{b:>12}" for b in results))
+        for step in results["sqlite"]:
+            times = "".join(f"{r[step]:>10.3f} s" for r in results.values())
+            print(f"  {step:<32}{times}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""Benchmark: peak memory and time of sqlite_to_excel with and without streaming.
+
+Each run happens in a child process, which exports all tables of a database file
+to an Excel file and reports the wall-clock time and its peak resident set size.
+
+Usage: python bench_excel_export.py [scale ...]
+
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+
+def _read_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+
+def child(db_filepath, filepath, variant):
+    import sqlite3
+
+    from ces.swae_analysis import sqlite_to_excel
+
+    con = sqlite3.connect(db_filepath)
+    start = time.perf_counter()
+    sqlite_to_excel(con, filepath, streaming=variant == "streaming")
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(filepath) / 1024**2
+    print(
+        f"  {variant:<12}{seconds:>10.2f} s{size:>10.1f} MB"
+        f"{_read_status('VmHWM'):>12.0f} MB"
+    )
+
+
+def main(*scales):
+    from ces.swae_analysis import zip_to_sqlite
+
+    for scale in scales or (20, 100, 400):
+        with tempfile.TemporaryDirectory() as dirpath:
+            zip_filepath = create_export(
+                dirpath, scale, num_views_per_proposal=50, num_reactions_per_comment=10
+            )
+            db_filepath = os.path.join(dirpath, "swae.sqlite")
+            con = zip_to_sqlite(zip_filepath, db_filepath, streaming=True)
+            num_rows = con.execute("SELECT COUNT(*) FROM reactions").fetchone()[0]
+            con.close()
+            print(f"sqlite_to_excel (scale={scale}, {num_rows:,} reactions)")
+            print(f"  {'variant':<12}{'time':>12}{'file':>13}{'peak RSS':>15}")
+            for variant in ["in memory", "streaming"]:
+                filepath = os.path.join(dirpath, "ces.xlsx")
+                args = ["--child", db_filepath, filepath, variant]
+                subprocess.run([sys.executable, __file__, *args], check=True)
+                os.remove(filepath)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,28 @@
+"""Benchmark: wall-clock time of extract_swae_data with 1, 2, 4 and 8 workers.
+
+Usage: python bench_extract_workers.py [scale]
+
+"""
+
+import sys
+import tempfile
+
+from common import create_export, measure, report
+
+from ces.swae_analysis import extract_swae_data
+
+
+def main(scale=20):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(
+            dirpath, scale, num_views_per_proposal=50, num_reactions_per_comment=10
+        )
+        rows = []
+        for workers in (1, 2, 4, 8):
+            seconds = measure(extract_swae_data, zip_filepath, workers=workers)
+            rows.append((f"workers={workers}", seconds))
+        report(f"extract_swae_data on synthetic export (scale={scale})", rows)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
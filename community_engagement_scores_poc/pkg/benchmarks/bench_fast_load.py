@@ -0,0 +1,38 @@
+"""Benchmark: time of load_sqlite into a database file with and without bulk loading.
+
+Usage: python bench_fast_load.py [scale]
+
+"""
+
+import os
+import sys
+import tempfile
+
+from common import create_export, measure, report
+
+from ces.swae_analysis import extract_swae_data, load_sqlite, transform_swae_data
+
+
+def main(scale=50):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(
+            dirpath, scale, num_views_per_proposal=50, num_reactions_per_comment=10
+        )
+        tabular_data = transform_swae_data(extract_swae_data(zip_filepath))
+        num_rows = sum(len(rows) for rows, _, _ in tabular_data.values())
+        filepath = os.path.join(dirpath, "swae.sqlite")
+
+        variants = [
+            ("default", dict()),
+            ("fast=True", dict(fast=True)),
+            ("fast=True, build_in_memory=True", dict(fast=True, build_in_memory=True)),
+        ]
+        rows = []
+        for label, kwargs in variants:
+            seconds = measure(lambda: load_sqlite(tabular_data, filepath, **kwargs))
+            rows.append((label, seconds))
+        report(f"load_sqlite of {num_rows:,} rows into a file (scale={scale})", rows)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
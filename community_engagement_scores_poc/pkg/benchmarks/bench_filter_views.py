@@ -0,0 +1,82 @@
+"""Benchmark: time of a filter and its counts for a growing number of missions.
+
+The reference script in the test suite lists the selected mission IDs and ORs
+one condition per time range in each view, the current one joins with tables of
+the selection and its merged time ranges. Each run creates the views and the
+counts table, which evaluates all of them, so the time grows with the number of
+selected rows, but the time per row should not grow with the number of missions. The reference fails once the
+conditions exceed the expression depth of SQLite.
+
+Usage: python bench_filter_views.py [scale]
+
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from common import TESTS_DIRPATH, create_export
+
+from ces import swae_analysis as swa
+from ces.swae_analysis import utils
+
+
+def create_reference_filter_views(con, filter_id, mission_ids):
+    with open(os.path.join(TESTS_DIRPATH, "reference_create_filter_views.sql")) as f:
+        template = f.read()
+    mission_ids_str = ", ".join(f"'{x}'" for x in mission_ids)
+    query = (
+        "SELECT start_timestamp, end_timestamp FROM missions "
+        f"WHERE mission_id IN ({mission_ids_str})"
+    )
+    extra_time_in_ms = 21 * 24 * 60 * 60 * 1000
+    conditions = "\n        OR\n        ".join(
+        f"(creation_timestamp >= {start} "
+        f"AND creation_timestamp <= {end + extra_time_in_ms})"
+        for start, end in set(con.execute(query).fetchall())
+    )
+    script = template.format(
+        filter_id=filter_id,
+        mission_ids=mission_ids_str,
+        timerange_conditions=conditions,
+    )
+    utils.execute_script(con, script)
+
+
+def main(scale=200):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale)
+        con = swa.zip_to_sqlite(zip_filepath, os.path.join(dirpath, "swae.sqlite"))
+        mission_ids = [row[0] for row in swa.get_missions(con)]
+
+        print(f"Filter views and counts of n missions (scale={scale})")
+        print(f"  {'n':>6}{'rows':>10}{'reference':>14}{'current':>12}")
+        filter_id = 0
+        for n in sorted({10, 100, 300, 1000, len(mission_ids)}):
+            if n > len(mission_ids):
+                continue
+            times = []
+            for func in [create_reference_filter_views, swa.create_filter_views]:
+                filter_id += 1
+                start = time.perf_counter()
+                try:
+                    func(con, filter_id, mission_ids[:n])
+                    swa.create_counts_table(con, filter_id)
+                except sqlite3.OperationalError:
+                    times.append(f"{'fails':>12}")
+                    continue
+                times.append(f"{time.perf_counter() - start:>10.3f} s")
+            num_rows = sum(
+                con.execute(
+                    f"SELECT COUNT(*) FROM filter{filter_id}_{entity}"
+                ).fetchone()[0]
+                for entity in ["proposals", "ratings", "comments", "reactions"]
+            )
+            print(f"  {n:>6}{num_rows:>10,}  " + "".join(times))
+        con.close()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
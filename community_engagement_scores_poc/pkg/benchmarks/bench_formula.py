@@ -0,0 +1,56 @@
+"""Benchmark: time of create_rewards_table and of the row-wise reference.
+
+The reference in the test suite calls eval on each formula once per row and
+updates the table in about a dozen passes, the current function compiles each
+formula once, computes the whole distribution in memory and inserts all rows at
+once. Both use the scores of up to 100 missions, so that the amount of
+selected data is the same at each scale.
+
+Usage: python bench_formula.py [scale]
+
+"""
+
+import os
+import sys
+import tempfile
+
+from common import create_export, measure, report
+from reference_create_rewards_table import (
+    create_rewards_table as create_reference_rewards_table,
+)
+
+from ces import swae_analysis as swa
+
+
+def main(scale=100):
+    distribution = dict(
+        function_agix_reward="sqrt(x) + log(x)", function_voting_weight="x**2"
+    )
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale)
+        con = swa.zip_to_sqlite(zip_filepath, os.path.join(dirpath, "swae.sqlite"))
+        mission_ids = [row[0] for row in swa.get_missions(con)][:100]
+        swa.create_filter_views(con, 1, mission_ids)
+        swa.create_counts_table(con, 1)
+        swa.create_engagement_score_table(con, 1, 1)
+        num_users = con.execute("SELECT COUNT(*) FROM filter1_var1_scores")
+        num_users = num_users.fetchone()[0]
+
+        def run(func):
+            con.execute("DROP TABLE IF EXISTS filter1_var1_dist1_rewards")
+            func(con, 1, 1, 1, **distribution)
+
+        rows = [
+            (
+                "row-wise reference",
+                measure(run, create_reference_rewards_table),
+            ),
+            ("create_rewards_table", measure(run, swa.create_rewards_table)),
+        ]
+        con.close()
+    report(f"Rewards of {num_users:,} users (scale={scale})", rows)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
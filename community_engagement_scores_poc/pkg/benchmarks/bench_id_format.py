@@ -0,0 +1,55 @@
+"""Benchmark: database size, load time and counts time with hex and int64 IDs.
+
+Usage: python bench_id_format.py [scale]
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+from ces.swae_analysis import (
+    create_counts_table,
+    create_filter_views,
+    extract_swae_data,
+    get_missions,
+    load_sqlite,
+    transform_swae_data,
+)
+
+
+def main(scale=20):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(
+            dirpath, scale, num_views_per_proposal=50, num_reactions_per_comment=10
+        )
+        swae_data = extract_swae_data(zip_filepath)
+        print(f"Database with hex and int64 IDs of a synthetic export (scale={scale})")
+        print(f"  {'id_format':<12}{'size':>12}{'load':>12}{'counts':>12}")
+        for id_format in ("hex", "int64"):
+            tabular_data = transform_swae_data(swae_data, id_format=id_format)
+            filepath = os.path.join(dirpath, f"{id_format}.sqlite")
+
+            start = time.perf_counter()
+            con = load_sqlite(tabular_data, filepath)
+            load_seconds = time.perf_counter() - start
+            size = os.path.getsize(filepath)
+
+            mission_ids = [row[0] for row in get_missions(con)]
+            create_filter_views(con, 1, mission_ids)
+            start = time.perf_counter()
+            create_counts_table(con, 1)
+            counts_seconds = time.perf_counter() - start
+            con.close()
+
+            print(
+                f"  {id_format:<12}{size / 1024**2:>9.2f} MB"
+                f"{load_seconds:>10.3f} s{counts_seconds:>10.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,62 @@
+"""Benchmark: memory of the transformed data with and without interned identifiers.
+
+Each variant runs in a child process, which extracts and transforms a synthetic
+export with about one million reactions and reports its peak resident set size
+as well as the resident set size after the raw JSON data has been released.
+
+Usage: python bench_interning.py [scale]
+
+"""
+
+import gc
+import subprocess
+import sys
+import tempfile
+
+from common import create_export
+
+
+def _read_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+
+def child(zip_filepath, variant):
+    from ces.swae_analysis import extract_swae_data, transform, transform_swae_data
+
+    if variant == "without interning":
+        for schema in transform.SCHEMAS.values():
+            for i, column in enumerate(schema):
+                if column.converter is transform._col_id:
+                    schema[i] = column._replace(converter=transform._col_str)
+
+    swae_data = extract_swae_data(zip_filepath)
+    tabular_data = transform_swae_data(swae_data)
+    num_reactions = len(tabular_data["reactions"][0])
+    del swae_data
+    gc.collect()
+    print(
+        f"  {variant:<20}{num_reactions:>12,}{_read_status('VmHWM'):>12.0f} MB"
+        f"{_read_status('VmRSS'):>12.0f} MB"
+    )
+
+
+def main(scale=100):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale, num_reactions_per_comment=56)
+        print(f"Memory of extract and transform on synthetic export (scale={scale})")
+        print(f"  {'variant':<20}{'reactions':>12}{'peak RSS':>15}{'final RSS':>15}")
+        for variant in ["without interning", "with interning"]:
+            subprocess.run(
+                [sys.executable, __file__, "--child", zip_filepath, variant],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
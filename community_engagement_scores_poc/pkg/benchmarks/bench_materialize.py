@@ -0,0 +1,56 @@
+"""Benchmark: time of create_counts_table on filter views and materialized tables.
+
+Both kinds of filter select the same 100 missions, so that the amount of
+selected data is the same at each scale. The time of creating the filter
+is reported separately, because views are created instantly and tables pay for
+the selection once.
+
+Usage: python bench_materialize.py [scale]
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+from ces import swae_analysis as swa
+
+
+def main(scale=100):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale, num_reactions_per_comment=10)
+        con = swa.zip_to_sqlite(zip_filepath, os.path.join(dirpath, "swae.sqlite"))
+        mission_ids = [row[0] for row in swa.get_missions(con)][:100]
+
+        rows = []
+        for filter_id, materialize in [(1, False), (2, True)]:
+            start = time.perf_counter()
+            swa.create_filter_views(
+                con, filter_id, mission_ids, materialize=materialize
+            )
+            seconds_filter = time.perf_counter() - start
+            start = time.perf_counter()
+            swa.create_counts_table(con, filter_id)
+            seconds_counts = time.perf_counter() - start
+            rows.append((materialize, seconds_filter, seconds_counts))
+        num_reactions = con.execute("SELECT COUNT(*) FROM filter2_reactions")
+        num_reactions = num_reactions.fetchone()[0]
+        con.close()
+
+    print(
+        f"Filter of {len(mission_ids)} missions with {num_reactions:,} reactions "
+        f"(scale={scale})"
+    )
+    print(f"  {'materialize':<14}{'filter':>12}{'counts':>12}{'total':>12}")
+    for materialize, seconds_filter, seconds_counts in rows:
+        print(
+            f"  {str(materialize):<14}{seconds_filter:>10.3f} s{seconds_counts:>10.3f} s"
+            f"{seconds_filter + seconds_counts:>10.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""Benchmark: concurrent readers with read-write and read-only connections.
+
+Several child processes, like the workers of a web server, repeatedly open a
+connection to the same database file and retrieve missions, users and the raw
+tables with the functions of the retrieve module. The wall-clock time until
+all of them are done is reported for every kind of connection.
+
+Usage: python bench_read_only.py [scale] [num_readers] [num_requests]
+
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+
+def child(db_filepath, variant, num_requests):
+    from ces import swae_analysis as swa
+    from ces.swae_analysis import utils
+
+    for _ in range(int(num_requests)):
+        if variant == "read-write":
+            con = sqlite3.connect(db_filepath)
+        else:
+            con = utils.connect_read_only(db_filepath, immutable=variant == "immutable")
+        swa.get_missions(con)
+        swa.get_users(con)
+        for table in ["comments", "reactions", "views"]:
+            con.execute(f"SELECT * FROM {table}").fetchall()
+        con.close()
+
+
+def main(scale=50, num_readers=4, num_requests=5):
+    with tempfile.TemporaryDirectory() as dirpath:
+        from ces import swae_analysis as swa
+
+        zip_filepath = create_export(dirpath, scale)
+        db_filepath = os.path.join(dirpath, "swae.sqlite")
+        swa.zip_to_sqlite(zip_filepath, db_filepath).close()
+
+        print(
+            f"{num_readers} concurrent readers with {num_requests} requests each "
+            f"(scale={scale})"
+        )
+        for variant in ["read-write", "read-only", "immutable"]:
+            args = ["--child", db_filepath, variant, str(num_requests)]
+            start = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, __file__, *args])
+                for _ in range(num_readers)
+            ]
+            for process in processes:
+                assert process.wait() == 0
+            seconds = time.perf_counter() - start
+            print(f"  {variant:<12}{seconds:>10.2f} s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+"""Benchmark: peak memory of zip_to_sqlite with and without streaming.
+
+Each run happens in a child process, which builds a database file from a
+synthetic export and reports the wall-clock time and its peak resident set size.
+One scale unit corresponds to about 1,500 records, so the default scales cover
+about 10 thousand to 1 million records. Pass larger scales, e.g. 6500 for about
+10 million records, if the machine has the memory to generate such an export.
+
+Usage: python bench_streaming.py [scale ...]
+
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import create_export
+
+
+def _read_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+
+def child(zip_filepath, db_filepath, variant):
+    from ces.swae_analysis import zip_to_sqlite
+
+    start = time.perf_counter()
+    con = zip_to_sqlite(zip_filepath, db_filepath, streaming=variant == "streaming")
+    seconds = time.perf_counter() - start
+    tables = [
+        row[0]
+        for row in con.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    ]
+    num_records = sum(
+        con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables
+    )
+    print(
+        f"  {variant:<14}{num_records:>12,}{seconds:>10.2f} s"
+        f"{_read_status('VmHWM'):>12.0f} MB"
+    )
+
+
+def main(*scales):
+    print("Time and peak RSS of zip_to_sqlite into a database file")
+    print(f"  {'variant':<14}{'records':>12}{'time':>12}{'peak RSS':>15}")
+    for scale in scales or (7, 65, 650):
+        with tempfile.TemporaryDirectory() as dirpath:
+            zip_filepath = create_export(dirpath, scale)
+            db_filepath = os.path.join(dirpath, "swae.sqlite")
+            for variant in ["in memory", "streaming"]:
+                args = ["--child", zip_filepath, db_filepath, variant]
+                subprocess.run([sys.executable, __file__, *args], check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,78 @@
+"""Benchmark: time of a parameter sweep and of one table per configuration.
+
+The table-based way creates an engagement score table and a rewards table for
+each configuration and reads the rewards back, sweep evaluates all
+configurations in memory. Both use the counts of up to 100 missions, so that
+the amount of selected data is the same at each scale. Worker processes only
+pay off on machines with several idle cores.
+
+Usage: python bench_sweep.py [scale] [workers]
+
+"""
+
+import os
+import sys
+import tempfile
+
+from common import create_export, measure, report
+
+from ces import swae_analysis as swa
+
+
+GRID = dict(
+    comments_created=[1, 2, 3, 4],
+    threshold_percentile=[10.0, 15.0, 20.0],
+    function_agix_reward=["x", "sqrt(x)", "log(x) + 1", "x**2"],
+    max_voting_weight=[5.0, 10.0],
+)
+
+
+def main(scale=100, workers=2):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale)
+        con = swa.zip_to_sqlite(zip_filepath, os.path.join(dirpath, "swae.sqlite"))
+        mission_ids = [row[0] for row in swa.get_missions(con)][:100]
+        swa.create_filter_views(con, 1, mission_ids)
+        swa.create_counts_table(con, 1)
+        configurations = swa.sweep(con, 1, GRID)
+
+        def run_tables():
+            for c in configurations:
+                variables = dict(
+                    swa.derive.DEFAULT_VARIABLES, comments_created=c["comments_created"]
+                )
+                swa.utils.execute_script(
+                    con,
+                    "DROP TABLE IF EXISTS filter1_var1_scores;\n"
+                    "DROP TABLE IF EXISTS filter1_var1_dist1_rewards;",
+                )
+                swa.create_engagement_score_table(con, 1, 1, variables)
+                swa.create_rewards_table(
+                    con,
+                    1,
+                    1,
+                    1,
+                    function_agix_reward=c["function_agix_reward"],
+                    threshold_percentile=c["threshold_percentile"],
+                    max_voting_weight=c["max_voting_weight"],
+                )
+                swa.get_rewards(con, 1, 1, 1)
+
+        rows = [
+            ("one table per configuration", measure(run_tables, repeat=1)),
+            ("sweep", measure(swa.sweep, con, 1, GRID)),
+            (
+                f"sweep, {workers} workers",
+                measure(swa.sweep, con, 1, GRID, workers=workers),
+            ),
+        ]
+        con.close()
+    report(
+        f"Sweep of {len(configurations)} configurations of {len(mission_ids)} "
+        f"missions on {os.cpu_count()} CPUs (scale={scale})",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
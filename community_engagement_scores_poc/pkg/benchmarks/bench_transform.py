@@ -0,0 +1,35 @@
+"""Benchmark: column-oriented transform engine against the row-wise reference,
+and with 2, 4 and 8 worker processes.
+
+Usage: python bench_transform.py [scale]
+
+"""
+
+import sys
+import tempfile
+
+from common import create_export, measure, report
+from reference_transform import transform_swae_data as reference_transform_swae_data
+
+from ces.swae_analysis import extract_swae_data
+from ces.swae_analysis.transform import transform_swae_data
+
+
+def main(scale=20):
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(
+            dirpath, scale, num_views_per_proposal=50, num_reactions_per_comment=10
+        )
+        swae_data = extract_swae_data(zip_filepath)
+        rows = [
+            ("row-wise reference", measure(reference_transform_swae_data, swae_data)),
+            ("column-oriented engine", measure(transform_swae_data, swae_data)),
+        ]
+        for workers in (2, 4, 8):
+            seconds = measure(transform_swae_data, swae_data, workers=workers)
+            rows.append((f"column-oriented engine, workers={workers}", seconds))
+        report(f"transform_swae_data on synthetic export (scale={scale})", rows)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
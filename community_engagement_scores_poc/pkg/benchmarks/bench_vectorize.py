@@ -0,0 +1,71 @@
+"""Benchmark: time of one SQL engagement score table and of many in memory.
+
+The SQL script creates one table per set of variables, compute_engagement_scores
+calculates all sets of variables with one matrix product on counts loaded once.
+Both use the counts of up to 100 missions, so that the amount of selected data
+is the same at each scale.
+
+Usage: python bench_vectorize.py [scale] [num_sets]
+
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+from common import create_export, measure, report
+
+from ces import swae_analysis as swa
+
+
+def main(scale=100, num_sets=1000):
+    rng = random.Random(0)
+    variables = [
+        {
+            name: (
+                rng.uniform(0.0, 0.9)
+                if name == swa.vectorize.FRACTION_VARIABLE
+                else rng.randint(-5, 10)
+            )
+            for name in swa.derive.DEFAULT_VARIABLES
+        }
+        for _ in range(num_sets)
+    ]
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        zip_filepath = create_export(dirpath, scale)
+        con = swa.zip_to_sqlite(zip_filepath, os.path.join(dirpath, "swae.sqlite"))
+        mission_ids = [row[0] for row in swa.get_missions(con)][:100]
+        swa.create_filter_views(con, 1, mission_ids)
+        swa.create_counts_table(con, 1)
+
+        def run(func):
+            con.execute("DROP TABLE IF EXISTS filter1_var1_scores")
+            func()
+
+        counts = swa.load_counts(con, 1)
+        rows = [
+            (
+                "create_engagement_score_table, 1 set",
+                measure(
+                    run,
+                    lambda: swa.create_engagement_score_table(con, 1, 1, variables[0]),
+                ),
+            ),
+            ("load_counts", measure(lambda: swa.load_counts(con, 1))),
+            (
+                f"compute_engagement_scores, {num_sets:,} sets",
+                measure(lambda: swa.compute_engagement_scores(counts, variables)),
+            ),
+        ]
+        con.close()
+    report(
+        f"Engagement scores of {len(counts.user_ids):,} users in "
+        f"{len(mission_ids)} missions (scale={scale})",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,42 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+The benchmarks use the synthetic Swae export from the test suite, scaled up by
+a factor that multiplies the number of missions and users.
+
+"""
+
+import os
+import sys
+import time
+
+
+TESTS_DIRPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+sys.path.insert(0, TESTS_DIRPATH)
+
+from synthetic import create_synthetic_export  # noqa: E402
+
+
+def create_export(dirpath, scale=1, **kwargs):
+    """Create a synthetic export with roughly ``scale`` times the test fixture size."""
+    filepath = os.path.join(dirpath, f"synthetic_x{scale}.zip")
+    params = dict(num_users=60 * scale, num_missions=6 * scale)
+    params.update(kwargs)
+    return create_synthetic_export(filepath, **params)
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """Call a function several times and return the best wall-clock time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(title, rows):
+    """Print a simple table of (label, seconds) pairs relative to the first one."""
+    print(title)
+    baseline = rows[0][1]
+    for label, seconds in rows:
+        print(f"  {label:<40}{seconds:10.3f} s{baseline / seconds:8.2f}x")
@@ -1,5 +1,6 @@
 """Package for analyzing data from SingularityNET's proposal portal on Swae."""
 
+from .cache import get_cache_stats, list_cache_entries, purge_cache
 from .combine import sqlite_to_scores_and_rewards, zip_to_sqlite
 from .construct_network import sqlite_to_graph
 from .derive import (
@@ -7,9 +8,30 @@ from .derive import (
     create_engagement_score_table,
     create_filter_views,
     create_rewards_table,
+    drop_filter,
 )
-from .extract import extract_swae_data
-from .load import load_sqlite, sqlite_to_csv, sqlite_to_excel
-from .retrieve import get_engagement_scores, get_missions, get_rewards, get_users
-from .transform import transform_swae_data
+from .distribute import compute_rewards
+from .explore import sweep
+from .extract import extract_swae_data, iter_swae_records
+from .formula import compile_formula
+from .load import (
+    create_indexes,
+    load_duckdb,
+    load_duckdb_batches,
+    load_sqlite,
+    load_sqlite_batches,
+    sqlite_to_csv,
+    sqlite_to_excel,
+    sqlite_to_parquet,
+    update_sqlite,
+)
+from .retrieve import (
+    get_engagement_scores,
+    get_missions,
+    get_rewards,
+    get_stale_tables,
+    get_users,
+)
+from .transform import transform_swae_data, transform_swae_records
+from .vectorize import compute_engagement_scores, load_counts, store_engagement_scores
 from .visualize import plot_rewards
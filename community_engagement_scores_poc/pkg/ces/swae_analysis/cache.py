@@ -0,0 +1,391 @@
+"""Module for caching the results of ETL runs on Swae data exports.
+
+Each cache entry is an SQLite database file that was built from a ZIP file.
+Entries are addressed by a key that is derived from the SHA-256 hash of the
+ZIP file, the options that influence the ETL result and a schema version.
+An index database in the cache directory keeps track of entry sizes, usage
+times and counters, so that several processes can share one cache directory.
+
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+
+# Version of the database layout created by ETL. It needs to be incremented
+# whenever a change in transform or load leads to different tables.
+SCHEMA_VERSION = 2
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+INDEX_FILENAME = "index.sqlite"
+
+
+def compute_key(zip_filepath: str, **options: Any) -> str:
+    """Compute the cache key of a ZIP file and the options used to process it.
+
+    Parameters
+    ----------
+    zip_filepath : str
+        The path of the ZIP file.
+    **options : Any
+        Options that influence the ETL result, e.g. ``filters_on=True``.
+        They need to be JSON serializable.
+
+    Returns
+    -------
+    key : str
+        A hexadecimal SHA-256 hash of the file content, options and schema version.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the ZIP file does not exist.
+
+    """
+    # Precondition: ZIP file exists
+    if not os.path.isfile(zip_filepath):
+        message = f"Source file could not be found.\nGiven path: {zip_filepath}"
+        raise FileNotFoundError(message)
+
+    hash_obj = hashlib.sha256()
+    with open(zip_filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            hash_obj.update(chunk)
+    description = dict(
+        zip_sha256=hash_obj.hexdigest(), schema_version=SCHEMA_VERSION, **options
+    )
+    string = json.dumps(description, sort_keys=True)
+    return hashlib.sha256(string.encode("utf-8")).hexdigest()
+
+
+def restore(
+    cache_dirpath: str, key: str, target_filepath: str = ":memory:", how: str = "copy"
+) -> Optional[sqlite3.Connection]:
+    """Restore a cached SQLite database and return a connection to it.
+
+    Parameters
+    ----------
+    cache_dirpath : str
+        The path of the cache directory.
+    key : str
+        The cache key, see :func:`compute_key`.
+    target_filepath : str, optional, default=":memory:"
+        The path of the SQLite database file to create.
+        Caution: If the file exists it will be overwritten.
+    how : str, optional, default="copy"
+        How to restore a file database.
+
+        - "copy": Copy the cached file.
+        - "link": Create a hard link to the cached file and fall back to copying
+          if that is not possible. Caution: Changes to the database would also
+          change the cache entry, so this is only suitable for read-only use.
+        - "backup": Copy the content with the backup API of SQLite.
+
+        An in-memory database is always restored with the backup API.
+
+    Returns
+    -------
+    con : Optional[sqlite3.Connection]
+        The SQLite database connection object or None if there is no entry for the key.
+
+    """
+    if how not in ("copy", "link", "backup"):
+        raise ValueError(f'Unknown restore method "{how}". Valid: copy, link, backup')
+
+    index = _open_index(cache_dirpath)
+    try:
+        row = index.execute(
+            "SELECT filename, etl_seconds FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            _increment(index, "misses")
+            return None
+        filename, etl_seconds = row
+        start = time.perf_counter()
+        try:
+            con = _restore_file(
+                os.path.join(cache_dirpath, filename), target_filepath, how
+            )
+        except (OSError, sqlite3.Error):
+            # The entry has been evicted in the meantime or is damaged
+            _increment(index, "misses")
+            return None
+        restore_seconds = time.perf_counter() - start
+        with index:
+            index.execute(
+                "UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+        _increment(index, "hits")
+        _increment(index, "seconds_saved", max(etl_seconds - restore_seconds, 0.0))
+        return con
+    finally:
+        index.close()
+
+
+def store(
+    cache_dirpath: str,
+    key: str,
+    con: sqlite3.Connection,
+    etl_seconds: float,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    description: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Store an SQLite database in the cache and evict least recently used entries.
+
+    Parameters
+    ----------
+    cache_dirpath : str
+        The path of the cache directory. It is created if it does not exist.
+    key : str
+        The cache key, see :func:`compute_key`.
+    con : sqlite3.Connection
+        The SQLite database connection object of the database to store.
+    etl_seconds : float
+        The time it took to build the database, which a later hit saves.
+    max_bytes : int, optional, default=2 GiB
+        The maximum total size of all cache entries.
+    description : Optional[Dict[str, Any]], optional
+        Information about the entry that is shown by :func:`list_cache_entries`.
+
+    Returns
+    -------
+    stored : bool
+        False if the database alone is larger than the maximum size of the cache.
+
+    """
+    index = _open_index(cache_dirpath)
+    try:
+        # Write the database to a temporary file and move it into place atomically
+        filename = f"{key}.sqlite"
+        filepath = os.path.join(cache_dirpath, filename)
+        fd, temp_filepath = tempfile.mkstemp(dir=cache_dirpath, suffix=".tmp")
+        os.close(fd)
+        try:
+            dst = sqlite3.connect(temp_filepath)
+            with dst:
+                con.backup(dst)
+            dst.close()
+            size = os.path.getsize(temp_filepath)
+            if size > max_bytes:
+                return False
+            os.replace(temp_filepath, filepath)
+        finally:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+        now = time.time()
+        with index:
+            index.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, filename, size, etl_seconds, created, last_used, hits, description) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (key, filename, size, etl_seconds, now, now, json.dumps(description)),
+            )
+        _increment(index, "etl_seconds", etl_seconds)
+        _evict(index, cache_dirpath, max_bytes, keep=key)
+        return True
+    finally:
+        index.close()
+
+
+def list_cache_entries(cache_dirpath: str) -> List[Dict[str, Any]]:
+    """List all entries of a cache, most recently used first.
+
+    Parameters
+    ----------
+    cache_dirpath : str
+        The path of the cache directory.
+
+    Returns
+    -------
+    entries : List[Dict[str, Any]]
+        A list of dictionaries, each with the items key, filename, size,
+        etl_seconds, created, last_used, hits and description.
+
+    """
+    index = _open_index(cache_dirpath)
+    try:
+        index.row_factory = sqlite3.Row
+        rows = index.execute("SELECT * FROM entries ORDER BY last_used DESC").fetchall()
+    finally:
+        index.close()
+    entries = [dict(row) for row in rows]
+    for entry in entries:
+        entry["description"] = json.loads(entry["description"])
+    return entries
+
+
+def get_cache_stats(cache_dirpath: str) -> Dict[str, float]:
+    """Get usage statistics of a cache.
+
+    Parameters
+    ----------
+    cache_dirpath : str
+        The path of the cache directory.
+
+    Returns
+    -------
+    stats : Dict[str, float]
+        A dictionary with the items
+
+        - hits: Number of ETL runs that were replaced by restoring an entry.
+        - misses: Number of lookups without a usable entry.
+        - seconds_saved: Time of ETL runs saved by hits (minus the restore time).
+        - etl_seconds: Time spent on ETL runs whose results were stored.
+        - num_entries: Number of entries currently in the cache.
+        - size: Total size of all entries in bytes.
+
+    """
+    index = _open_index(cache_dirpath)
+    try:
+        stats = dict(hits=0, misses=0, seconds_saved=0.0, etl_seconds=0.0)
+        stats.update(index.execute("SELECT name, value FROM counters").fetchall())
+        num_entries, size = index.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+    finally:
+        index.close()
+    stats["num_entries"] = num_entries
+    stats["size"] = size
+    return stats
+
+
+def purge_cache(cache_dirpath: str, key: Optional[str] = None) -> int:
+    """Delete one entry or all entries of a cache.
+
+    Parameters
+    ----------
+    cache_dirpath : str
+        The path of the cache directory.
+    key : Optional[str], optional
+        The key of the entry to delete. If None, all entries are deleted
+        and the counters are reset.
+
+    Returns
+    -------
+    num_deleted : int
+        The number of deleted entries.
+
+    """
+    index = _open_index(cache_dirpath)
+    try:
+        if key is None:
+            rows = index.execute("SELECT key, filename FROM entries").fetchall()
+            with index:
+                index.execute("DELETE FROM counters")
+        else:
+            rows = index.execute(
+                "SELECT key, filename FROM entries WHERE key = ?", (key,)
+            ).fetchall()
+        for row in rows:
+            _delete_entry(index, cache_dirpath, *row)
+    finally:
+        index.close()
+    return len(rows)
+
+
+def _open_index(cache_dirpath: str) -> sqlite3.Connection:
+    os.makedirs(cache_dirpath, exist_ok=True)
+    index = sqlite3.connect(os.path.join(cache_dirpath, INDEX_FILENAME), timeout=60)
+    with index:
+        index.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, filename TEXT, size INTEGER, etl_seconds REAL, "
+            "created REAL, last_used REAL, hits INTEGER, description TEXT)"
+        )
+        index.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL)"
+        )
+    return index
+
+
+def _increment(index: sqlite3.Connection, name: str, value: float = 1) -> None:
+    with index:
+        index.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, value),
+        )
+
+
+def _evict(
+    index: sqlite3.Connection, cache_dirpath: str, max_bytes: int, keep: str
+) -> None:
+    """Delete least recently used entries until the total size is within bounds."""
+    rows = index.execute(
+        "SELECT key, filename, size FROM entries ORDER BY last_used DESC"
+    ).fetchall()
+    total = 0
+    for key, filename, size in rows:
+        total += size
+        if total > max_bytes and key != keep:
+            _delete_entry(index, cache_dirpath, key, filename)
+            total -= size
+
+
+def _delete_entry(
+    index: sqlite3.Connection, cache_dirpath: str, key: str, filename: str
+) -> None:
+    with index:
+        index.execute("DELETE FROM entries WHERE key = ?", (key,))
+    try:
+        os.remove(os.path.join(cache_dirpath, filename))
+    except FileNotFoundError:
+        pass
+
+
+def _restore_file(
+    cached_filepath: str, target_filepath: str, how: str
+) -> sqlite3.Connection:
+    if not os.path.isfile(cached_filepath):
+        raise FileNotFoundError(cached_filepath)
+
+    # In-memory database or backup API: copy the content page by page
+    if target_filepath == ":memory:" or how == "backup":
+        _prepare_target(target_filepath)
+        src = sqlite3.connect(f"file:{cached_filepath}?mode=ro", uri=True)
+        con = sqlite3.connect(target_filepath)
+        try:
+            src.backup(con)
+        finally:
+            src.close()
+        return con
+
+    # File database: link or copy the file and move it into place atomically
+    _prepare_target(target_filepath)
+    directory = os.path.dirname(os.path.abspath(target_filepath))
+    fd, temp_filepath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    os.remove(temp_filepath)
+    try:
+        if how == "link":
+            try:
+                os.link(cached_filepath, temp_filepath)
+            except OSError:
+                shutil.copyfile(cached_filepath, temp_filepath)
+        else:
+            shutil.copyfile(cached_filepath, temp_filepath)
+        os.replace(temp_filepath, target_filepath)
+    finally:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+    return sqlite3.connect(target_filepath)
+
+
+def _prepare_target(target_filepath: str) -> None:
+    """Remove an existing target file or create its directory, like load_sqlite."""
+    if target_filepath == ":memory:":
+        return
+    if os.path.isfile(target_filepath):
+        os.remove(target_filepath)
+    else:
+        directory = os.path.dirname(target_filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
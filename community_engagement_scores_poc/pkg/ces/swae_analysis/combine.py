@@ -1,18 +1,24 @@
 """Module for combining different functionality in higher-level functions."""
 
+import queue
 import sqlite3
-from typing import Dict, List, Tuple
+import sys
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
 
+from . import cache, utils
 from .derive import (
     create_counts_table,
     create_engagement_score_table,
     create_filter_views,
     create_rewards_table,
 )
-from .extract import extract_swae_data
-from .load import load_sqlite
+from .extract import extract_swae_data, iter_swae_records
+from .load import load_duckdb, load_duckdb_batches, load_sqlite, load_sqlite_batches
 from .retrieve import get_engagement_scores, get_missions, get_rewards
-from .transform import transform_swae_data
+from .transform import TABLE_SOURCES, transform_swae_data, transform_swae_records
 from .visualize import plot_rewards
 
 
@@ -20,10 +26,24 @@ FILTER_ID = 0
 VARIABLES_ID = 0
 DISTRIBUTION_ID = 0
 
+# Streaming ETL: records per batch and bytes of batches waiting to be loaded
+STREAMING_BATCH_SIZE = 10_000
+STREAMING_MEMORY_BUDGET = 64 * 1024**2
+
 
 def zip_to_sqlite(
-    source_filepath: str, target_filepath: str = ":memory:", filters_on: bool = True
-) -> sqlite3.Connection:
+    source_filepath: str,
+    target_filepath: str = ":memory:",
+    filters_on: bool = True,
+    id_format: str = "hex",
+    datetime_columns: str = "stored",
+    streaming: bool = False,
+    memory_budget: int = STREAMING_MEMORY_BUDGET,
+    cache_dirpath: str = None,
+    cache_max_bytes: int = cache.DEFAULT_MAX_BYTES,
+    cache_restore: str = "copy",
+    backend: str = "sqlite",
+) -> utils.Connection:
     """Extract, transform and load semi-structured data from a ZIP file into an SQLite database.
 
     Parameters
@@ -39,24 +59,227 @@ def zip_to_sqlite(
         A flag that determines whether filters are enabled for the transformation.
         If True, individual rows can be skipped if they carry an attribute that indicates that
         they are inactive, e.g. a proposal being in draft status or a comment being deleted.
+    id_format : str, optional, default="hex"
+        The format of the identifiers of reactions and views: "hex" for strings of
+        64 hexadecimal characters or "int64" for compact 64-bit integer keys.
+        See :func:`ces.swae_analysis.transform_swae_data` for details.
+    datetime_columns : str, optional, default="stored"
+        Whether datetime columns are "stored" or "virtual" columns that are computed
+        from timestamps. Virtual columns are neither formatted by the transformation
+        nor inserted. See :func:`ces.swae_analysis.load_sqlite` for details.
+    streaming : bool, optional, default=False
+        A flag that determines whether the data is processed as a pipeline. If True,
+        the records of each entity are parsed incrementally, transformed in batches
+        of ``STREAMING_BATCH_SIZE`` records by a background thread and inserted into
+        the database while the next batches are prepared. Peak memory then stays
+        roughly the same for exports of any size, as long as the database is a file.
+    memory_budget : int, optional, default=64 MiB
+        The maximum estimated size of transformed batches that wait to be inserted
+        in streaming mode. If it is reached, the background thread pauses.
+    cache_dirpath : str, optional, default=None
+        The path of a directory for caching ETL results. If it is provided and the
+        same ZIP file has been processed with the same options before, the cached
+        database is restored instead of repeating extract, transform and load.
+    cache_max_bytes : int, optional, default=2 GiB
+        The maximum total size of the cache. Least recently used entries are evicted.
+    cache_restore : str, optional, default="copy"
+        How a cached file database is restored: "copy", "link" or "backup".
+        See :func:`ces.swae_analysis.cache.restore` for details.
+    backend : str, optional, default="sqlite"
+        The database backend, "sqlite" or "duckdb". With "duckdb", the target is a
+        DuckDB database file created by :func:`ces.swae_analysis.load_duckdb`,
+        which requires the optional dependency duckdb. The derive and retrieve
+        functions accept connections of both backends. Caching and virtual
+        datetime columns are only available with "sqlite".
 
     Returns
     -------
-    con : sqlite3.Connection
-        The SQLite database connection object.
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
 
     """
-    # Extract
-    json_data = extract_swae_data(source_filepath)
+    # Argument processing
+    if backend not in utils.BACKENDS:
+        message = f'Unknown backend "{backend}". Valid: {", ".join(utils.BACKENDS)}'
+        raise ValueError(message)
+    if backend == "duckdb" and (
+        cache_dirpath is not None or datetime_columns != "stored"
+    ):
+        message = (
+            'The "duckdb" backend supports no cache and only stored datetime columns.'
+        )
+        raise ValueError(message)
+
+    # Cache lookup
+    if cache_dirpath is not None:
+        options = dict(
+            filters_on=filters_on,
+            id_format=id_format,
+            datetime_columns=datetime_columns,
+        )
+        key = cache.compute_key(source_filepath, **options)
+        con = cache.restore(cache_dirpath, key, target_filepath, cache_restore)
+        if con is not None:
+            return con
+        start = time.perf_counter()
+
+    if streaming:
+        # Extract, transform and load as a pipeline
+        batches = _iter_transformed_batches(
+            source_filepath,
+            filters_on,
+            id_format,
+            datetime_columns,
+            STREAMING_BATCH_SIZE,
+        )
+        batches = _prefetch_batches(batches, memory_budget)
+        if backend == "duckdb":
+            con = load_duckdb_batches(batches, target_filepath)
+        else:
+            con = load_sqlite_batches(
+                batches, target_filepath, datetime_columns=datetime_columns
+            )
+    else:
+        # Extract
+        json_data = extract_swae_data(source_filepath)
+
+        # Transform
+        tabular_data = transform_swae_data(
+            json_data,
+            filters_on,
+            id_format=id_format,
+            datetime_columns=datetime_columns,
+        )
 
-    # Transform
-    tabular_data = transform_swae_data(json_data, filters_on)
+        # Release the raw data before loading, the rows do not reference it
+        del json_data
 
-    # Load
-    con = load_sqlite(tabular_data, target_filepath)
+        # Load
+        if backend == "duckdb":
+            con = load_duckdb(tabular_data, target_filepath)
+        else:
+            con = load_sqlite(
+                tabular_data, target_filepath, datetime_columns=datetime_columns
+            )
+
+    # Cache update
+    if cache_dirpath is not None:
+        etl_seconds = time.perf_counter() - start
+        description = dict(source_filepath=source_filepath, **options)
+        cache.store(cache_dirpath, key, con, etl_seconds, cache_max_bytes, description)
     return con
 
 
+def _iter_transformed_batches(
+    source_filepath: str,
+    filters_on: bool,
+    id_format: str,
+    datetime_columns: str,
+    batch_size: int,
+) -> Iterator[Tuple[str, Tuple]]:
+    """Extract and transform the records of each entity in batches."""
+    for table_name, entities in TABLE_SOURCES.items():
+        for entity in entities:
+            records = iter_swae_records(source_filepath, entity)
+            batch = list(islice(records, batch_size))
+            # The first batch is passed on even if empty, so that each table is created
+            yield table_name, transform_swae_records(
+                batch, entity, filters_on, id_format, datetime_columns
+            )
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                yield table_name, transform_swae_records(
+                    batch, entity, filters_on, id_format, datetime_columns
+                )
+
+
+class _MemoryBudget:
+    """Bytes of batches that were produced but not consumed yet."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, num_bytes: int) -> bool:
+        """Wait until there is room for a batch, return False if closed meanwhile."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._has_room(num_bytes))
+            if self.closed:
+                return False
+            self.used += num_bytes
+            return True
+
+    def _has_room(self, num_bytes: int) -> bool:
+        # A batch larger than the whole budget is admitted on its own
+        if self.closed or self.used == 0:
+            return True
+        return self.used + num_bytes <= self.max_bytes
+
+    def release(self, num_bytes: int) -> None:
+        with self._condition:
+            self.used -= num_bytes
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+def _prefetch_batches(
+    batches: Iterator[Tuple[str, Tuple]], memory_budget: int
+) -> Iterator[Tuple[str, Tuple]]:
+    """Produce batches in a background thread while the caller consumes earlier ones.
+
+    The memory of a batch counts against the budget until the caller requests the
+    next batch, i.e. until it has been inserted into the database.
+
+    """
+    budget = _MemoryBudget(memory_budget)
+    pending = queue.Queue()
+
+    def produce():
+        try:
+            for batch in batches:
+                num_bytes = _estimate_size(batch[1][0])
+                if not budget.acquire(num_bytes):
+                    return
+                pending.put((batch, num_bytes))
+            pending.put((None, 0))
+        except BaseException as error:
+            pending.put((error, 0))
+        finally:
+            batches.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, num_bytes = pending.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+            budget.release(num_bytes)
+    finally:
+        budget.close()
+        thread.join()
+
+
+def _estimate_size(rows: List[List], sample_size: int = 100) -> int:
+    """Estimate the memory of rows in bytes from a sample of them."""
+    if not rows:
+        return sys.getsizeof(rows)
+    sample = rows[:: max(len(rows) // sample_size, 1)]
+    num_bytes = sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in sample)
+    return sys.getsizeof(rows) + num_bytes * len(rows) // len(sample)
+
+
 def sqlite_to_scores_and_rewards(
     con: sqlite3.Connection,
     mission_ids: List[str] = None,
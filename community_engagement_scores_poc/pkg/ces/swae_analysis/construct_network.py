@@ -1,29 +1,44 @@
 """Module for creating a graph that represents a part of Swae data."""
 
 import sqlite3
-from typing import List
+from typing import List, Optional
 
 import networkx as nx
 
 from . import utils
 
 
-def sqlite_to_graph(con: sqlite3.Connection, mission_ids: List[str]) -> nx.DiGraph:
+def sqlite_to_graph(
+    con: sqlite3.Connection,
+    mission_ids: Optional[List[str]] = None,
+    filter_id: Optional[int] = None,
+) -> nx.DiGraph:
     """Convert selected items from an SQLite database with Swae data into a NetworkX graph.
 
     Parameters
     ----------
     con : sqlite3.Connection
         The SQLite database connection object.
-    mission_ids : List[str]
+    mission_ids : List[str], optional
         A list of mission IDs to consider for the data conversion.
+    filter_id : int, optional
+        The ID of a filter created by :func:`create_filter_views`. If given instead
+        of mission IDs, the items are read from its views or materialized tables,
+        which also restricts them to the time ranges of the missions.
 
     Returns
     -------
     graph : networkx.DiGraph
         The NetworkX graph that contains the selected data from the database.
 
+    Raises
+    ------
+    ValueError
+        If not exactly one of mission_ids and filter_id is provided.
+
     """
+    if (mission_ids is None) == (filter_id is None):
+        raise ValueError("Exactly one of mission_ids and filter_id must be provided.")
     if isinstance(mission_ids, str):
         mission_ids = [mission_ids]
 
@@ -33,33 +48,43 @@ def sqlite_to_graph(con: sqlite3.Connection, mission_ids: List[str]) -> nx.DiGra
     def to_sql_str2(rows, idx):
         return ", ".join(f"'{row[idx]}'" for row in rows)
 
-    mission_ids_str = to_sql_str1(mission_ids)
-    query = (
-        f"SELECT * FROM missions WHERE mission_id IN ({mission_ids_str}) "
-        "ORDER BY creation_timestamp;"
-    )
-    missions = utils.execute_query(con, query)
-    query = (
-        f"SELECT * FROM proposals WHERE mission_id IN ({mission_ids_str}) "
-        "ORDER BY creation_timestamp;"
-    )
-    proposals = utils.execute_query(con, query)
-
-    proposal_ids_str = to_sql_str2(proposals, 0)
-    query = (
-        f"SELECT * FROM ratings WHERE proposal_id IN ({proposal_ids_str}) "
-        "ORDER BY creation_timestamp;"
-    )
-    ratings = utils.execute_query(con, query)
-    query = (
-        f"SELECT * FROM comments WHERE proposal_id IN ({proposal_ids_str}) "
-        "ORDER BY creation_timestamp;"
-    )
-    comments = utils.execute_query(con, query)
-
-    comment_ids_str = to_sql_str2(comments, 0)
-    query = f"SELECT * FROM reactions WHERE comment_id IN ({comment_ids_str});"
-    reactions = utils.execute_query(con, query)
+    if filter_id is not None:
+        prefix = f"filter{filter_id}"
+        missions, proposals, ratings, comments = [
+            utils.execute_query(
+                con, f"SELECT * FROM {prefix}_{entity} ORDER BY creation_timestamp;"
+            )
+            for entity in ["missions", "proposals", "ratings", "comments"]
+        ]
+        reactions = utils.execute_query(con, f"SELECT * FROM {prefix}_reactions;")
+    else:
+        mission_ids_str = to_sql_str1(mission_ids)
+        query = (
+            f"SELECT * FROM missions WHERE mission_id IN ({mission_ids_str}) "
+            "ORDER BY creation_timestamp;"
+        )
+        missions = utils.execute_query(con, query)
+        query = (
+            f"SELECT * FROM proposals WHERE mission_id IN ({mission_ids_str}) "
+            "ORDER BY creation_timestamp;"
+        )
+        proposals = utils.execute_query(con, query)
+
+        proposal_ids_str = to_sql_str2(proposals, 0)
+        query = (
+            f"SELECT * FROM ratings WHERE proposal_id IN ({proposal_ids_str}) "
+            "ORDER BY creation_timestamp;"
+        )
+        ratings = utils.execute_query(con, query)
+        query = (
+            f"SELECT * FROM comments WHERE proposal_id IN ({proposal_ids_str}) "
+            "ORDER BY creation_timestamp;"
+        )
+        comments = utils.execute_query(con, query)
+
+        comment_ids_str = to_sql_str2(comments, 0)
+        query = f"SELECT * FROM reactions WHERE comment_id IN ({comment_ids_str});"
+        reactions = utils.execute_query(con, query)
 
     user_ids0 = set(row[1] for row in missions)
     user_ids1 = set(row[2] for row in proposals)
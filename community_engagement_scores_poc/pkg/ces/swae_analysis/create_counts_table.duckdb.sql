@@ -0,0 +1,160 @@
+-- Port of create_counts_table.sql to DuckDB:
+-- - GREATEST would ignore NULL, therefore a CASE clips negative weights
+-- - The weight of users without proposals is cast to DOUBLE, the type of the others
+-- - DuckDB finds rows by scanning columns, so no indexes are created
+
+-- Each source entity is grouped once by user_id with conditional aggregation for
+-- the different kinds of activity. The results are joined to the users, of which
+-- only those with at least one activity are kept.
+CREATE TABLE filter{filter_id}_counts AS
+WITH created_proposals AS (
+    SELECT
+        user_id,
+        COUNT(user_id) AS num_created_proposals,
+        CASE
+            WHEN SUM(average_rating * num_total_ratings) < 0.0 THEN 0.0
+            ELSE SUM(average_rating * num_total_ratings)
+        END AS weight_received_ratings
+    FROM filter{filter_id}_proposals
+    GROUP BY user_id
+),
+created_ratings AS (
+    SELECT user_id, COUNT(user_id) AS num_created_ratings
+    FROM ratings
+    GROUP BY user_id
+),
+received_ratings AS (
+    SELECT
+        filter{filter_id}_proposals.user_id AS user_id,
+        COUNT(filter{filter_id}_proposals.user_id) AS num_received_ratings
+    FROM filter{filter_id}_ratings
+    LEFT JOIN filter{filter_id}_proposals
+    USING (proposal_id)
+    GROUP BY filter{filter_id}_proposals.user_id
+),
+created_comments AS (
+    SELECT user_id, COUNT(user_id) AS num_created_comments
+    FROM filter{filter_id}_comments
+    GROUP BY user_id
+),
+received_comments AS (
+    SELECT
+        filter{filter_id}_proposals.user_id AS user_id,
+        COUNT(filter{filter_id}_proposals.user_id) AS num_received_comments
+    FROM filter{filter_id}_comments
+    LEFT JOIN filter{filter_id}_proposals
+    USING (proposal_id)
+    GROUP BY filter{filter_id}_proposals.user_id
+),
+created_reactions AS (
+    SELECT
+        user_id,
+        COUNT(user_id) AS num_created_reactions,
+        COUNT(CASE WHEN reaction_type IN ({positive_reactions}) THEN 1 END)
+            AS num_created_positive_reactions,
+        COUNT(CASE WHEN reaction_type IN ({negative_reactions}) THEN 1 END)
+            AS num_created_negative_reactions,
+        COUNT(CASE WHEN reaction_type = 'upvote' THEN 1 END) AS num_created_upvote_reactions,
+        COUNT(CASE WHEN reaction_type = 'downvote' THEN 1 END) AS num_created_downvote_reactions,
+        COUNT(CASE WHEN reaction_type = 'anger' THEN 1 END) AS num_created_anger_reactions,
+        COUNT(CASE WHEN reaction_type = 'celebrate' THEN 1 END) AS num_created_celebrate_reactions,
+        COUNT(CASE WHEN reaction_type = 'clap' THEN 1 END) AS num_created_clap_reactions,
+        COUNT(CASE WHEN reaction_type = 'curious' THEN 1 END) AS num_created_curious_reactions,
+        COUNT(CASE WHEN reaction_type = 'genius' THEN 1 END) AS num_created_genius_reactions,
+        COUNT(CASE WHEN reaction_type = 'happy' THEN 1 END) AS num_created_happy_reactions,
+        COUNT(CASE WHEN reaction_type = 'hot' THEN 1 END) AS num_created_hot_reactions,
+        COUNT(CASE WHEN reaction_type = 'laugh' THEN 1 END) AS num_created_laugh_reactions,
+        COUNT(CASE WHEN reaction_type = 'love' THEN 1 END) AS num_created_love_reactions,
+        COUNT(CASE WHEN reaction_type = 'sad' THEN 1 END) AS num_created_sad_reactions
+    FROM filter{filter_id}_reactions
+    GROUP BY user_id
+),
+received_reactions AS (
+    SELECT
+        filter{filter_id}_comments.user_id AS user_id,
+        COUNT(filter{filter_id}_comments.user_id) AS num_received_reactions,
+        COUNT(CASE WHEN reaction_type IN ({positive_reactions}) THEN 1 END)
+            AS num_received_positive_reactions,
+        COUNT(CASE WHEN reaction_type IN ({negative_reactions}) THEN 1 END)
+            AS num_received_negative_reactions,
+        COUNT(CASE WHEN reaction_type = 'upvote' THEN 1 END) AS num_received_upvote_reactions,
+        COUNT(CASE WHEN reaction_type = 'downvote' THEN 1 END) AS num_received_downvote_reactions,
+        COUNT(CASE WHEN reaction_type = 'anger' THEN 1 END) AS num_received_anger_reactions,
+        COUNT(CASE WHEN reaction_type = 'celebrate' THEN 1 END) AS num_received_celebrate_reactions,
+        COUNT(CASE WHEN reaction_type = 'clap' THEN 1 END) AS num_received_clap_reactions,
+        COUNT(CASE WHEN reaction_type = 'curious' THEN 1 END) AS num_received_curious_reactions,
+        COUNT(CASE WHEN reaction_type = 'genius' THEN 1 END) AS num_received_genius_reactions,
+        COUNT(CASE WHEN reaction_type = 'happy' THEN 1 END) AS num_received_happy_reactions,
+        COUNT(CASE WHEN reaction_type = 'hot' THEN 1 END) AS num_received_hot_reactions,
+        COUNT(CASE WHEN reaction_type = 'laugh' THEN 1 END) AS num_received_laugh_reactions,
+        COUNT(CASE WHEN reaction_type = 'love' THEN 1 END) AS num_received_love_reactions,
+        COUNT(CASE WHEN reaction_type = 'sad' THEN 1 END) AS num_received_sad_reactions
+    FROM filter{filter_id}_reactions
+    LEFT JOIN filter{filter_id}_comments
+    USING (comment_id)
+    GROUP BY filter{filter_id}_comments.user_id
+)
+SELECT
+    users.user_id,
+    COALESCE(created_proposals.num_created_proposals, 0) AS num_created_proposals,
+
+    COALESCE(created_ratings.num_created_ratings, 0) AS num_created_ratings,
+    COALESCE(received_ratings.num_received_ratings, 0) AS num_received_ratings,
+    -- A weight of NULL from proposals without ratings is kept as it is
+    CASE
+        WHEN created_proposals.user_id IS NULL THEN CAST(0.0 AS DOUBLE)
+        ELSE created_proposals.weight_received_ratings
+    END AS weight_received_ratings,
+
+    COALESCE(created_comments.num_created_comments, 0) AS num_created_comments,
+    COALESCE(received_comments.num_received_comments, 0) AS num_received_comments,
+
+    COALESCE(created_reactions.num_created_reactions, 0) AS num_created_reactions,
+    COALESCE(created_reactions.num_created_positive_reactions, 0) AS num_created_positive_reactions,
+    COALESCE(created_reactions.num_created_negative_reactions, 0) AS num_created_negative_reactions,
+    COALESCE(created_reactions.num_created_upvote_reactions, 0) AS num_created_upvote_reactions,
+    COALESCE(created_reactions.num_created_downvote_reactions, 0) AS num_created_downvote_reactions,
+    COALESCE(created_reactions.num_created_anger_reactions, 0) AS num_created_anger_reactions,
+    COALESCE(created_reactions.num_created_celebrate_reactions, 0) AS num_created_celebrate_reactions,
+    COALESCE(created_reactions.num_created_clap_reactions, 0) AS num_created_clap_reactions,
+    COALESCE(created_reactions.num_created_curious_reactions, 0) AS num_created_curious_reactions,
+    COALESCE(created_reactions.num_created_genius_reactions, 0) AS num_created_genius_reactions,
+    COALESCE(created_reactions.num_created_happy_reactions, 0) AS num_created_happy_reactions,
+    COALESCE(created_reactions.num_created_hot_reactions, 0) AS num_created_hot_reactions,
+    COALESCE(created_reactions.num_created_laugh_reactions, 0) AS num_created_laugh_reactions,
+    COALESCE(created_reactions.num_created_love_reactions, 0) AS num_created_love_reactions,
+    COALESCE(created_reactions.num_created_sad_reactions, 0) AS num_created_sad_reactions,
+
+    COALESCE(received_reactions.num_received_reactions, 0) AS num_received_reactions,
+    COALESCE(received_reactions.num_received_positive_reactions, 0) AS num_received_positive_reactions,
+    COALESCE(received_reactions.num_received_negative_reactions, 0) AS num_received_negative_reactions,
+    COALESCE(received_reactions.num_received_upvote_reactions, 0) AS num_received_upvote_reactions,
+    COALESCE(received_reactions.num_received_downvote_reactions, 0) AS num_received_downvote_reactions,
+    COALESCE(received_reactions.num_received_anger_reactions, 0) AS num_received_anger_reactions,
+    COALESCE(received_reactions.num_received_celebrate_reactions, 0) AS num_received_celebrate_reactions,
+    COALESCE(received_reactions.num_received_clap_reactions, 0) AS num_received_clap_reactions,
+    COALESCE(received_reactions.num_received_curious_reactions, 0) AS num_received_curious_reactions,
+    COALESCE(received_reactions.num_received_genius_reactions, 0) AS num_received_genius_reactions,
+    COALESCE(received_reactions.num_received_happy_reactions, 0) AS num_received_happy_reactions,
+    COALESCE(received_reactions.num_received_hot_reactions, 0) AS num_received_hot_reactions,
+    COALESCE(received_reactions.num_received_laugh_reactions, 0) AS num_received_laugh_reactions,
+    COALESCE(received_reactions.num_received_love_reactions, 0) AS num_received_love_reactions,
+    COALESCE(received_reactions.num_received_sad_reactions, 0) AS num_received_sad_reactions
+FROM users
+LEFT JOIN created_proposals USING (user_id)
+LEFT JOIN created_ratings USING (user_id)
+LEFT JOIN received_ratings USING (user_id)
+LEFT JOIN created_comments USING (user_id)
+LEFT JOIN received_comments USING (user_id)
+LEFT JOIN created_reactions USING (user_id)
+LEFT JOIN received_reactions USING (user_id)
+WHERE COALESCE(
+    created_proposals.user_id,
+    created_ratings.user_id,
+    received_ratings.user_id,
+    created_comments.user_id,
+    received_comments.user_id,
+    created_reactions.user_id,
+    received_reactions.user_id
+) IS NOT NULL
+ORDER BY users.user_id;
\ No newline at end of file
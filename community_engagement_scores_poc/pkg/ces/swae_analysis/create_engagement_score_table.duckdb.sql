@@ -0,0 +1,105 @@
+-- Port of create_engagement_score_table.sql to DuckDB:
+-- - Columns get their type from the first value, therefore the points that the
+--   SQLite script fills in with updates are calculated in a single statement
+-- - A division by zero results in NULL like in SQLite instead of infinity
+
+CREATE TABLE {table_name_engagement_scores} AS
+WITH points AS (
+    SELECT
+        user_id,
+
+        num_created_proposals * {proposals_created} AS pts_proposals_created,
+
+        num_created_ratings * {ratings_created} AS pts_ratings_created,
+        num_received_ratings * {ratings_received} AS pts_ratings_received,
+
+        num_created_comments * {comments_created} AS pts_comments_created,
+        num_received_comments * {comments_received} AS pts_comments_received,
+
+        num_created_upvote_reactions * {upvote_reactions_created} AS pts_upvote_reactions_created,
+        num_created_downvote_reactions * {downvote_reactions_created} AS pts_downvote_reactions_created,
+        num_created_anger_reactions * {anger_reactions_created} AS pts_anger_reactions_created,
+        num_created_celebrate_reactions * {celebrate_reactions_created} AS pts_celebrate_reactions_created,
+        num_created_clap_reactions * {clap_reactions_created} AS pts_clap_reactions_created,
+        num_created_curious_reactions * {curious_reactions_created} AS pts_curious_reactions_created,
+        num_created_genius_reactions * {genius_reactions_created} AS pts_genius_reactions_created,
+        num_created_happy_reactions * {happy_reactions_created} AS pts_happy_reactions_created,
+        num_created_hot_reactions * {hot_reactions_created} AS pts_hot_reactions_created,
+        num_created_laugh_reactions * {laugh_reactions_created} AS pts_laugh_reactions_created,
+        num_created_love_reactions * {love_reactions_created} AS pts_love_reactions_created,
+        num_created_sad_reactions * {sad_reactions_created} AS pts_sad_reactions_created,
+
+        num_received_upvote_reactions * {upvote_reactions_received} AS pts_upvote_reactions_received,
+        num_received_downvote_reactions * {downvote_reactions_received} AS pts_downvote_reactions_received,
+        num_received_anger_reactions * {anger_reactions_received} AS pts_anger_reactions_received,
+        num_received_celebrate_reactions * {celebrate_reactions_received} AS pts_celebrate_reactions_received,
+        num_received_clap_reactions * {clap_reactions_received} AS pts_clap_reactions_received,
+        num_received_curious_reactions * {curious_reactions_received} AS pts_curious_reactions_received,
+        num_received_genius_reactions * {genius_reactions_received} AS pts_genius_reactions_received,
+        num_received_happy_reactions * {happy_reactions_received} AS pts_happy_reactions_received,
+        num_received_hot_reactions * {hot_reactions_received} AS pts_hot_reactions_received,
+        num_received_laugh_reactions * {laugh_reactions_received} AS pts_laugh_reactions_received,
+        num_received_love_reactions * {love_reactions_received} AS pts_love_reactions_received,
+        num_received_sad_reactions * {sad_reactions_received} AS pts_sad_reactions_received,
+
+        weight_received_ratings
+    FROM {table_name_counts}
+    LEFT JOIN users USING (user_id)
+),
+total_points AS (
+    SELECT
+        *,
+        pts_upvote_reactions_created
+        + pts_downvote_reactions_created
+        + pts_anger_reactions_created
+        + pts_celebrate_reactions_created
+        + pts_clap_reactions_created
+        + pts_curious_reactions_created
+        + pts_genius_reactions_created
+        + pts_happy_reactions_created
+        + pts_hot_reactions_created
+        + pts_laugh_reactions_created
+        + pts_love_reactions_created
+        + pts_sad_reactions_created AS pts_total_reactions_created,
+        pts_upvote_reactions_received
+        + pts_downvote_reactions_received
+        + pts_anger_reactions_received
+        + pts_celebrate_reactions_received
+        + pts_clap_reactions_received
+        + pts_curious_reactions_received
+        + pts_genius_reactions_received
+        + pts_happy_reactions_received
+        + pts_hot_reactions_received
+        + pts_laugh_reactions_received
+        + pts_love_reactions_received
+        + pts_sad_reactions_received AS pts_total_reactions_received
+    FROM points
+),
+activity_points AS (
+    SELECT
+        *,
+        pts_proposals_created
+        + pts_ratings_created
+        + pts_ratings_received
+        + pts_comments_created
+        + pts_comments_received
+        + pts_total_reactions_created
+        + pts_total_reactions_received AS pts_for_activities
+    FROM total_points
+),
+-- Scale the points received for proposal ratings, so they become a user-specified fraction of the total points (=engagement_score)
+rating_points AS (
+    SELECT
+        * EXCLUDE (weight_received_ratings),
+        weight_received_ratings * (
+            SELECT
+                {fraction_of_engagement_scores_for_highly_rated_proposals} / NULLIF(1.0 - {fraction_of_engagement_scores_for_highly_rated_proposals}, 0.0) *
+                SUM(pts_for_activities) / NULLIF(SUM(weight_received_ratings), 0.0)
+            FROM activity_points
+        ) AS pts_for_ratings_received
+    FROM activity_points
+)
+SELECT
+    *,
+    pts_for_activities + pts_for_ratings_received AS engagement_score
+FROM rating_points;
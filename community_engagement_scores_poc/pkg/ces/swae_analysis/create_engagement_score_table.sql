@@ -102,3 +102,6 @@ SET pts_for_ratings_received = pts_for_ratings_received * (
 
 UPDATE {table_name_engagement_scores}
 SET engagement_score = pts_for_activities + pts_for_ratings_received;
+
+-- Index for retrieving users ordered by engagement score
+{create_indexes}
@@ -1,51 +1,58 @@
--- Create a view for selected missions
-CREATE VIEW filter{filter_id}_missions AS
+-- The selected mission IDs are stored in filter{filter_id}_selection and their
+-- time ranges, extended and merged into disjoint ranges with inclusive bounds, in
+-- filter{filter_id}_time_ranges. An entity belongs to the filter if it was created
+-- within one of these ranges, which is found with a range join on the index of its
+-- creation timestamp. Since the ranges are disjoint, each row is selected once.
+
+-- Create a view or table for selected missions
+CREATE {object_type} filter{filter_id}_missions AS
     SELECT *
     FROM missions
     WHERE mission_id IN (
-        {mission_ids}
+        SELECT mission_id FROM filter{filter_id}_selection
     );
+{create_indexes_missions}
 
--- Create a view for selected proposals
-CREATE VIEW filter{filter_id}_proposals AS
-    SELECT *
-    FROM proposals
+-- Create a view or table for selected proposals
+CREATE {object_type} filter{filter_id}_proposals AS
+    SELECT proposals.*
+    FROM filter{filter_id}_time_ranges
+    JOIN proposals
+    ON proposals.creation_timestamp BETWEEN start_timestamp AND end_timestamp
     WHERE mission_id IN (
-        {mission_ids}
-    )
-    AND (
-        {timerange_conditions}
+        SELECT mission_id FROM filter{filter_id}_selection
     );
+{create_indexes_proposals}
 
--- Create a view for selected ratings
-CREATE VIEW filter{filter_id}_ratings AS
-    SELECT *
-    FROM ratings
+-- Create a view or table for selected ratings
+CREATE {object_type} filter{filter_id}_ratings AS
+    SELECT ratings.*
+    FROM filter{filter_id}_time_ranges
+    JOIN ratings
+    ON ratings.creation_timestamp BETWEEN start_timestamp AND end_timestamp
     WHERE proposal_id IN (
         SELECT proposal_id FROM filter{filter_id}_proposals
-    )
-    AND (
-        {timerange_conditions}
     );
+{create_indexes_ratings}
 
--- Create a view for selected comments
-CREATE VIEW filter{filter_id}_comments AS
-    SELECT *
-    FROM comments
+-- Create a view or table for selected comments
+CREATE {object_type} filter{filter_id}_comments AS
+    SELECT comments.*
+    FROM filter{filter_id}_time_ranges
+    JOIN comments
+    ON comments.creation_timestamp BETWEEN start_timestamp AND end_timestamp
     WHERE proposal_id IN (
         SELECT proposal_id FROM filter{filter_id}_proposals
-    )
-    AND (
-        {timerange_conditions}
     );
+{create_indexes_comments}
 
--- Create a view for selected reactions
-CREATE VIEW filter{filter_id}_reactions AS
-    SELECT *
-    FROM reactions
+-- Create a view or table for selected reactions
+CREATE {object_type} filter{filter_id}_reactions AS
+    SELECT reactions.*
+    FROM filter{filter_id}_time_ranges
+    JOIN reactions
+    ON reactions.creation_timestamp BETWEEN start_timestamp AND end_timestamp
     WHERE comment_id IN (
         SELECT comment_id FROM filter{filter_id}_comments
-    )
-    AND (
-        {timerange_conditions}
-    );
\ No newline at end of file
+    );
+{create_indexes_reactions}
@@ -1,5 +1,6 @@
 """Module for deriving counts, scores and rewards from preprocessed Swae data."""
 
+import re
 import sqlite3
 from typing import Any, Dict, List, Tuple, Union
 
@@ -7,81 +8,210 @@ import numpy as np
 import pkg_resources
 
 from . import utils
+from .distribute import compute_rewards
+
+
+# Default weights of the counts of each user activity in the engagement score
+DEFAULT_VARIABLES = {
+    "proposals_created": 0,
+    "fraction_of_engagement_scores_for_highly_rated_proposals": 0.0,
+    "ratings_created": 0,
+    "ratings_received": 0,
+    "comments_created": 3,
+    "comments_received": 0,
+    "upvote_reactions_created": 0,
+    "downvote_reactions_created": 0,
+    "anger_reactions_created": 0,
+    "celebrate_reactions_created": 0,
+    "clap_reactions_created": 0,
+    "curious_reactions_created": 0,
+    "genius_reactions_created": 0,
+    "happy_reactions_created": 0,
+    "hot_reactions_created": 0,
+    "laugh_reactions_created": 0,
+    "love_reactions_created": 0,
+    "sad_reactions_created": 0,
+    "upvote_reactions_received": 2,
+    "downvote_reactions_received": -3,
+    "anger_reactions_received": -2,
+    "celebrate_reactions_received": 2,
+    "clap_reactions_received": 2,
+    "curious_reactions_received": 2,
+    "genius_reactions_received": 2,
+    "happy_reactions_received": 2,
+    "hot_reactions_received": 2,
+    "laugh_reactions_received": 2,
+    "love_reactions_received": 2,
+    "sad_reactions_received": -2,
+}
+
+# Entities that are restricted by a filter, in the order of their dependencies
+FILTER_ENTITIES = ["missions", "proposals", "ratings", "comments", "reactions"]
 
 
 def create_filter_views(
-    con: sqlite3.Connection,
+    con: utils.Connection,
     filter_id: int,
     mission_ids: List[str],
     extra_time_in_days: int = 21,
+    materialize: bool = False,
 ) -> None:
     """Create database views that restrict each table to items belonging to given missions.
 
+    The selected mission IDs and their time ranges, merged into disjoint ranges,
+    are stored in the small tables ``filter{N}_selection`` and
+    ``filter{N}_time_ranges``, which the views join with. The cost of the filter
+    therefore hardly depends on the number of selected missions.
+
     Parameters
     ----------
-    con : sqlite3.Connection
-        The SQLite database connection object.
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
     filter_id : int
         The ID of the filter to create. It will be used in a prefix for each created view.
     mission_ids : List[str]
         A list of mission identifiers.
     extra_time_in_days : int, optional, default=30
         Extra time in days to add to the time ranges after the end.
+    materialize : bool, optional, default=False
+        If True, each filtered entity is selected once and stored as a table instead
+        of a view, with indexes on its join keys in SQLite. Counts, graphs and exports
+        then read the stored rows instead of evaluating the filter conditions again.
+        The tables are a snapshot: :func:`update_sqlite` marks them as stale when
+        rows change, and :func:`drop_filter` removes them with the derived tables.
 
     """
     # Argument processing
-    mission_ids_str = ", ".join("'{}'".format(x) for x in mission_ids)
+    backend = utils.get_backend(con)
     extra_time_in_ms = (
         extra_time_in_days * 24 * 60 * 60 * 1000
     )  # 1d=24h 1h=60m 1m=60s 1s=1000ms
+    table_name_selection = f"filter{filter_id}_selection"
+    table_name_time_ranges = f"filter{filter_id}_time_ranges"
+
+    # Store the selected missions, with the type of their IDs in the missions table
+    script = (
+        f"CREATE TABLE {table_name_selection} AS "
+        "SELECT mission_id FROM missions LIMIT 0;\n"
+        f"CREATE TABLE {table_name_time_ranges} ("
+        # In SQLite only INTEGER PRIMARY KEY is the rowid, DuckDB needs 64 bits
+        f"start_timestamp {'INTEGER' if backend == 'sqlite' else 'BIGINT'} PRIMARY KEY, "
+        "end_timestamp BIGINT NOT NULL);"
+    )
+    utils.execute_script(con, script)
+    utils.execute_many(
+        con,
+        f"INSERT INTO {table_name_selection} VALUES (?)",
+        [(mission_id,) for mission_id in dict.fromkeys(mission_ids)],
+    )
 
-    # Get time ranges of all included missions and keep unique ones
+    # Store the time ranges of the selected missions: Only consider entities created
+    # between start and end (+chosen extra time) of some mission
     query = (
         "SELECT start_timestamp, end_timestamp FROM missions "
-        f"WHERE mission_id IN ({mission_ids_str}) ORDER BY creation_timestamp;"
+        f"WHERE mission_id IN (SELECT mission_id FROM {table_name_selection});"
     )
-    timestamp_pairs = utils.execute_query(con, query)
-    timestamp_pairs = set(timestamp_pairs)
-
-    # Create timerange conditions: Only consider entities created between start and end
-    # (+chosen extra time) of some mission
-    sql_line = "(creation_timestamp >= {} AND creation_timestamp <= {})"
-    sql_timerange_conditions = [
-        sql_line.format(start, end + extra_time_in_ms)
-        for start, end in set(timestamp_pairs)
+    time_ranges = [
+        (start, end + extra_time_in_ms)
+        for start, end in utils.execute_query(con, query)
+        if start is not None and end is not None
     ]
-    sql_timerange_conditions = "\n        OR\n        ".join(sql_timerange_conditions)
+    utils.execute_many(
+        con,
+        f"INSERT INTO {table_name_time_ranges} VALUES (?, ?)",
+        _merge_time_ranges(time_ranges),
+    )
 
-    # Create views
-    script_template = pkg_resources.resource_string(
-        __name__, "create_filter_views.sql"
-    ).decode()
+    # Create views or tables, each table gets its indexes before the next one reads it
+    create_indexes = {
+        f"create_indexes_{entity}": "\n".join(
+            utils.get_index_statements(f"filter{filter_id}_{entity}")
+            if materialize and backend == "sqlite"
+            else []
+        )
+        for entity in FILTER_ENTITIES
+    }
+    script_template = _read_script_template(con, "create_filter_views.sql")
     script = script_template.format(
-        mission_ids=mission_ids_str,
+        object_type="TABLE" if materialize else "VIEW",
         filter_id=filter_id,
-        timerange_conditions=sql_timerange_conditions,
+        **create_indexes,
     )
     utils.execute_script(con, script)
 
 
-def create_counts_table(con: sqlite3.Connection, filter_id: int) -> None:
+def _merge_time_ranges(time_ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge time ranges with inclusive bounds into a minimal set of disjoint ones."""
+    merged = []
+    for start, end in sorted(time_ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def drop_filter(con: utils.Connection, filter_id: int) -> List[str]:
+    """Drop all views and tables that belong to a filter.
+
+    These are the views or materialized tables of :func:`create_filter_views`, the
+    tables with its selection and the counts, scores and rewards derived from them.
+    Their indexes are dropped with the tables.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
+    filter_id : int
+        The ID of the filter to drop.
+
+    Returns
+    -------
+    names : List[str]
+        The names of the dropped views and tables.
+
+    """
+    query = "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view')"
+    objects = utils.execute_query(con, query)
+    pattern = re.compile(rf"filter{filter_id}_\w+")
+    views = sorted(name for name, type_ in objects if type_ == "view")
+    tables = sorted(name for name, type_ in objects if type_ == "table")
+    names = [name for name in views + tables if pattern.fullmatch(name)]
+    if not names:
+        return []
+
+    # Views first, since they may refer to the tables
+    statements = [
+        f"DROP {'VIEW' if name in views else 'TABLE'} {name};" for name in names
+    ]
+    if "stale_tables" in tables:
+        names_str = ", ".join(f"'{name}'" for name in names)
+        statements.append(
+            f"DELETE FROM stale_tables WHERE table_name IN ({names_str});"
+        )
+    utils.execute_script(con, "\n".join(statements))
+    return names
+
+
+def create_counts_table(con: utils.Connection, filter_id: int) -> None:
     """Create a database table with counts of each user activity.
 
     The counts are based on the views that correspond to the given filter ID.
 
     Parameters
     ----------
-    con : sqlite3.Connection
-        The SQLite database connection object.
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
     filter_id : int
         The ID of the filter to create counts for.
 
     """
-    script_template = pkg_resources.resource_string(
-        __name__, "create_counts_table.sql"
-    ).decode()
+    script_template = _read_script_template(con, "create_counts_table.sql")
     script = script_template.format(
         filter_id=filter_id,
+        create_indexes="\n".join(
+            utils.get_index_statements(f"filter{filter_id}_counts")
+        ),
         positive_reactions=(
             "'celebrate', 'clap', 'curious', 'genius', "
             "'happy', 'hot', 'laugh', 'love'"
@@ -92,7 +222,7 @@ def create_counts_table(con: sqlite3.Connection, filter_id: int) -> None:
 
 
 def create_engagement_score_table(
-    con: sqlite3.Connection,
+    con: utils.Connection,
     filter_id: int,
     variables_id: int,
     variables: Dict[str, Any] = None,
@@ -106,15 +236,15 @@ def create_engagement_score_table(
 
     Parameters
     ----------
-    con : sqlite3.Connection
-        The SQLite database connection object.
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
     filter_id : int
         The ID of the filter to create engagement scores for.
     variables_id : int
         The ID of the variables to use for calculating the engagement scores.
     variables : Dict[str, Any], optional
         Custom variables and their corresponding values to be used in the
-        calculation.
+        calculation. If None, ``DEFAULT_VARIABLES`` are used.
 
     """
     # Argument processing
@@ -122,55 +252,32 @@ def create_engagement_score_table(
     table_name_engagement_scores = f"filter{filter_id}_var{variables_id}_scores"
 
     if variables is None:
-        positive_reaction_received = 2
-        negative_reaction_received = -2
+        variables = DEFAULT_VARIABLES
+
+    if utils.get_backend(con) == "duckdb":
+        # A literal like 2.5 is a DECIMAL in DuckDB, which would change the types
         variables = {
-            "proposals_created": 0,
-            "fraction_of_engagement_scores_for_highly_rated_proposals": 0.0,
-            "ratings_created": 0,
-            "ratings_received": 0,
-            "comments_created": 3,
-            "comments_received": 0,
-            "upvote_reactions_created": 0,
-            "downvote_reactions_created": 0,
-            "anger_reactions_created": 0,
-            "celebrate_reactions_created": 0,
-            "clap_reactions_created": 0,
-            "curious_reactions_created": 0,
-            "genius_reactions_created": 0,
-            "happy_reactions_created": 0,
-            "hot_reactions_created": 0,
-            "laugh_reactions_created": 0,
-            "love_reactions_created": 0,
-            "sad_reactions_created": 0,
-            "upvote_reactions_received": 2,
-            "downvote_reactions_received": -3,
-            "anger_reactions_received": negative_reaction_received,
-            "celebrate_reactions_received": positive_reaction_received,
-            "clap_reactions_received": positive_reaction_received,
-            "curious_reactions_received": positive_reaction_received,
-            "genius_reactions_received": positive_reaction_received,
-            "happy_reactions_received": positive_reaction_received,
-            "hot_reactions_received": positive_reaction_received,
-            "laugh_reactions_received": positive_reaction_received,
-            "love_reactions_received": positive_reaction_received,
-            "sad_reactions_received": negative_reaction_received,
+            key: f"CAST({float(value)!r} AS DOUBLE)"
+            if isinstance(value, float)
+            else value
+            for key, value in variables.items()
         }
 
     # Create table with engagement scores
-    script_template = pkg_resources.resource_string(
-        __name__, "create_engagement_score_table.sql"
-    ).decode()
+    script_template = _read_script_template(con, "create_engagement_score_table.sql")
     script = script_template.format(
         table_name_counts=table_name_counts,
         table_name_engagement_scores=table_name_engagement_scores,
+        create_indexes="\n".join(
+            utils.get_index_statements(table_name_engagement_scores)
+        ),
         **variables,
     )
     utils.execute_script(con, script)
 
 
 def create_rewards_table(
-    con: sqlite3.Connection,
+    con: utils.Connection,
     filter_id: int,
     variables_id: int,
     distribution_id: int,
@@ -186,8 +293,8 @@ def create_rewards_table(
 
     Parameters
     ----------
-    con : sqlite3.Connection
-        The SQLite database connection object.
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
     filter_id : int
         The ID of the filter.
     variables_id : int
@@ -197,9 +304,10 @@ def create_rewards_table(
     filtered_user_ids : Union[str, None], optional, default=None
         Comma-separated list of filtered user IDs.
     function_agix_reward : str, optional, default="x"
-        Function expression for calculating AGIX reward.
+        Function expression for calculating AGIX reward, see :func:`compile_formula`.
+        Values where it is undefined, e.g. ``log(x - 1)`` for ``x = 1``, are 0.0.
     function_voting_weight : str, optional, default="x"
-        Function expression for calculating voting weight.
+        Function expression for calculating voting weight, with the same rules.
     threshold_percentile : float, optional, default=20.0
         Percentile threshold for engagement scores.
     total_agix_reward : float, optional, default=100_000.0
@@ -209,92 +317,78 @@ def create_rewards_table(
     max_voting_weight : float, optional, default=5.0
         Maximum voting weight.
 
+    Raises
+    ------
+    ValueError
+        If a function expression is not valid.
+
     """
     # Argument processing
     table_name_engagement_scores = f"filter{filter_id}_var{variables_id}_scores"
     table_name_rewards = (
         f"filter{filter_id}_var{variables_id}_dist{distribution_id}_rewards"
     )
-
-    # Filtered users
-    if filtered_user_ids is not None:
-        filtered_user_ids = ",".join(f'"{uid}"' for uid in filtered_user_ids)
-    else:
-        filtered_user_ids = ""
-
-    # Threshold calculation by percentile
-    query = (
-        f"SELECT engagement_score FROM {table_name_engagement_scores} "
-        "WHERE engagement_score > 0.0;"
+    columns = (
+        "user_id, name, email_address, ethereum_address, cardano_address, "
+        "engagement_score"
     )
-    engagement_scores = [row[0] for row in utils.execute_query(con, query)]
-    threshold_value = np.percentile(engagement_scores, threshold_percentile)
-
-    # Distribution calculation by provided functions
-    math_functions = dict(
-        abs=np.abs,
-        ceil=np.ceil,
-        floor=np.floor,
-        mod=np.mod,
-        sqrt=np.sqrt,
-        cbrt=np.cbrt,
-        sin=np.sin,
-        cos=np.cos,
-        tan=np.tan,
-        arcsin=np.arcsin,
-        arccos=np.arccos,
-        arctan=np.arctan,
-        cosh=np.cosh,
-        sinh=np.sinh,
-        tanh=np.tanh,
-        arcsinh=np.arcsinh,
-        arccosh=np.arccosh,
-        arctanh=np.arctanh,
-        exp=np.exp,
-        e=np.exp,
-        ln=np.log,
-        log=np.log,
-        log2=np.log2,
-        log10=np.log10,
+    source = f"FROM {table_name_engagement_scores} JOIN users USING (user_id)"
+
+    # Distribution calculation in memory
+    rows = utils.execute_query(con, f"SELECT {columns} {source};")
+    rewards = compute_rewards(
+        [row[0] for row in rows],
+        np.array([np.nan if row[5] is None else row[5] for row in rows], dtype=float),
+        filtered_user_ids,
+        function_agix_reward,
+        function_voting_weight,
+        threshold_percentile,
+        total_agix_reward,
+        min_voting_weight,
+        max_voting_weight,
     )
 
-    def calc_agix_distribution(x):
-        try:
-            x = float(x)
-            scope = math_functions.copy()
-            scope["x"] = x
-            y = eval(function_agix_reward, scope)
-        except Exception:
-            y = 0.0
-        return y
-
-    def calc_vw_distribution(x):
-        try:
-            x = float(x)
-            scope = math_functions.copy()
-            scope["x"] = x
-            y = eval(function_voting_weight, scope)
-        except Exception:
-            y = 0.0
-        return y
-
-    con.create_function("calc_agix_distribution", 1, calc_agix_distribution)
-    con.create_function("calc_vw_distribution", 1, calc_vw_distribution)
-
-    # Create table with rewards
-    script_template = pkg_resources.resource_string(
-        __name__, "create_rewards_table.sql"
-    ).decode()
-    script = script_template.format(
-        table_name_engagement_scores=table_name_engagement_scores,
-        table_name_rewards=table_name_rewards,
-        filtered_user_ids=filtered_user_ids,
-        threshold_value=threshold_value,
-        total_agix_reward=total_agix_reward,
-        min_voting_weight=min_voting_weight,
-        max_voting_weight=max_voting_weight,
+    # Create table with rewards by a single insert of all rows, NaN is stored as NULL
+    new_columns = (
+        "CAST(NULL AS BIGINT) AS rank, CAST(NULL AS VARCHAR) AS eligibility, "
+        "CAST(NULL AS BIGINT) AS x, "
+        "CAST(NULL AS DOUBLE) AS agix_reward_fraction, "
+        "CAST(NULL AS DOUBLE) AS voting_weight_fraction, "
+        "CAST(NULL AS DOUBLE) AS agix_reward, CAST(NULL AS DOUBLE) AS voting_weight"
+    )
+    script = (
+        f"CREATE TABLE {table_name_rewards} AS "
+        f"SELECT {columns}, {new_columns} {source} LIMIT 0;"
     )
     utils.execute_script(con, script)
+    values = [
+        rewards.rank.tolist(),
+        rewards.eligibility.tolist(),
+        [x or None for x in rewards.x.tolist()],
+    ] + [[None if y != y else y for y in array.tolist()] for array in rewards[3:]]
+    utils.execute_many(
+        con,
+        f"INSERT INTO {table_name_rewards} VALUES ({', '.join('?' * 13)})",
+        [row + tuple(row_values) for row, row_values in zip(rows, zip(*values))],
+    )
+    if utils.get_backend(con) == "sqlite":
+        utils.execute_script(
+            con, "\n".join(utils.get_index_statements(table_name_rewards))
+        )
+
+
+def _read_script_template(con: utils.Connection, filename: str) -> str:
+    """Read the template of an SQL script for the backend of a connection.
+
+    A port of a template to DuckDB has the suffix ".duckdb.sql". A template
+    without a port is valid on both backends.
+
+    """
+    if utils.get_backend(con) == "duckdb":
+        ported_filename = filename.replace(".sql", ".duckdb.sql")
+        if pkg_resources.resource_exists(__name__, ported_filename):
+            filename = ported_filename
+    return pkg_resources.resource_string(__name__, filename).decode()
 
 
 def get_mission_information(
@@ -0,0 +1,200 @@
+"""Module for distributing rewards in memory with NumPy.
+
+All steps of the distribution, i.e. ranking, threshold, exclusion of users,
+application of the formulas, normalization, averaging of ties and scaling of
+voting weights, work on whole arrays of engagement scores at once.
+
+"""
+
+from typing import Callable, Iterable, List, NamedTuple, Union
+
+import numpy as np
+
+from .formula import compile_formula
+
+
+class Rewards(NamedTuple):
+    """Rewards of each user as arrays in the order of the given engagement scores.
+
+    NaN stands for NULL in the float arrays, like in the rewards table.
+
+    Attributes
+    ----------
+    rank : numpy.ndarray
+        The rank by engagement score, starting with 1 for the highest score.
+    eligibility : numpy.ndarray
+        "yes", "filtered user" or "below score threshold".
+    x : numpy.ndarray
+        The input value of the formulas, which numbers the eligible users from 1
+        for the lowest score upwards, 0 for users who are not eligible.
+    agix_reward_fraction : numpy.ndarray
+        The fraction of the total AGIX reward.
+    voting_weight_fraction : numpy.ndarray
+        The fraction of the sum of voting weights before scaling.
+    agix_reward : numpy.ndarray
+        The AGIX reward.
+    voting_weight : numpy.ndarray
+        The voting weight.
+
+    """
+
+    rank: np.ndarray
+    eligibility: np.ndarray
+    x: np.ndarray
+    agix_reward_fraction: np.ndarray
+    voting_weight_fraction: np.ndarray
+    agix_reward: np.ndarray
+    voting_weight: np.ndarray
+
+
+def compute_rewards(
+    user_ids: List,
+    engagement_scores: np.ndarray,
+    filtered_user_ids: Union[Iterable, None] = None,
+    function_agix_reward: str = "x",
+    function_voting_weight: str = "x",
+    threshold_percentile: float = 20.0,
+    total_agix_reward: float = 100_000.0,
+    min_voting_weight: float = 1.0,
+    max_voting_weight: float = 5.0,
+) -> Rewards:
+    """Calculate the rewards of users from their engagement scores.
+
+    The result is the same as that of :func:`create_rewards_table`.
+
+    Parameters
+    ----------
+    user_ids : List
+        The user IDs.
+    engagement_scores : numpy.ndarray
+        The engagement score of each user, NaN where it is NULL.
+    filtered_user_ids : Iterable, optional, default=None
+        The IDs of users who are excluded from the distribution.
+    function_agix_reward : str, optional, default="x"
+        Function expression for calculating AGIX reward, see :func:`compile_formula`.
+        Values where it is undefined are 0.0.
+    function_voting_weight : str, optional, default="x"
+        Function expression for calculating voting weight, with the same rules.
+    threshold_percentile : float, optional, default=20.0
+        Percentile of the positive engagement scores below which users are not
+        eligible.
+    total_agix_reward : float, optional, default=100_000.0
+        Total AGIX reward to distribute among eligible users.
+    min_voting_weight : float, optional, default=1.0
+        Minimum voting weight.
+    max_voting_weight : float, optional, default=5.0
+        Maximum voting weight.
+
+    Returns
+    -------
+    rewards : Rewards
+        The rank, eligibility, formula input and rewards of each user.
+
+    Raises
+    ------
+    ValueError
+        If a function expression is not valid or the lengths of the user IDs and
+        engagement scores differ.
+
+    """
+    # Argument processing
+    calc_agix_distribution = _compile_distribution(function_agix_reward)
+    calc_vw_distribution = _compile_distribution(function_voting_weight)
+    scores = np.asarray(engagement_scores, dtype=np.float64)
+    if len(user_ids) != len(scores):
+        raise ValueError("User IDs and engagement scores differ in length.")
+    num_users = len(scores)
+
+    # Rank by score and then user ID in descending order, NULL scores last
+    _, user_id_codes = np.unique(np.asarray(user_ids), return_inverse=True)
+    score_keys = np.where(np.isnan(scores), np.inf, -scores)
+    rank = np.empty(num_users, dtype=np.int64)
+    rank[np.lexsort((-user_id_codes, score_keys))] = np.arange(1, num_users + 1)
+
+    # Eligibility, a NULL score is never below the threshold
+    threshold_value = np.percentile(scores[scores > 0.0], threshold_percentile)
+    filtered = np.isin(
+        np.array([str(uid) for uid in user_ids], dtype=object),
+        [str(uid) for uid in filtered_user_ids or []],
+    )
+    below = ~filtered & (scores < threshold_value)
+    eligible = ~filtered & ~below
+    eligibility = np.full(num_users, "yes", dtype=object)
+    eligibility[filtered] = "filtered user"
+    eligibility[below] = "below score threshold"
+
+    # Input value x for distribution functions, from 1 for the lowest rank
+    x = np.zeros(num_users, dtype=np.int64)
+    eligible_indices = np.flatnonzero(eligible)
+    eligible_indices = eligible_indices[np.argsort(-rank[eligible_indices])]
+    x[eligible_indices] = np.arange(1, len(eligible_indices) + 1)
+
+    # Distributions by provided formulas, normalized so that their sum is 1.0
+    agix_reward_fraction = np.zeros(num_users)
+    agix_reward_fraction[eligible] = calc_agix_distribution(x[eligible])
+    agix_reward_fraction = _divide(agix_reward_fraction, agix_reward_fraction.sum())
+    voting_weight_fraction = np.zeros(num_users)
+    voting_weight_fraction[eligible] = calc_vw_distribution(x[eligible])
+    voting_weight_fraction = _divide(
+        voting_weight_fraction, voting_weight_fraction.sum()
+    )
+
+    # AGIX reward, equal for users with equal scores
+    agix_reward = agix_reward_fraction * total_agix_reward
+    agix_reward = _average_ties(agix_reward, scores, agix_reward > 0.0)
+
+    # Voting weight scaled to the range, equal for users with equal scores
+    if np.isnan(voting_weight_fraction).all():
+        max_voting_weight_fraction = np.nan
+    else:
+        max_voting_weight_fraction = np.nanmax(voting_weight_fraction)
+    voting_weight = _divide(voting_weight_fraction, max_voting_weight_fraction)
+    voting_weight = voting_weight * (max_voting_weight - min_voting_weight)
+    voting_weight = voting_weight + min_voting_weight
+    voting_weight = _average_ties(
+        voting_weight, scores, voting_weight > min_voting_weight
+    )
+
+    return Rewards(
+        rank,
+        eligibility,
+        x,
+        agix_reward_fraction,
+        voting_weight_fraction,
+        agix_reward,
+        voting_weight,
+    )
+
+
+def _compile_distribution(formula: str) -> Callable[[np.ndarray], np.ndarray]:
+    """Compile a reward formula, whose undefined results are replaced by 0.0."""
+    func = compile_formula(formula)
+
+    def calc_distribution(x: np.ndarray) -> np.ndarray:
+        y = func(x)
+        return np.where(np.isfinite(y), y, 0.0)
+
+    return calc_distribution
+
+
+def _divide(values: np.ndarray, divisor: float) -> np.ndarray:
+    """Divide like SQL, where a division by zero or NULL results in NULL."""
+    if divisor == 0.0 or np.isnan(divisor):
+        return np.full(len(values), np.nan)
+    return values / divisor
+
+
+def _average_ties(
+    values: np.ndarray, scores: np.ndarray, mask: np.ndarray
+) -> np.ndarray:
+    """Replace the selected values of users with equal scores by their average."""
+    mask = mask & ~np.isnan(scores)
+    _, inverse, counts = np.unique(
+        scores[mask], return_inverse=True, return_counts=True
+    )
+    if not (counts > 1).any():
+        return values
+    averages = np.bincount(inverse, weights=values[mask]) / counts
+    values = values.copy()
+    values[mask] = np.where(counts[inverse] > 1, averages[inverse], values[mask])
+    return values
@@ -0,0 +1,294 @@
+"""Module for exploring scoring and reward policies with parameter sweeps.
+
+A sweep evaluates every combination of the values in a grid of parameters on the
+counts of one filter in memory and summarizes the distribution of rewards of each
+combination, without creating any tables unless they are requested.
+
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+import numpy as np
+
+from . import utils
+from .derive import DEFAULT_VARIABLES, create_rewards_table
+from .distribute import compute_rewards
+from .formula import compile_formula
+from .vectorize import compute_engagement_scores, load_counts, store_engagement_scores
+
+
+# Parameters of the reward distribution with their defaults in create_rewards_table
+REWARD_PARAMETERS = {
+    "function_agix_reward": "x",
+    "function_voting_weight": "x",
+    "threshold_percentile": 20.0,
+    "total_agix_reward": 100_000.0,
+    "min_voting_weight": 1.0,
+    "max_voting_weight": 5.0,
+}
+
+# Names of the summary metrics of each configuration
+METRICS = [
+    "num_eligible_users",
+    "gini",
+    "top10_share",
+    "max_agix_reward",
+    "min_agix_reward",
+]
+
+# Configurations per chunk sent to a worker, relative to the number of workers
+_CHUNKS_PER_WORKER = 4
+
+
+def sweep(
+    con: utils.Connection,
+    filter_id: int,
+    grid: Dict[str, List[Any]],
+    variables: Dict[str, Any] = None,
+    filtered_user_ids: Union[Iterable, None] = None,
+    workers: int = 1,
+    progress: Union[Callable[[int, int], None], None] = None,
+    persist: Iterable[int] = (),
+    variables_id_offset: int = 0,
+    distribution_id_offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """Evaluate all combinations of scoring and reward parameters of a grid.
+
+    Each configuration gets the same engagement scores and rewards as
+    :func:`create_engagement_score_table` and :func:`create_rewards_table` would
+    create, but they are calculated in memory and only summarized.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
+    filter_id : int
+        The ID of the filter whose counts table was created by
+        :func:`create_counts_table`.
+    grid : Dict[str, List[Any]]
+        The values of each parameter to combine. The keys are names of
+        ``DEFAULT_VARIABLES`` for the weights of the engagement score and names of
+        ``REWARD_PARAMETERS`` for the distribution of rewards. The configurations
+        are numbered in the order of ``itertools.product``, i.e. the values of the
+        last key change fastest.
+    variables : Dict[str, Any], optional
+        The variables of the engagement score that are not in the grid.
+        If None, ``DEFAULT_VARIABLES`` are used.
+    filtered_user_ids : Iterable, optional, default=None
+        The IDs of users who are excluded from all distributions.
+    workers : int, optional, default=1
+        The number of worker processes. If greater than 1, chunks of configurations
+        are evaluated by a pool of processes.
+    progress : Callable[[int, int], None], optional
+        A function that is called with the number of evaluated configurations and
+        the total number of configurations whenever configurations are finished.
+    persist : Iterable[int], optional, default=()
+        The distribution IDs of configurations whose engagement scores and rewards
+        are stored as tables ``filter{filter_id}_var{variables_id}_scores`` and
+        ``filter{filter_id}_var{variables_id}_dist{distribution_id}_rewards``.
+    variables_id_offset : int, optional, default=0
+        The number added to the variables IDs, which otherwise start at 1, e.g. to
+        keep persisted tables apart from the existing ones of the filter.
+    distribution_id_offset : int, optional, default=0
+        The number added to the distribution IDs, which otherwise start at 1.
+
+    Returns
+    -------
+    results : List[Dict[str, Any]]
+        One dictionary per configuration with
+
+        - variables_id: int, the number of its set of variables in the grid plus
+          ``variables_id_offset``
+        - distribution_id: int, the number of the configuration in the grid plus
+          ``distribution_id_offset``
+        - the value of each parameter of the grid
+        - num_eligible_users: int
+        - gini: float, the Gini coefficient of the AGIX rewards of eligible users
+        - top10_share: float, the fraction of the total AGIX reward that goes to
+          the top 10 % of eligible users
+        - max_agix_reward: float
+        - min_agix_reward: float
+
+        The metrics are NaN where there are no eligible users or their rewards are
+        NULL.
+
+    Raises
+    ------
+    ValueError
+        If the grid contains an unknown parameter, no values or an invalid
+        formula, if a distribution ID to persist is not in the grid or if a table
+        to persist already exists. Nothing is evaluated in these cases.
+
+    """
+    # Preconditions
+    if workers < 1:
+        raise ValueError(f"Number of workers needs to be positive, got {workers}")
+    unknown = [name for name in grid if name not in DEFAULT_VARIABLES]
+    unknown = [name for name in unknown if name not in REWARD_PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown parameters in grid: {', '.join(unknown)}")
+    empty = [name for name, values in grid.items() if len(values) == 0]
+    if empty:
+        raise ValueError(f"Parameters without values in grid: {', '.join(empty)}")
+    for name in ["function_agix_reward", "function_voting_weight"]:
+        for formula in grid.get(name, []):
+            compile_formula(formula)
+
+    # Configurations, each with the number of its distinct set of variables
+    if variables is None:
+        variables = DEFAULT_VARIABLES
+    names = list(grid)
+    variable_sets = {}
+    configurations = []
+    for values in itertools.product(*grid.values()):
+        parameters = dict(zip(names, values))
+        key = tuple(v for n, v in parameters.items() if n in DEFAULT_VARIABLES)
+        index = variable_sets.setdefault(key, len(variable_sets) + 1)
+        configurations.append((index, parameters))
+    persist = sorted(set(persist))
+    missing = [
+        d for d in persist if not 1 <= d - distribution_id_offset <= len(configurations)
+    ]
+    if missing:
+        raise ValueError(f"Distribution IDs are not in the grid: {missing}")
+
+    # Tables to persist, which must not exist yet
+    table_names = []
+    for distribution_id in persist:
+        index, _ = configurations[distribution_id - distribution_id_offset - 1]
+        prefix = f"filter{filter_id}_var{index + variables_id_offset}"
+        table_names += [f"{prefix}_scores", f"{prefix}_dist{distribution_id}_rewards"]
+    query = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+    existing = {row[0] for row in utils.execute_query(con, query)}
+    existing = sorted(existing.intersection(table_names))
+    if existing:
+        raise ValueError(f"Tables to persist already exist: {', '.join(existing)}")
+
+    # Engagement scores of all sets of variables at once
+    counts = load_counts(con, filter_id)
+    variable_names = [name for name in names if name in DEFAULT_VARIABLES]
+    all_variables = [
+        dict(variables, **dict(zip(variable_names, key))) for key in variable_sets
+    ]
+    scores = compute_engagement_scores(counts, all_variables)
+
+    # Rewards and metrics of chunks of configurations
+    filtered_user_ids = list(filtered_user_ids or [])
+    num_chunks = len(configurations) if workers == 1 else workers * _CHUNKS_PER_WORKER
+    chunks = [
+        chunk
+        for chunk in np.array_split(np.arange(len(configurations)), num_chunks)
+        if len(chunk) > 0
+    ]
+    metrics = [None] * len(configurations)
+    num_done = 0
+
+    def arguments(chunk):
+        items = [configurations[i] for i in chunk]
+        columns = sorted({variables_id for variables_id, _ in items})
+        return (
+            counts.user_ids,
+            {v: scores[:, v - 1] for v in columns},
+            items,
+            filtered_user_ids,
+        )
+
+    def finish(chunk, chunk_metrics):
+        nonlocal num_done
+        for i, item in zip(chunk, chunk_metrics):
+            metrics[i] = item
+        num_done += len(chunk)
+        if progress is not None:
+            progress(num_done, len(configurations))
+
+    if workers == 1:
+        for chunk in chunks:
+            finish(chunk, _evaluate_configurations(*arguments(chunk)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_evaluate_configurations, *arguments(chunk)): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+
+    # Tables of chosen configurations
+    stored = set()
+    for distribution_id in persist:
+        index, parameters = configurations[distribution_id - distribution_id_offset - 1]
+        variables_id = index + variables_id_offset
+        if variables_id not in stored:
+            store_engagement_scores(
+                con, counts, filter_id, variables_id, all_variables[index - 1]
+            )
+            stored.add(variables_id)
+        create_rewards_table(
+            con,
+            filter_id,
+            variables_id,
+            distribution_id,
+            filtered_user_ids,
+            **_get_reward_parameters(parameters),
+        )
+
+    return [
+        dict(
+            variables_id=index + variables_id_offset,
+            distribution_id=i + 1 + distribution_id_offset,
+            **parameters,
+            **metrics[i],
+        )
+        for i, (index, parameters) in enumerate(configurations)
+    ]
+
+
+def _get_reward_parameters(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Complete the reward parameters of a configuration with their defaults."""
+    return {
+        name: parameters.get(name, default)
+        for name, default in REWARD_PARAMETERS.items()
+    }
+
+
+def _evaluate_configurations(
+    user_ids: List,
+    scores: Dict[int, np.ndarray],
+    configurations: List,
+    filtered_user_ids: List,
+) -> List[Dict[str, Any]]:
+    """Calculate the rewards and metrics of configurations, e.g. in a worker."""
+    results = []
+    for variables_id, parameters in configurations:
+        rewards = compute_rewards(
+            user_ids,
+            scores[variables_id],
+            filtered_user_ids,
+            **_get_reward_parameters(parameters),
+        )
+        results.append(_summarize(rewards.agix_reward[rewards.eligibility == "yes"]))
+    return results
+
+
+def _summarize(agix_rewards: np.ndarray) -> Dict[str, Any]:
+    """Calculate the metrics of the AGIX rewards of eligible users."""
+    num_users = len(agix_rewards)
+    if num_users == 0 or np.isnan(agix_rewards).any():
+        return dict(num_eligible_users=num_users, **dict.fromkeys(METRICS[1:], np.nan))
+    values = np.sort(agix_rewards)
+    total = values.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ranks = np.arange(1, num_users + 1)
+        gini = (2.0 * (ranks * values).sum() / (num_users * total)) - (
+            (num_users + 1) / num_users
+        )
+        top10_share = values[-int(np.ceil(num_users / 10)) :].sum() / total
+    return dict(
+        num_eligible_users=num_users,
+        gini=float(gini) if np.isfinite(gini) else np.nan,
+        top10_share=float(top10_share) if np.isfinite(top10_share) else np.nan,
+        max_agix_reward=float(values[-1]),
+        min_agix_reward=float(values[0]),
+    )
@@ -1,14 +1,58 @@
 """Module for extracting JSON data from a Swae data export."""
 
+import codecs
 import glob
 import json
 import os
+import posixpath
+import re
 import shutil
 import tempfile
-from typing import Any, Dict, List
-
-
-def extract_swae_data(zip_filepath: str) -> Dict[str, Any]:
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+FILENAMES = [
+    "missions.json",
+    "proposals.json",
+    "users.json",
+    "votesByProposalId.json",
+    "commentsByProposalId.json",
+    "reactionsByCommentIdByType.json",
+    "upvotesByCommentId.json",
+    "downvotesByCommentId.json",
+    "viewsByProposalId.json",
+]
+
+# Entity name => (filename, name of the nested data, nesting depth of the records)
+ENTITIES = {
+    "missions": ("missions.json", None, 0),
+    "proposals": ("proposals.json", None, 0),
+    "users": ("users.json", None, 0),
+    "ratings": ("votesByProposalId.json", "ratings_by_proposal", 1),
+    "comments": ("commentsByProposalId.json", "comments_by_proposal", 1),
+    "reactions": (
+        "reactionsByCommentIdByType.json",
+        "reactions_by_comment_by_type",
+        2,
+    ),
+    "upvotes": ("upvotesByCommentId.json", "upvotes_by_comment", 1),
+    "downvotes": ("downvotesByCommentId.json", "downvotes_by_comment", 1),
+    "views": ("viewsByProposalId.json", "views_by_proposal", 1),
+}
+
+# Nested JSON files above this size are decoded in shards when workers are used
+SHARD_MIN_BYTES = 8 * 1024 * 1024
+
+
+def extract_swae_data(
+    zip_filepath: str,
+    mode: str = "stream",
+    stats: Optional[Dict[str, Dict[str, float]]] = None,
+    workers: int = 1,
+) -> Dict[str, Any]:
     """Extract JSON data from a ZIP file that comes from a Swae data export.
 
     Parameters
@@ -16,6 +60,27 @@ def extract_swae_data(zip_filepath: str) -> Dict[str, Any]:
     zip_filepath : str
         The path of the ZIP file, which contains a data export of Swae
         in form of multiple JSON files.
+    mode : str, optional, default="stream"
+        The extraction mode.
+
+        - "stream": Locate the JSON files via the central directory of the ZIP file
+          and decode them directly from the compressed archive, without writing
+          anything to disk.
+        - "unpack": Unpack the whole ZIP file into a temporary directory first and
+          then load each JSON file from there.
+        - "incremental": Decode the JSON files record by record with the
+          incremental parser behind :func:`iter_swae_records`.
+    stats : Dict[str, Dict[str, float]], optional
+        A dictionary that gets filled with statistics about each JSON file,
+        keyed by filename. Each entry contains "bytes_read" (size of the
+        decompressed JSON text) and "seconds" (time spent on reading and decoding).
+    workers : int, optional, default=1
+        The number of worker processes that decode JSON files in parallel.
+        Only supported by the "stream" mode. Nested JSON files larger than
+        ``SHARD_MIN_BYTES`` are additionally split into shards of top-level keys
+        (e.g. proposal IDs), which are decoded and flattened by different workers.
+        Decoded data has to be transferred back to the calling process, so this
+        only pays off for large exports on machines with several idle CPU cores.
 
     Returns
     -------
@@ -29,29 +94,51 @@ def extract_swae_data(zip_filepath: str) -> Dict[str, Any]:
         If an expected JSON file is not contained in it.
     ValueError
         If there are errors in loading or processing the JSON files.
+        If an unknown mode is given.
+        If parallel workers are requested for a mode other than "stream".
 
     """
-    # Create a temporary directory that is deleted after the block
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Extract the ZIP file into the temporary directory
-        _unzip_file(zip_filepath, temp_dir)
-
-        # Detect the filepath for each filename
-        filenames = [
-            "missions.json",
-            "proposals.json",
-            "users.json",
-            "votesByProposalId.json",
-            "commentsByProposalId.json",
-            "reactionsByCommentIdByType.json",
-            "upvotesByCommentId.json",
-            "downvotesByCommentId.json",
-            "viewsByProposalId.json",
-        ]
-        filepaths = _find_filepaths(temp_dir, filenames)
-
-        # Load data from each file
-        raw_data = {fn: _load_json_file(fp) for fn, fp in zip(filenames, filepaths)}
+    # Argument processing
+    if stats is None:
+        stats = {}
+    if workers < 1:
+        raise ValueError(f"Number of workers needs to be positive, got {workers}")
+    if workers > 1 and mode != "stream":
+        raise ValueError(f'Parallel workers are not supported in mode "{mode}"')
+
+    flat_data = {}
+    if mode == "stream" and workers > 1:
+        raw_data, flat_data = _load_zip_members_parallel(
+            zip_filepath, FILENAMES, stats, workers
+        )
+    elif mode == "stream":
+        raw_data = _load_zip_members(zip_filepath, FILENAMES, stats)
+    elif mode == "unpack":
+        # Create a temporary directory that is deleted after the block
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Extract the ZIP file into the temporary directory
+            _unzip_file(zip_filepath, temp_dir)
+
+            # Detect the filepath for each filename
+            filepaths = _find_filepaths(temp_dir, FILENAMES)
+
+            # Load data from each file
+            raw_data = {}
+            for fn, fp in zip(FILENAMES, filepaths):
+                start = time.perf_counter()
+                raw_data[fn] = _load_json_file(fp)
+                stats[fn] = dict(
+                    bytes_read=os.path.getsize(fp),
+                    seconds=time.perf_counter() - start,
+                )
+    elif mode == "incremental":
+        return _extract_incrementally(zip_filepath, stats)
+    else:
+        message = (
+            f'Unknown extraction mode "{mode}". '
+            'Valid: "stream", "unpack", "incremental"'
+        )
+        raise ValueError(message)
 
     # Associate data with simpler names
     data = {
@@ -66,23 +153,254 @@ def extract_swae_data(zip_filepath: str) -> Dict[str, Any]:
         "views_by_proposal": raw_data["viewsByProposalId.json"],
     }
 
-    # Flatten nested data
-    data["ratings"] = _flatten_list(data["ratings_by_proposal"].values())
-    data["comments"] = _flatten_list(data["comments_by_proposal"].values())
-    data["upvotes"] = _flatten_list(data["upvotes_by_comment"].values())
-    data["downvotes"] = _flatten_list(data["downvotes_by_comment"].values())
-    data["views"] = _flatten_list(data["views_by_proposal"].values())
+    # Flatten nested data, unless it has already been done in parallel
+    for entity, (filename, nested_name, depth) in ENTITIES.items():
+        if depth == 0:
+            continue
+        if filename in flat_data:
+            data[entity] = flat_data[filename]
+        else:
+            data[entity] = _flatten_records(data[nested_name], depth)
+    return data
 
-    # Flatten doubly nested data
-    reactions = []
-    for some_reactions_by_comment in data["reactions_by_comment_by_type"].values():
-        for some_reactions in some_reactions_by_comment.values():
-            if len(some_reactions) > 0:
-                reactions.extend(some_reactions)
-    data["reactions"] = reactions
+
+def iter_swae_records(
+    zip_filepath: str, entity: str, chunk_size: int = 2**16
+) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records of one entity in a ZIP file from a Swae data export.
+
+    The corresponding JSON file is decompressed and parsed incrementally, so that
+    peak memory usage depends on the size of a single record rather than on the
+    size of the whole file. Records that are nested by proposal, comment or
+    reaction type in the export are delivered as a flat sequence.
+
+    Parameters
+    ----------
+    zip_filepath : str
+        The path of the ZIP file, which contains a data export of Swae
+        in form of multiple JSON files.
+    entity : str
+        The name of the entity, one of "missions", "proposals", "users", "ratings",
+        "comments", "reactions", "upvotes", "downvotes", "views".
+    chunk_size : int, optional, default=65536
+        The number of bytes that are read from the archive at once.
+
+    Returns
+    -------
+    records : Iterator[Dict[str, Any]]
+        An iterator over the records, each deserialized as a dictionary.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the ZIP file does not exist.
+        If the JSON file of the entity is not contained in it.
+    ValueError
+        If the entity is unknown.
+        If the ZIP file can not be read. During iteration, if the JSON file
+        is not in the expected format.
+
+    """
+    # Argument processing
+    if entity not in ENTITIES:
+        valid = ", ".join(f'"{e}"' for e in ENTITIES)
+        raise ValueError(f'Unknown entity "{entity}". Valid: {valid}')
+    filename, _, depth = ENTITIES[entity]
+
+    # Precondition: ZIP file can be opened and contains the JSON file
+    with _open_zip_file(zip_filepath) as zip_file:
+        _find_zip_members(zip_file, [filename])
+    return _generate_records(zip_filepath, filename, depth, chunk_size)
+
+
+def _generate_records(
+    zip_filepath: str, filename: str, depth: int, chunk_size: int
+) -> Iterator[Dict[str, Any]]:
+    with _open_zip_file(zip_filepath) as zip_file:
+        (member,) = _find_zip_members(zip_file, [filename])
+        with zip_file.open(member) as f:
+            reader = _IncrementalJsonReader(f, member.filename, chunk_size)
+            for _, records in _iter_record_lists(reader, depth):
+                if records is not None:
+                    yield from records
+            reader.finish()
+
+
+def _extract_incrementally(
+    zip_filepath: str, stats: Dict[str, Dict[str, float]]
+) -> Dict[str, Any]:
+    """Build the same dictionary as the other extraction modes from record streams."""
+    data = {}
+    with _open_zip_file(zip_filepath) as zip_file:
+        for entity, (filename, nested_name, depth) in ENTITIES.items():
+            start = time.perf_counter()
+            (member,) = _find_zip_members(zip_file, [filename])
+            with zip_file.open(member) as f:
+                reader = _IncrementalJsonReader(f, member.filename)
+                flat = []
+                nested = {}
+                for keys, records in _iter_record_lists(reader, depth):
+                    if records is None:
+                        # Begin of an intermediate object, which may be empty
+                        _get_node(nested, keys)
+                        continue
+                    records = list(records)
+                    if keys:
+                        _get_node(nested, keys[:-1])[keys[-1]] = records
+                    flat.extend(records)
+                reader.finish()
+            if nested_name is not None:
+                data[nested_name] = nested
+            data[entity] = flat
+            stats[filename] = dict(
+                bytes_read=reader.num_bytes, seconds=time.perf_counter() - start
+            )
     return data
 
 
+def _get_node(nested: Dict[str, Any], keys: Tuple[str, ...]) -> Dict[str, Any]:
+    node = nested
+    for key in keys:
+        node = node.setdefault(key, {})
+    return node
+
+
+class _IncrementalJsonReader:
+    """Reader that decodes JSON text from a binary stream one value at a time.
+
+    Containers (objects, arrays) are walked token by token with the methods
+    ``peek`` and ``consume``, while the values inside them are decoded as a whole
+    with the C-accelerated decoder of the json module. Only the not yet
+    consumed part of the text is kept in a buffer.
+
+    """
+
+    _whitespace = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, binary_file: IO[bytes], name: str, chunk_size: int = 2**16):
+        self.name = name
+        self.num_bytes = 0
+        self._file = binary_file
+        self._chunk_size = chunk_size
+        self._text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_chunk(self) -> bool:
+        """Append the next chunk of text to the buffer, return False at the end."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        self.num_bytes += len(chunk)
+        if chunk:
+            text = self._text_decoder.decode(chunk)
+        else:
+            text = self._text_decoder.decode(b"", final=True)
+            self._eof = True
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+        return not self._eof
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            self._pos = self._whitespace.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_chunk():
+                return ""
+
+    def consume(self, char: str) -> None:
+        """Consume the next non-whitespace character, which has to be the given one."""
+        found = self.peek()
+        if found != char:
+            self.fail(f'Expected "{char}" but found "{found}"')
+        self._pos += 1
+
+    def decode(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+                # A value that ends with the buffer might continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    self.fail(str(e))
+            self._read_chunk()
+
+    def finish(self) -> None:
+        """Ensure that nothing but whitespace follows the consumed JSON text."""
+        if self.peek() != "":
+            self.fail("Extra data after the end of the JSON text")
+
+    def fail(self, reason: str) -> None:
+        message = (
+            "JSON file could not be loaded. "
+            f"The content might not to be in JSON format.\nGiven member: {self.name}"
+            f"\nReason: {reason}"
+        )
+        raise ValueError(message)
+
+
+def _iter_record_lists(
+    reader: _IncrementalJsonReader, depth: int, keys: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], Optional[Iterator[Any]]]]:
+    """Iterate over the innermost arrays of records nested in objects of given depth.
+
+    Each array is delivered as a pair of the keys that lead to it and a lazy iterator
+    over its records, which is drained before the next pair is produced. The begin
+    of each intermediate object is signaled by a pair whose second item is None.
+
+    """
+    if depth == 0:
+        records = _iter_array(reader)
+        yield keys, records
+        for _ in records:
+            pass
+    else:
+        for key in _iter_object_keys(reader):
+            if depth > 1:
+                yield keys + (key,), None
+            yield from _iter_record_lists(reader, depth - 1, keys + (key,))
+
+
+def _iter_array(reader: _IncrementalJsonReader) -> Iterator[Any]:
+    reader.consume("[")
+    if reader.peek() == "]":
+        reader.consume("]")
+        return
+    while True:
+        yield reader.decode()
+        if reader.peek() != ",":
+            reader.consume("]")
+            return
+        reader.consume(",")
+
+
+def _iter_object_keys(reader: _IncrementalJsonReader) -> Iterator[str]:
+    # Note: The caller has to consume the value of a key before resuming
+    reader.consume("{")
+    if reader.peek() == "}":
+        reader.consume("}")
+        return
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            reader.fail(f"Expected an object key but found {key!r}")
+        reader.consume(":")
+        yield key
+        if reader.peek() != ",":
+            reader.consume("}")
+            return
+        reader.consume(",")
+
+
 def _unzip_file(source_filepath: str, target_dirpath: str) -> None:
     """Unpack the contents of a ZIP file into a given target directory.
 
@@ -119,6 +437,319 @@ def _unzip_file(source_filepath: str, target_dirpath: str) -> None:
         raise FileNotFoundError(message)
 
 
+def _load_zip_members(
+    zip_filepath: str, filenames: List[str], stats: Dict[str, Dict[str, float]]
+) -> Dict[str, Any]:
+    """Load JSON files directly from a ZIP file without unpacking it to disk.
+
+    Parameters
+    ----------
+    zip_filepath : str
+        The path of the ZIP file.
+    filenames : List[str]
+        A list of filenames to search for in the archive and its subdirectories.
+    stats : Dict[str, Dict[str, float]]
+        A dictionary that gets filled with bytes read and seconds spent per file.
+
+    Returns
+    -------
+    raw_data : Dict[str, Any]
+        The content of each JSON file, deserialized as Python objects and
+        keyed by filename.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the ZIP file does not exist.
+        If a given filename cannot be found within the archive.
+    ValueError
+        If the ZIP file can not be read or a JSON file can not be loaded.
+
+    """
+    with _open_zip_file(zip_filepath) as zip_file:
+        members = _find_zip_members(zip_file, filenames)
+        raw_data = {}
+        for fn, member in zip(filenames, members):
+            start = time.perf_counter()
+            raw_data[fn], num_bytes = _load_json_member(zip_file, member)
+            stats[fn] = dict(bytes_read=num_bytes, seconds=time.perf_counter() - start)
+    return raw_data
+
+
+def _open_zip_file(zip_filepath: str) -> zipfile.ZipFile:
+    """Open a ZIP file for reading.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the ZIP file does not exist.
+    ValueError
+        If the file can not be opened as ZIP file.
+
+    """
+    # Precondition: ZIP file exists
+    if not os.path.isfile(zip_filepath):
+        message = f"Source file could not be found.\nGiven path: {zip_filepath}"
+        raise FileNotFoundError(message)
+
+    try:
+        return zipfile.ZipFile(zip_filepath)
+    except Exception as e:
+        raise ValueError(f"Error during opening the ZIP file: {e}")
+
+
+def _find_zip_members(
+    zip_file: zipfile.ZipFile, filenames: List[str]
+) -> List[zipfile.ZipInfo]:
+    """Find the members of given filenames in the central directory of a ZIP file.
+
+    Parameters
+    ----------
+    zip_file : zipfile.ZipFile
+        The opened ZIP file.
+    filenames : List[str]
+        A list of filenames to search for. A member matches if the last
+        component of its path is equal to the filename.
+
+    Returns
+    -------
+    members : List[zipfile.ZipInfo]
+        A list of archive members in the same order as the given filenames.
+        If a filename occurs several times, the first occurrence is chosen.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a given filename cannot be found within the archive.
+
+    """
+    found = {}
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+        basename = posixpath.basename(info.filename)
+        if basename in filenames and basename not in found:
+            found[basename] = info
+
+    members = []
+    for fn in filenames:
+        if fn not in found:
+            message = (
+                "Filename could not be found in the given ZIP file and its subdirectories."
+                f"\nGiven ZIP file: {zip_file.filename}\nGiven filename: {fn}."
+            )
+            raise FileNotFoundError(message)
+        members.append(found[fn])
+    return members
+
+
+def _load_json_member(
+    zip_file: zipfile.ZipFile, member: zipfile.ZipInfo
+) -> Tuple[Any, int]:
+    """Load the content of a JSON file that is a member of an opened ZIP file.
+
+    Parameters
+    ----------
+    zip_file : zipfile.ZipFile
+        The opened ZIP file.
+    member : zipfile.ZipInfo
+        The archive member that holds the JSON file.
+
+    Returns
+    -------
+    data : Any
+        The content of the JSON file, deserialized as Python objects.
+    num_bytes : int
+        The number of decompressed bytes that were read.
+
+    Raises
+    ------
+    ValueError
+        If the JSON file can not be loaded, e.g. due to content in an invalid format.
+
+    """
+    try:
+        with zip_file.open(member) as f:
+            raw_bytes = f.read()
+        return json.loads(raw_bytes), len(raw_bytes)
+    except Exception:
+        message = (
+            "JSON file could not be loaded. "
+            f"The content might not to be in JSON format.\nGiven member: {member.filename}"
+        )
+        raise ValueError(message)
+
+
+def _load_zip_members_parallel(
+    zip_filepath: str,
+    filenames: List[str],
+    stats: Dict[str, Dict[str, float]],
+    workers: int,
+) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+    """Load JSON files directly from a ZIP file with a pool of worker processes.
+
+    Returns
+    -------
+    raw_data : Dict[str, Any]
+        The content of each JSON file, keyed by filename.
+    flat_data : Dict[str, List[Any]]
+        The flattened records of each JSON file that was split into shards,
+        keyed by filename.
+
+    """
+    depths = {filename: depth for filename, _, depth in ENTITIES.values()}
+    with _open_zip_file(zip_filepath) as zip_file:
+        members = _find_zip_members(zip_file, filenames)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Large nested files: split into shards and decode them in parallel.
+            # Small files: decode each of them as a whole in a worker.
+            futures = {}
+            for fn, member in sorted(
+                zip(filenames, members), key=lambda pair: -pair[1].file_size
+            ):
+                depth = depths.get(fn, 0)
+                shards = None
+                if depth > 0 and member.file_size >= SHARD_MIN_BYTES:
+                    with zip_file.open(member) as f:
+                        raw_bytes = f.read()
+                    shards = _split_json_object(raw_bytes, workers)
+                    del raw_bytes
+                if shards is None:
+                    futures[fn] = [
+                        executor.submit(_decode_zip_member, zip_filepath, member)
+                    ]
+                else:
+                    futures[fn] = [
+                        executor.submit(_decode_shard, shard, depth, member.filename)
+                        for shard in shards
+                    ]
+
+            # Collect results in the original order of keys
+            raw_data = {}
+            flat_data = {}
+            for fn in filenames:
+                results = [future.result() for future in futures[fn]]
+                num_bytes = sum(result.num_bytes for result in results)
+                seconds = sum(result.seconds for result in results)
+                stats[fn] = dict(bytes_read=num_bytes, seconds=seconds)
+                if results[0].records is None:
+                    raw_data[fn] = results[0].data
+                    continue
+                nested = {}
+                flat = []
+                for result in results:
+                    nested.update(result.data)
+                    flat.extend(result.records)
+                raw_data[fn] = nested
+                flat_data[fn] = flat
+    return raw_data, flat_data
+
+
+class _DecodedPart(NamedTuple):
+    """Result of a worker that decodes a whole JSON file or a shard of it."""
+
+    data: Any
+    # Flattened records of a shard, None for a whole file
+    records: Optional[List[Any]]
+    num_bytes: int
+    seconds: float
+
+
+def _decode_zip_member(zip_filepath: str, member: zipfile.ZipInfo) -> _DecodedPart:
+    """Decode a JSON file of a ZIP file in a worker process."""
+    start = time.perf_counter()
+    with zipfile.ZipFile(zip_filepath) as zip_file:
+        data, num_bytes = _load_json_member(zip_file, member)
+    return _DecodedPart(data, None, num_bytes, time.perf_counter() - start)
+
+
+def _decode_shard(shard: bytes, depth: int, name: str) -> _DecodedPart:
+    """Decode and flatten a shard of a nested JSON file in a worker process."""
+    start = time.perf_counter()
+    try:
+        nested = json.loads(shard)
+    except Exception:
+        message = (
+            "JSON file could not be loaded. "
+            f"The content might not to be in JSON format.\nGiven member: {name}"
+        )
+        raise ValueError(message)
+    flat = _flatten_records(nested, depth)
+    return _DecodedPart(nested, flat, len(shard), time.perf_counter() - start)
+
+
+def _json_value_pattern(max_depth: int) -> bytes:
+    """Create a regular expression for JSON objects and arrays up to a nesting depth.
+
+    Possessive quantifiers prevent backtracking, so that the regular expression
+    engine skips over the content of each value in linear time.
+
+    """
+    string = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    content = rb"(?:[^\"\[\]{}]++|" + string + rb")*+"
+    for _ in range(max_depth - 1):
+        content = rb"(?:[^\"\[\]{}]++|" + string + rb"|[\[{]" + content + rb"[\]}])*+"
+    return rb"[\[{]" + content + rb"[\]}]"
+
+
+_TOP_LEVEL_KEY = rb'\s*+("[^"\\]*+(?:\\.[^"\\]*+)*+")\s*+:\s*+'
+_TOP_LEVEL_ENTRY = re.compile(
+    _TOP_LEVEL_KEY + _json_value_pattern(max_depth=8) + rb"\s*+([,}])", re.DOTALL
+)
+
+
+def _split_json_object(raw_bytes: bytes, num_shards: int) -> Optional[List[bytes]]:
+    """Split the text of a JSON object into smaller JSON objects of similar size.
+
+    Each shard holds a contiguous range of top-level keys and their values.
+
+    Parameters
+    ----------
+    raw_bytes : bytes
+        The UTF-8 encoded JSON text of an object.
+    num_shards : int
+        The desired number of shards.
+
+    Returns
+    -------
+    shards : Optional[List[bytes]]
+        The JSON text of each shard or None if the object can not be split,
+        e.g. because its values are nested too deeply.
+
+    """
+    start = len(codecs.BOM_UTF8) if raw_bytes.startswith(codecs.BOM_UTF8) else 0
+    match = re.compile(rb"\s*+{").match(raw_bytes, start)
+    if match is None:
+        return None
+
+    # Find where each top-level entry starts and ends
+    pos = match.end()
+    bounds = []
+    while True:
+        match = _TOP_LEVEL_ENTRY.match(raw_bytes, pos)
+        if match is None:
+            return None
+        bounds.append((match.start(1), match.start(2)))
+        pos = match.end()
+        if match.group(2) == b"}":
+            break
+    if raw_bytes[pos:].strip() or len(bounds) < 2:
+        return None
+
+    # Group contiguous entries into shards of similar size
+    target_size = (bounds[-1][1] - bounds[0][0]) / num_shards
+    shards = []
+    first = bounds[0][0]
+    for i, (entry_start, entry_end) in enumerate(bounds):
+        is_last = i == len(bounds) - 1
+        if is_last or entry_end - first >= target_size:
+            shards.append(b"{" + raw_bytes[first:entry_end] + b"}")
+            if not is_last:
+                first = bounds[i + 1][0]
+    return shards
+
+
 def _find_filepaths(dirpath: str, filenames: List[str]) -> List[str]:
     """Find the filepaths of given filenames within a directory and its subdirectories.
 
@@ -200,6 +831,35 @@ def _load_json_file(filepath: str) -> Any:
         raise ValueError(message)
 
 
+def _flatten_records(nested: Dict[str, Any], depth: int) -> List[Any]:
+    """Flatten records that are nested in dictionaries of given depth (1 or 2).
+
+    Parameters
+    ----------
+    nested : Dict[str, Any]
+        The nested records, e.g. lists of views by proposal ID or
+        lists of reactions by comment ID and reaction type.
+    depth : int
+        The number of dictionary levels above the lists of records.
+
+    Returns
+    -------
+    flat_list : List[Any]
+        The flattened list of records.
+
+    """
+    if depth == 1:
+        return _flatten_list(nested.values())
+
+    # Flatten doubly nested data
+    records = []
+    for some_records_by_key in nested.values():
+        for some_records in some_records_by_key.values():
+            if len(some_records) > 0:
+                records.extend(some_records)
+    return records
+
+
 def _flatten_list(nested_list: List[List[Any]]) -> List[Any]:
     """Flatten a nested list.
 
@@ -0,0 +1,148 @@
+"""Module for compiling user-provided reward formulas into NumPy functions.
+
+A formula is an arithmetic expression of the variable ``x``, e.g. ``sqrt(x) + 1``.
+It is parsed and validated once, so that errors are reported before any reward is
+calculated, and then evaluated on a whole array of ``x`` values in one call.
+
+"""
+
+import ast
+from typing import Callable
+
+import numpy as np
+
+
+# Functions that can be called in a formula with their number of arguments
+MATH_FUNCTIONS = dict(
+    abs=(np.abs, 1),
+    ceil=(np.ceil, 1),
+    floor=(np.floor, 1),
+    mod=(np.mod, 2),
+    sqrt=(np.sqrt, 1),
+    cbrt=(np.cbrt, 1),
+    sin=(np.sin, 1),
+    cos=(np.cos, 1),
+    tan=(np.tan, 1),
+    arcsin=(np.arcsin, 1),
+    arccos=(np.arccos, 1),
+    arctan=(np.arctan, 1),
+    cosh=(np.cosh, 1),
+    sinh=(np.sinh, 1),
+    tanh=(np.tanh, 1),
+    arcsinh=(np.arcsinh, 1),
+    arccosh=(np.arccosh, 1),
+    arctanh=(np.arctanh, 1),
+    exp=(np.exp, 1),
+    e=(np.exp, 1),
+    ln=(np.log, 1),
+    log=(np.log, 1),
+    log2=(np.log2, 1),
+    log10=(np.log10, 1),
+)
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+# Longer formulas are rejected, so that user input cannot exhaust the stack
+MAX_FORMULA_LENGTH = 1000
+
+
+def compile_formula(formula: str) -> Callable[[np.ndarray], np.ndarray]:
+    """Compile a formula of the variable ``x`` into a function of an array.
+
+    A formula may only contain the variable ``x``, numbers, the operators
+    ``+ - * / // % **``, parentheses and calls of the functions in
+    ``MATH_FUNCTIONS``, and at most ``MAX_FORMULA_LENGTH`` characters.
+
+    Parameters
+    ----------
+    formula : str
+        The formula, e.g. ``"x**2"`` or ``"log(x) + 1"``.
+
+    Returns
+    -------
+    func : Callable[[numpy.ndarray], numpy.ndarray]
+        A function that evaluates the formula for an array of ``x`` values and
+        returns an array of floats of the same shape. Undefined results such as
+        ``log(0)`` become infinite or NaN instead of raising an error.
+
+    Raises
+    ------
+    ValueError
+        If the formula is not valid.
+
+    """
+    if len(formula) > MAX_FORMULA_LENGTH:
+        raise ValueError(
+            f"Formula is not valid: it is longer than {MAX_FORMULA_LENGTH} characters"
+        )
+    try:
+        return _compile_formula(formula)
+    except (RecursionError, MemoryError):
+        raise ValueError(
+            f"Formula {formula!r} is not valid: it is nested too deeply"
+        ) from None
+
+
+def _compile_formula(formula: str) -> Callable[[np.ndarray], np.ndarray]:
+    """Parse, check and compile a formula of limited length."""
+    try:
+        tree = ast.parse(formula.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Formula {formula!r} is not valid: {e.msg}") from None
+    message = _check_node(tree.body)
+    if message:
+        raise ValueError(f"Formula {formula!r} is not valid: {message}")
+    # Numbers are floats like x, so that constant parts cannot grow without bound
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant):
+            node.value = float(node.value)
+    code = compile(tree, "<formula>", "eval")
+    scope = {name: func for name, (func, _) in MATH_FUNCTIONS.items()}
+    scope["__builtins__"] = {}
+
+    def func(x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        with np.errstate(all="ignore"):
+            y = eval(code, scope, {"x": x})
+        return np.broadcast_to(np.asarray(y, dtype=np.float64), x.shape).copy()
+
+    try:
+        func(np.ones(1))
+    except ArithmeticError:
+        raise ValueError(
+            f"Formula {formula!r} is not valid: a number is out of range"
+        ) from None
+    return func
+
+
+def _check_node(node: ast.AST) -> str:
+    """Return why a node of a formula or one of its children is not allowed."""
+    if isinstance(node, ast.BinOp):
+        if not isinstance(node.op, _OPERATORS):
+            return f"operator {type(node.op).__name__} is not allowed"
+        return _check_node(node.left) or _check_node(node.right)
+    if isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, _UNARY_OPERATORS):
+            return f"operator {type(node.op).__name__} is not allowed"
+        return _check_node(node.operand)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            return f"{node.value!r} is not a number"
+        return ""
+    if isinstance(node, ast.Name):
+        if node.id != "x":
+            return f"name {node.id!r} is not known, only x is a variable"
+        return ""
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in MATH_FUNCTIONS:
+            return f"only calls of {', '.join(MATH_FUNCTIONS)} are allowed"
+        num_args = MATH_FUNCTIONS[node.func.id][1]
+        if node.keywords or len(node.args) != num_args:
+            return f"{node.func.id} takes {num_args} argument(s)"
+        for arg in node.args:
+            message = _check_node(arg)
+            if message:
+                return message
+        return ""
+    return f"{type(node).__name__} is not allowed"
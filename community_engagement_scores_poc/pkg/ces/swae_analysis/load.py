@@ -1,20 +1,97 @@
 """Module for loading preprocessed Swae data into useful formats."""
 
+import contextlib
 import csv
+import fnmatch
+import gzip
+import json
+import math
 import os
+import re
 import sqlite3
-from typing import Dict, Tuple
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape, quoteattr
 
 from . import utils
 
 
+# https://www.sqlite.org/datatype3.html
+DATATYPE_MAP = {
+    "bool": "BOOLEAN",
+    "int": "INTEGER",
+    "float": "REAL",
+    "str": "TEXT",
+}
+
+# https://duckdb.org/docs/sql/data_types/overview
+DUCKDB_DATATYPE_MAP = {
+    "bool": "BOOLEAN",
+    "int": "BIGINT",
+    "float": "DOUBLE",
+    "str": "VARCHAR",
+}
+
+# Expression of a virtual datetime column that is computed from a timestamp column.
+# Generated columns need to be deterministic, therefore they are in UTC like the
+# datetimes formatted by the transformation. A timestamp of 0 marks a missing date.
+VIRTUAL_DATETIME_EXPRESSION = (
+    "CASE WHEN {0} = 0 THEN '' "
+    "ELSE strftime('%Y-%m-%d %H:%M:%f', {0} / 1000.0, 'unixepoch') END"
+)
+
+# Pragmas of fast loading. A database that is being built is discarded if anything
+# fails, so it needs neither a rollback journal nor syncs to disk. The page size
+# needs to be set before the first table is created.
+FAST_LOAD_PRAGMAS = {
+    "page_size": 8192,
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "cache_size": -256 * 1024,  # KiB
+    "temp_store": "MEMORY",
+    "locking_mode": "EXCLUSIVE",
+}
+
+# Parquet export: codecs supported by pyarrow and rows per row group
+PARQUET_COMPRESSIONS = ("zstd", "snappy", "gzip", "brotli", "lz4", "none")
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+# CSV export: compressions with their file extension and rows fetched at once
+CSV_COMPRESSIONS = {None: ".csv", "gzip": ".csv.gz", "zstd": ".csv.zst"}
+CSV_BATCH_SIZE = 10_000
+
+# Excel export: rows per sheet including the header, and rows fetched at once
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_BATCH_SIZE = 10_000
+
+# Tables that record the selections of filters and which derived tables are stale.
+# They are needed by this package, but not exported unless requested.
+BOOKKEEPING_TABLES = ["filter*_selection", "filter*_time_ranges", "stale_tables"]
+
+# Base tables that are used by the filter views and counts of derived tables
+FILTERED_TABLES = ["missions", "proposals", "ratings", "comments", "reactions"]
+
+
 def load_sqlite(
     tabular_data: Dict[str, Tuple],
     filepath: str = ":memory:",
     use_foreign_keys: bool = False,
+    datetime_columns: str = "stored",
+    fast: bool = False,
+    build_in_memory: bool = False,
 ) -> sqlite3.Connection:
     """Load preprocessed tabular data into an SQLite database.
 
+    The first column of each table is its primary key. If it is an integer column,
+    e.g. reaction_id and view_id with ``id_format="int64"`` in
+    :func:`ces.swae_analysis.transform_swae_data`, it becomes the rowid of the
+    table (INTEGER PRIMARY KEY), otherwise a unique index is created on it.
+    Secondary indexes that the filter views and derive scripts search with are
+    created after the rows are inserted, see :func:`create_indexes`.
+
     Parameters
     ----------
     tabular_data : Dict[str, Tuple]
@@ -25,6 +102,84 @@ def load_sqlite(
         Caution: If the file exists it will be overwritten.
     use_foreign_keys : bool, optional, default=False
         A flag that determines whether foreign key support is be enabled in SQLite.
+    datetime_columns : str, optional, default="stored"
+        How a column like creation_datetime is stored if the table has a
+        corresponding timestamp column like creation_timestamp.
+
+        - "stored": The datetime strings of the tabular data are stored.
+        - "virtual": The column is a virtual generated column that SQLite computes
+          from the timestamp when it is read, which needs no time to load and no
+          storage, see ``VIRTUAL_DATETIME_EXPRESSION``. Tabular data transformed with
+          the same option has no datetime columns, which are then added after
+          their timestamp columns. Datetime strings of other tabular data are
+          skipped.
+    fast : bool, optional, default=False
+        A flag that determines whether the database is built in bulk-load mode.
+        If True, the pragmas ``FAST_LOAD_PRAGMAS`` are used while loading,
+        everything is loaded in a single transaction, the unique indexes are
+        created after all rows are inserted and ``ANALYZE`` collects statistics
+        for the query planner at the end. A database file is built under a
+        temporary name next to the target and then moved into place atomically,
+        so that readers see either the old file or the complete new one.
+    build_in_memory : bool, optional, default=False
+        A flag that determines whether a database file is built in memory first
+        and then written to disk with the backup API of SQLite. This is faster
+        if the database fits into memory. Only used if ``fast`` is True.
+
+    Returns
+    -------
+    con : sqlite3.Connection
+        The SQLite database connection object.
+
+    Raises
+    ------
+    sqlite3.IntegrityError
+        If a primary key or foreign key constraint is violated, including the
+        unlikely case that two different rows got the same 64-bit identifier.
+
+    """
+    return load_sqlite_batches(
+        tabular_data.items(),
+        filepath,
+        use_foreign_keys,
+        datetime_columns,
+        fast,
+        build_in_memory,
+    )
+
+
+def load_sqlite_batches(
+    batches: Iterable[Tuple[str, Tuple]],
+    filepath: str = ":memory:",
+    use_foreign_keys: bool = False,
+    datetime_columns: str = "stored",
+    fast: bool = False,
+    build_in_memory: bool = False,
+) -> sqlite3.Connection:
+    """Load batches of preprocessed tabular data into an SQLite database as they arrive.
+
+    A table is created when its first batch arrives and each batch is inserted
+    before the next one is requested, so that the batches do not need to be held
+    in memory at the same time. All batches are inserted in a single transaction.
+
+    Parameters
+    ----------
+    batches : Iterable[Tuple[str, Tuple]]
+        An iterable of table names and tabular data, i.e. tuples of rows, column
+        names and datatypes as in :func:`load_sqlite`. Batches of the same table
+        need to have the same columns. There may be several batches per table.
+    filepath : str, optional, default=":memory:"
+        The path of the SQLite database file to create.
+        Default is an in-memory database (":memory:").
+        Caution: If the file exists it will be overwritten.
+    use_foreign_keys : bool, optional, default=False
+        A flag that determines whether foreign key support is be enabled in SQLite.
+    datetime_columns : str, optional, default="stored"
+        Whether datetime columns are "stored" or "virtual", see :func:`load_sqlite`.
+    fast : bool, optional, default=False
+        Whether the bulk-load mode is used, see :func:`load_sqlite`.
+    build_in_memory : bool, optional, default=False
+        Whether a database file is built in memory first, see :func:`load_sqlite`.
 
     Returns
     -------
@@ -38,6 +193,41 @@ def load_sqlite(
 
     """
     # Argument processing
+    if datetime_columns not in ("stored", "virtual"):
+        message = (
+            f'Unknown way to store datetime columns "{datetime_columns}". '
+            "Valid: stored, virtual"
+        )
+        raise ValueError(message)
+    if fast and filepath != ":memory:":
+        # Build under a temporary name, the existing file stays until it is replaced
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_filepath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        build_filepath = ":memory:" if build_in_memory else temp_filepath
+        try:
+            con = sqlite3.connect(build_filepath)
+            try:
+                _load_sqlite_batches(
+                    con, batches, use_foreign_keys, datetime_columns, fast
+                )
+                if build_in_memory:
+                    with contextlib.closing(sqlite3.connect(temp_filepath)) as dst:
+                        with dst:
+                            con.backup(dst)
+            finally:
+                # The temporary file is removed below if anything failed
+                con.close()
+            os.replace(temp_filepath, filepath)
+        finally:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+        con = sqlite3.connect(filepath)
+        if use_foreign_keys:
+            utils.execute_query(con, "PRAGMA foreign_keys = ON")
+        return con
+
     if filepath != ":memory:":
         if os.path.isfile(filepath):
             os.remove(filepath)
@@ -45,6 +235,28 @@ def load_sqlite(
             directory = os.path.dirname(filepath)
             os.makedirs(directory, exist_ok=True)
     con = sqlite3.connect(filepath)
+    try:
+        _load_sqlite_batches(con, batches, use_foreign_keys, datetime_columns, fast)
+    except BaseException:
+        con.close()
+        raise
+    if fast:
+        # Transactions of the returned in-memory database need to be able to roll back
+        con.execute("PRAGMA journal_mode = MEMORY")
+    return con
+
+
+def _load_sqlite_batches(
+    con: sqlite3.Connection,
+    batches: Iterable[Tuple[str, Tuple]],
+    use_foreign_keys: bool,
+    datetime_columns: str,
+    fast: bool,
+) -> None:
+    """Create the database of :func:`load_sqlite_batches` with the given connection."""
+    if fast:
+        for name, value in FAST_LOAD_PRAGMAS.items():
+            con.execute(f"PRAGMA {name} = {value}")
 
     # https://www.sqlite.org/foreignkeys.html
     if use_foreign_keys:
@@ -82,51 +294,546 @@ def load_sqlite(
             ],
         }
 
-    # https://www.sqlite.org/datatype3.html
-    datatype_map = {
-        "bool": "BOOLEAN",
-        "int": "INTEGER",
-        "float": "REAL",
-        "str": "TEXT",
-    }
+    with con:
+        if fast:
+            # Include the creation of tables and indexes in the transaction
+            con.execute("BEGIN")
+        tables = {}
+        deferred_indexes = []
+        for table_name, (rows, columns, datatypes) in batches:
+            if table_name not in tables:
+                # Create table
+                virtual_columns = {}
+                if datetime_columns == "virtual":
+                    virtual_columns = _find_virtual_datetime_columns(columns)
+                column_definition = _column_definition(
+                    columns, datatypes, virtual_columns
+                )
+                if use_foreign_keys:
+                    if table_name in foreign_key_map:
+                        # Define foreign keys
+                        foreign_key_statements = foreign_key_map[table_name]
+                        column_definition.extend(foreign_key_statements)
+                column_definition = "\n  " + ",\n  ".join(column_definition) + "\n"
+                query = f"CREATE TABLE {table_name} ({column_definition})"
+                con.execute(query)
+
+                # Define primary key
+                primary_key = columns[0]
+                if datatypes[0] != "int":
+                    query = (
+                        f"CREATE UNIQUE INDEX idx_{table_name}_{primary_key} "
+                        f"ON {table_name} ({primary_key})"
+                    )
+                    if fast:
+                        # Sorting all keys at once is faster than updating the index
+                        deferred_indexes.append(query)
+                    else:
+                        con.execute(query)
+                tables[table_name] = virtual_columns
+            virtual_columns = tables[table_name]
+
+            # Insert data
+            values = rows
+            if virtual_columns:
+                indices = [i for i, c in enumerate(columns) if c not in virtual_columns]
+                if len(indices) < len(columns):
+                    values = map(itemgetter(*indices), rows)
+                column_names = ", ".join(columns[i] for i in indices)
+                value_placeholders = ",".join(["?"] * len(indices))
+                query = (
+                    f"INSERT INTO {table_name} ({column_names}) "
+                    f"VALUES ({value_placeholders})"
+                )
+            else:
+                value_placeholders = ",".join(["?"] * len(columns))
+                query = f"INSERT INTO {table_name} VALUES ({value_placeholders})"
+            try:
+                con.executemany(query, values)
+            except sqlite3.IntegrityError:
+                if datatypes[0] == "int":
+                    _check_key_collisions(
+                        con, table_name, columns, rows, virtual_columns
+                    )
+                raise
+
+        for query in deferred_indexes:
+            con.execute(query)
 
+        # Secondary indexes are faster to create once all rows are inserted
+        for table_name in tables:
+            for query in utils.get_index_statements(table_name):
+                con.execute(query)
+        if fast:
+            con.execute("ANALYZE")
+
+
+def load_duckdb(
+    tabular_data: Dict[str, Tuple], filepath: str = ":memory:"
+) -> "duckdb.DuckDBPyConnection":  # noqa: F821
+    """Load preprocessed tabular data into a DuckDB database.
+
+    The tables have the same names, columns and values as with :func:`load_sqlite`,
+    so that the functions deriving counts, scores and rewards give the same results
+    on both backends. DuckDB stores tables column by column and executes queries
+    with several threads, which suits the aggregations of the derive scripts.
+    Instead of indexes, it skips row groups by their minimum and maximum values,
+    therefore no indexes are created.
+
+    This function requires the optional dependency duckdb.
+
+    Parameters
+    ----------
+    tabular_data : Dict[str, Tuple]
+        A dictionary containing the tabular data to be loaded into the database.
+    filepath : str, optional, default=":memory:"
+        The path of the DuckDB database file to create.
+        Default is an in-memory database (":memory:").
+        Caution: If the file exists it will be overwritten.
+
+    Returns
+    -------
+    con : duckdb.DuckDBPyConnection
+        The DuckDB database connection object.
+
+    """
+    return load_duckdb_batches(tabular_data.items(), filepath)
+
+
+def load_duckdb_batches(
+    batches: Iterable[Tuple[str, Tuple]], filepath: str = ":memory:"
+) -> "duckdb.DuckDBPyConnection":  # noqa: F821
+    """Load batches of preprocessed tabular data into a DuckDB database as they arrive.
+
+    Parameters
+    ----------
+    batches : Iterable[Tuple[str, Tuple]]
+        An iterable of table names and tabular data, see :func:`load_sqlite_batches`.
+    filepath : str, optional, default=":memory:"
+        The path of the DuckDB database file to create.
+        Default is an in-memory database (":memory:").
+        Caution: If the file exists it will be overwritten.
+
+    Returns
+    -------
+    con : duckdb.DuckDBPyConnection
+        The DuckDB database connection object.
+
+    """
+    import duckdb
+    import pandas as pd
+
+    # Precondition: An existing file is overwritten
+    if filepath != ":memory:":
+        for path in (filepath, filepath + ".wal"):
+            if os.path.isfile(path):
+                os.remove(path)
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+
+    # Columns are handed over as typed arrays, which DuckDB scans without
+    # converting each value. Nullable dtypes keep 64-bit integer keys exact.
+    dtype_map = {"bool": "boolean", "int": "Int64", "float": "Float64", "str": object}
+    con = duckdb.connect(filepath)
+    con.execute("BEGIN TRANSACTION")
+    try:
+        tables = set()
+        for table_name, (rows, columns, datatypes) in batches:
+            if table_name not in tables:
+                column_definition = ", ".join(
+                    f"{column} {DUCKDB_DATATYPE_MAP[datatype]}"
+                    for column, datatype in zip(columns, datatypes)
+                )
+                con.execute(f"CREATE TABLE {table_name} ({column_definition})")
+                tables.add(table_name)
+            if not rows:
+                continue
+            values = zip(*rows)
+            batch = pd.DataFrame(
+                {
+                    column: pd.Series(column_values, dtype=dtype_map[datatype])
+                    for column, datatype, column_values in zip(
+                        columns, datatypes, values
+                    )
+                }
+            )
+            con.register("batch", batch)
+            con.execute(f"INSERT INTO {table_name} SELECT * FROM batch")
+            con.unregister("batch")
+    except Exception:
+        con.execute("ROLLBACK")
+        con.close()
+        raise
+    con.execute("COMMIT")
+    return con
+
+
+def update_sqlite(
+    con: sqlite3.Connection, tabular_data: Dict[str, Tuple]
+) -> Dict[str, Dict[str, int]]:
+    """Apply the differences between new tabular data and an existing SQLite database.
+
+    Instead of rebuilding the database, the rows of each table are compared by
+    primary key (the first column, e.g. comment_id, reaction_id or view_id) and only
+    inserts, updates and deletes are applied, all within a single transaction.
+
+    Derived tables (``filter{N}_counts``, ``filter{N}_var{M}_scores`` and
+    ``filter{N}_var{M}_dist{K}_rewards``) are not recalculated. If changed rows
+    belong to the data selected by filter N, these tables are marked as stale
+    in the table ``stale_tables``, see :func:`get_stale_tables`. The same holds
+    for the tables of a filter created with ``materialize=True``, which are marked
+    as stale whenever one of the filtered entities changes.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        The SQLite database connection object of a database created by
+        :func:`load_sqlite`.
+    tabular_data : Dict[str, Tuple]
+        A dictionary containing the new tabular data.
+        Tables that do not exist in the database yet are created. Datetime columns
+        that are virtual columns in the database may be left out, e.g. by
+        transforming the data with ``datetime_columns="virtual"``.
+
+    Returns
+    -------
+    changes : Dict[str, Dict[str, int]]
+        The number of "inserted", "updated" and "deleted" rows for each table.
+
+    Raises
+    ------
+    ValueError
+        If the columns of a table differ from the columns in the database.
+    sqlite3.IntegrityError
+        If a primary key constraint is violated.
+
+    """
+    derived_tables = _get_derived_tables(con)
+    changes = {}
+    reasons = {}
     with con:
+        if not con.in_transaction:
+            con.execute("BEGIN")
         for table_name, (rows, columns, datatypes) in tabular_data.items():
-            # Create table
-            column_definition = []
-            for i, col in enumerate(columns):
-                dt = datatype_map[datatypes[i]]
-                column_definition.append(f"{col} {dt}")
-            if use_foreign_keys:
-                if table_name in foreign_key_map:
-                    # Define foreign keys
-                    foreign_key_statements = foreign_key_map[table_name]
-                    column_definition.extend(foreign_key_statements)
-            column_definition = "\n  " + ",\n  ".join(column_definition) + "\n"
-            query = f"CREATE TABLE {table_name} ({column_definition})"
-            con.execute(query)
+            # Create a table that is not present yet
+            table_info = con.execute(f"PRAGMA main.table_xinfo({table_name})")
+            existing_columns = []
+            generated_columns = set()
+            for _, name, _, _, _, _, hidden in table_info:
+                existing_columns.append(name)
+                if hidden in (2, 3):
+                    generated_columns.add(name)
+            if not existing_columns:
+                column_definition = ", ".join(_column_definition(columns, datatypes))
+                con.execute(f"CREATE TABLE {table_name} ({column_definition})")
+                if datatypes[0] != "int":
+                    con.execute(
+                        f"CREATE UNIQUE INDEX idx_{table_name}_{columns[0]} "
+                        f"ON {table_name} ({columns[0]})"
+                    )
+                for query in utils.get_index_statements(table_name):
+                    con.execute(query)
+            elif list(columns) not in (
+                existing_columns,
+                [c for c in existing_columns if c not in generated_columns],
+            ):
+                message = (
+                    f"Columns of table {table_name} differ from the database."
+                    f"\nGiven: {list(columns)}\nDatabase: {existing_columns}"
+                )
+                raise ValueError(message)
 
-            # Define primary key
-            primary_key = columns[0]
-            query = (
-                f"CREATE UNIQUE INDEX idx_{table_name}_{primary_key} "
-                f"ON {table_name} ({primary_key})"
+            # Virtual datetime columns are computed by SQLite
+            if generated_columns.intersection(columns):
+                indices = [
+                    i for i, c in enumerate(columns) if c not in generated_columns
+                ]
+                rows = list(map(itemgetter(*indices), rows))
+                columns = [columns[i] for i in indices]
+                datatypes = [datatypes[i] for i in indices]
+
+            # Compare and apply changes
+            counts, affected_filters = _apply_delta(
+                con, table_name, rows, columns, datatypes, derived_tables
             )
-            con.execute(query)
+            changes[table_name] = counts
+            for filter_id in affected_filters:
+                reasons.setdefault(filter_id, []).append(table_name)
 
-            # Insert data
-            value_placeholders = ",".join(["?"] * len(columns))
-            query = f"INSERT INTO {table_name} VALUES ({value_placeholders})"
-            con.executemany(query, rows)
-    return con
+        # Mark derived tables as stale
+        if reasons:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS stale_tables "
+                "(table_name TEXT PRIMARY KEY, reason TEXT)"
+            )
+            for filter_id, table_names in reasons.items():
+                reason = "Rows changed by update_sqlite in: " + ", ".join(table_names)
+                for table_name in derived_tables[filter_id]:
+                    con.execute(
+                        "INSERT OR REPLACE INTO stale_tables VALUES (?, ?)",
+                        (table_name, reason),
+                    )
+    return changes
+
+
+def create_indexes(con: sqlite3.Connection) -> List[str]:
+    """Create the planned secondary indexes of all tables that do not have them yet.
+
+    :func:`load_sqlite` and the functions that create derived tables already
+    create these indexes, so this is only needed for databases built by an older
+    version of this package. See ``INDEX_PLAN`` in :mod:`ces.swae_analysis.utils`.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        The SQLite database connection object.
+
+    Returns
+    -------
+    index_names : List[str]
+        The names of the created indexes.
+
+    """
+    query = "SELECT name FROM sqlite_master WHERE type = '{}' ORDER BY name"
+    table_names = [name for (name,) in con.execute(query.format("table"))]
+    existing = [name for (name,) in con.execute(query.format("index"))]
+    with con:
+        for table_name in table_names:
+            for statement in utils.get_index_statements(table_name):
+                con.execute(statement)
+    index_names = [name for (name,) in con.execute(query.format("index"))]
+    return [name for name in index_names if name not in existing]
+
+
+def _column_definition(
+    columns: List[str],
+    datatypes: List[str],
+    virtual_columns: Dict[str, str] = None,
+) -> List[str]:
+    virtual_columns = virtual_columns or {}
+    missing_columns = {
+        timestamp_col: col
+        for col, timestamp_col in virtual_columns.items()
+        if col not in columns
+    }
+    column_definition = []
+    for col, dt in zip(columns, datatypes):
+        if col in virtual_columns:
+            column_definition.append(
+                _virtual_column_definition(col, virtual_columns[col])
+            )
+        else:
+            column_definition.append(f"{col} {DATATYPE_MAP[dt]}")
+        if col in missing_columns:
+            column_definition.append(
+                _virtual_column_definition(missing_columns[col], col)
+            )
+
+    # An integer key becomes an alias of the rowid instead of needing its own index
+    if datatypes[0] == "int":
+        column_definition[0] += " PRIMARY KEY"
+    return column_definition
+
+
+def _virtual_column_definition(col: str, timestamp_col: str) -> str:
+    expression = VIRTUAL_DATETIME_EXPRESSION.format(timestamp_col)
+    return f"{col} {DATATYPE_MAP['str']} GENERATED ALWAYS AS ({expression}) VIRTUAL"
+
+
+def _find_virtual_datetime_columns(columns: List[str]) -> Dict[str, str]:
+    """Map the datetime column of each timestamp column to it, e.g. start_datetime.
+
+    The datetime column may be missing in the given columns, see :func:`load_sqlite`.
+
+    """
+    virtual_columns = {}
+    for col in columns:
+        if col.endswith("_timestamp"):
+            virtual_columns[col[: -len("_timestamp")] + "_datetime"] = col
+    return virtual_columns
+
+
+def _check_key_collisions(
+    con: sqlite3.Connection,
+    table_name: str,
+    columns: List[str],
+    rows: List[List],
+    virtual_columns: Dict[str, str],
+) -> None:
+    """Raise an error that tells apart a collision of integer keys from a duplicate.
+
+    Each row of a batch is compared with an earlier row of the batch that has the
+    same key, or else with the row that is already loaded with this key, e.g. by an
+    earlier batch of a streaming load.
+
+    """
+    indices = [i for i, c in enumerate(columns) if c not in virtual_columns]
+    column_names = ", ".join(columns[i] for i in indices)
+    query = f"SELECT {column_names} FROM {table_name} WHERE {columns[0]} = ?"
+    seen = {}
+    for row in rows:
+        values = [row[i] for i in indices]
+        other = seen.setdefault(values[0], values)
+        if other is values:
+            # Rows of this batch before the failed one are already loaded as well
+            loaded = con.execute(query, (values[0],)).fetchone()
+            if loaded is not None:
+                other = list(loaded)
+        if other != values:
+            message = (
+                f"Collision of integer keys in table {table_name}: {values[0]} "
+                "identifies two different rows. Use hexadecimal IDs instead."
+            )
+            raise sqlite3.IntegrityError(message)
+
+
+def _get_derived_tables(con: sqlite3.Connection) -> Dict[int, List[str]]:
+    """Find materialized filter, counts, scores and rewards tables by filter ID."""
+    pattern = re.compile(
+        r"^filter(\d+)_(missions|proposals|ratings|comments|reactions|counts"
+        r"|var\d+_scores|var\d+_dist\d+_rewards)$"
+    )
+    derived_tables = {}
+    for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+        match = pattern.match(name)
+        if match:
+            derived_tables.setdefault(int(match.group(1)), []).append(name)
+    return derived_tables
+
+
+def _apply_delta(
+    con: sqlite3.Connection,
+    table_name: str,
+    rows: List[List],
+    columns: List[str],
+    datatypes: List[str],
+    derived_tables: Dict[int, List[str]],
+) -> Tuple[Dict[str, int], List[int]]:
+    """Apply inserts, updates and deletes to one table and find affected filters."""
+    pk = columns[0]
+    delta = f"delta_{table_name}"
+    changed = f"changed_{table_name}"
+
+    # Stage the new rows in a temporary table
+    column_definition = ", ".join(_column_definition(columns, datatypes))
+    con.execute(f"CREATE TEMP TABLE {delta} ({column_definition})")
+    if datatypes[0] != "int":
+        con.execute(f"CREATE UNIQUE INDEX temp.idx_{delta}_{pk} ON {delta} ({pk})")
+    value_placeholders = ",".join(["?"] * len(columns))
+    con.executemany(f"INSERT INTO temp.{delta} VALUES ({value_placeholders})", rows)
+
+    # Primary keys of all rows that are inserted, updated or deleted
+    differs = " OR ".join(f"d.{col} IS NOT m.{col}" for col in columns[1:]) or "0"
+    con.execute(f"CREATE TEMP TABLE {changed} (pk, kind TEXT)")
+    con.execute(
+        f"INSERT INTO temp.{changed} SELECT {pk}, 'inserted' FROM temp.{delta} "
+        f"WHERE {pk} NOT IN (SELECT {pk} FROM main.{table_name})"
+    )
+    con.execute(
+        f"INSERT INTO temp.{changed} SELECT {pk}, 'deleted' FROM main.{table_name} "
+        f"WHERE {pk} NOT IN (SELECT {pk} FROM temp.{delta})"
+    )
+    con.execute(
+        f"INSERT INTO temp.{changed} SELECT d.{pk}, 'updated' "
+        f"FROM temp.{delta} AS d JOIN main.{table_name} AS m USING ({pk}) "
+        f"WHERE {differs}"
+    )
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    counts.update(con.execute(f"SELECT kind, COUNT(*) FROM {changed} GROUP BY kind"))
+
+    # Filters that select changed rows before the changes are applied
+    affected_filters = set()
+    if sum(counts.values()) > 0:
+        affected_filters.update(
+            _find_affected_filters(con, table_name, pk, changed, derived_tables)
+        )
+
+    # Apply the changes
+    assignments = ", ".join(f"{col} = d.{col}" for col in columns[1:])
+    con.execute(
+        f"DELETE FROM main.{table_name} WHERE {pk} IN "
+        f"(SELECT pk FROM temp.{changed} WHERE kind = 'deleted')"
+    )
+    if assignments:
+        con.execute(
+            f"UPDATE main.{table_name} SET {assignments} FROM temp.{delta} AS d "
+            f"WHERE d.{pk} = main.{table_name}.{pk} AND d.{pk} IN "
+            f"(SELECT pk FROM temp.{changed} WHERE kind = 'updated')"
+        )
+    column_names = ", ".join(columns)
+    con.execute(
+        f"INSERT INTO main.{table_name} ({column_names}) "
+        f"SELECT {column_names} FROM temp.{delta} WHERE {pk} IN "
+        f"(SELECT pk FROM temp.{changed} WHERE kind = 'inserted')"
+    )
+
+    # Filters that select changed rows after the changes are applied
+    if sum(counts.values()) > 0:
+        affected_filters.update(
+            _find_affected_filters(con, table_name, pk, changed, derived_tables)
+        )
+
+    con.execute(f"DROP TABLE temp.{delta}")
+    con.execute(f"DROP TABLE temp.{changed}")
+    return counts, sorted(affected_filters)
+
+
+def _find_affected_filters(
+    con: sqlite3.Connection,
+    table_name: str,
+    pk: str,
+    changed: str,
+    derived_tables: Dict[int, List[str]],
+) -> List[int]:
+    """Find the filters whose selected data contains one of the changed rows."""
+    # Note: Created ratings are counted over the whole ratings table, not the filter view
+    if table_name == "ratings":
+        return list(derived_tables)
+
+    affected_filters = []
+    for filter_id in derived_tables:
+        if table_name in FILTERED_TABLES:
+            source = f"filter{filter_id}_{table_name}"
+        elif table_name == "users":
+            source = f"filter{filter_id}_counts"
+        else:
+            continue
+        source_type = con.execute(
+            "SELECT type FROM sqlite_master WHERE name = ?", (source,)
+        ).fetchone()
+        if not source_type or (
+            table_name in FILTERED_TABLES and source_type[0] == "table"
+        ):
+            # Without the filter view the selection is unknown, and a materialized
+            # filter table does not contain inserted rows, so assume the worst
+            affected_filters.append(filter_id)
+            continue
+        query = (
+            f"SELECT 1 FROM {source} WHERE {pk} IN (SELECT pk FROM temp.{changed}) "
+            "LIMIT 1"
+        )
+        if con.execute(query).fetchone():
+            affected_filters.append(filter_id)
+    return affected_filters
 
 
 def sqlite_to_csv(
-    con: sqlite3.Connection, dirpath: str, delimiter: str = ",", quoting: bool = True
+    con: sqlite3.Connection,
+    dirpath: str,
+    delimiter: str = ",",
+    quoting: bool = True,
+    compression: Optional[str] = None,
+    include: Union[str, List[str], None] = None,
+    exclude: Union[str, List[str], None] = None,
+    workers: int = 1,
+    batch_size: int = CSV_BATCH_SIZE,
+    include_bookkeeping: bool = False,
 ) -> None:
     """Export all tables from an SQLite database to CSV files.
 
     Each table in the database will be saved as a separate CSV file in the specified directory.
+    Rows are fetched and written in batches, so that memory usage does not grow
+    with the size of a table.
 
     Parameters
     ----------
@@ -138,6 +845,24 @@ def sqlite_to_csv(
         The delimiter to use for CSV files.
     quoting : bool, optional, default=True
         Whether to enable quoting for CSV files.
+    compression : str, optional, default=None
+        The compression of the files, either None for plain ".csv" files, "gzip" for
+        ".csv.gz" files or "zstd" for ".csv.zst" files. The latter requires the
+        optional dependency zstandard.
+    include : str or List[str], optional, default=None
+        Glob patterns of table names to export, e.g. "filter3_*". If None, all tables
+        are exported.
+    exclude : str or List[str], optional, default=None
+        Glob patterns of table names that are not exported, even if included.
+    workers : int, optional, default=1
+        The number of threads that export tables in parallel, each with its own
+        read-only connection. An in-memory database is always exported by one
+        thread, since its connection can not be shared.
+    batch_size : int, optional, default=10_000
+        The number of rows that are fetched and written at once.
+    include_bookkeeping : bool, optional, default=False
+        Whether the bookkeeping tables ``BOOKKEEPING_TABLES`` are exported too,
+        e.g. the mission IDs selected by a filter in ``filter{N}_selection``.
 
     Raises
     ------
@@ -147,7 +872,14 @@ def sqlite_to_csv(
         If the specified directory path does not exist and can not be created.
 
     """
-    cursor = con.cursor()
+    # Argument processing
+    if compression not in CSV_COMPRESSIONS:
+        valid = ", ".join(str(key) for key in CSV_COMPRESSIONS)
+        raise ValueError(f'Unknown compression "{compression}". Valid: {valid}')
+    if compression == "zstd":
+        import zstandard  # noqa: F401, fail early if the optional dependency is missing
+    if batch_size < 1:
+        raise ValueError(f"Batch size needs to be positive, not {batch_size}")
 
     # Precondition: Target directory exists or is created
     os.makedirs(dirpath, exist_ok=True)
@@ -157,34 +889,112 @@ def sqlite_to_csv(
     if quoting:
         kwargs["quoting"] = csv.QUOTE_ALL
 
-    # Get table names
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [record[0] for record in cursor.fetchall()]
+    # Export tables
+    tables = _get_table_names(con, include, exclude, include_bookkeeping)
 
-    for table in tables:
-        # Get column names
-        cursor.execute(f"PRAGMA table_info({table})")
-        columns = [row[1] for row in cursor.fetchall()]
+    def export(con, table):
+        filepath = os.path.join(dirpath, table + CSV_COMPRESSIONS[compression])
+        _table_to_csv(con, table, filepath, compression, batch_size, kwargs)
 
-        # Get data
-        if "creation_timestamp" in columns:
-            cursor.execute(f"SELECT * FROM {table} ORDER BY creation_timestamp;")
-        else:
-            cursor.execute(f"SELECT * FROM {table};")
-        data = cursor.fetchall()
-        data.insert(0, columns)
+    _export_tables(con, tables, export, workers)
+
+
+def _table_to_csv(
+    con: sqlite3.Connection,
+    table: str,
+    filepath: str,
+    compression: Optional[str],
+    batch_size: int,
+    kwargs: Dict[str, Any],
+) -> None:
+    """Write a table to a CSV file in batches of rows."""
+    cursor = con.cursor()
+
+    # Get column names, including generated columns like virtual datetimes
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    # Get data
+    if "creation_timestamp" in columns:
+        cursor.execute(f"SELECT * FROM {table} ORDER BY creation_timestamp;")
+    else:
+        cursor.execute(f"SELECT * FROM {table};")
+
+    # Write data to CSV file
+    if compression == "gzip":
+        f = gzip.open(filepath, "wt", newline="")
+    elif compression == "zstd":
+        import zstandard
+
+        f = zstandard.open(filepath, "wt", newline="")
+    else:
+        f = open(filepath, "w")
+    with f:
+        writer = csv.writer(f, **kwargs)
+        writer.writerow(columns)
+        while rows := cursor.fetchmany(batch_size):
+            writer.writerows(rows)
+
+
+def _get_table_names(
+    con: sqlite3.Connection,
+    include: Union[str, List[str], None] = None,
+    exclude: Union[str, List[str], None] = None,
+    include_bookkeeping: bool = False,
+) -> List[str]:
+    """Get the names of all tables that match the include and exclude patterns."""
+    if isinstance(include, str):
+        include = [include]
+    if isinstance(exclude, str):
+        exclude = [exclude]
+    if not include_bookkeeping:
+        exclude = (exclude or []) + BOOKKEEPING_TABLES
+
+    query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
+    tables = [record[0] for record in con.execute(query)]
+    if include is not None:
+        tables = [t for t in tables if any(fnmatch.fnmatchcase(t, p) for p in include)]
+    if exclude is not None:
+        tables = [
+            t for t in tables if not any(fnmatch.fnmatchcase(t, p) for p in exclude)
+        ]
+    return tables
+
+
+def _export_tables(
+    con: sqlite3.Connection,
+    tables: List[str],
+    export_table: Callable[[sqlite3.Connection, str], Any],
+    workers: int,
+) -> List[Any]:
+    """Export tables, in parallel only if other connections can open the database."""
+    db_filepath = con.execute("PRAGMA database_list").fetchone()[2]
+    if workers > 1 and db_filepath:
 
-        # Write data to CSV file
-        csv_filepath = os.path.join(dirpath, f"{table}.csv")
-        with open(csv_filepath, "w") as f:
-            writer = csv.writer(f, **kwargs)
-            writer.writerows(data)
+        def export(table):
+            with contextlib.closing(utils.connect_read_only(db_filepath)) as thread_con:
+                return export_table(thread_con, table)
 
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(export, tables))
+    return [export_table(con, table) for table in tables]
 
-def sqlite_to_excel(con: sqlite3.Connection, filepath: str) -> None:
+
+def sqlite_to_excel(
+    con: sqlite3.Connection,
+    filepath: str,
+    include: Union[str, List[str], None] = None,
+    exclude: Union[str, List[str], None] = None,
+    streaming: bool = False,
+    max_rows: int = EXCEL_MAX_ROWS,
+    batch_size: int = EXCEL_BATCH_SIZE,
+    include_bookkeeping: bool = False,
+) -> None:
     """Export all tables from an SQLite database to an Excel file.
 
     Each table in the database will be saved as a separate sheet in the Excel file.
+    A table with more rows than fit into one sheet is split across several sheets,
+    e.g. "reactions_1", "reactions_2", and so on.
 
     Parameters
     ----------
@@ -192,9 +1002,28 @@ def sqlite_to_excel(con: sqlite3.Connection, filepath: str) -> None:
         The SQLite database connection object.
     filepath : str
         The path of the Excel file to be created.
+    include : str or List[str], optional, default=None
+        Glob patterns of table names to export, e.g. "filter3_*". If None, all tables
+        are exported.
+    exclude : str or List[str], optional, default=None
+        Glob patterns of table names that are not exported, even if included.
+    streaming : bool, optional, default=False
+        If False, the workbook is built in memory with pyexcelerate. If True, rows
+        are fetched and written to the file in batches, so that memory usage does
+        not grow with the size of the tables.
+    max_rows : int, optional, default=1_048_576
+        The maximum number of rows per sheet including the header, by default the
+        limit of Excel.
+    batch_size : int, optional, default=10_000
+        The number of rows that are fetched and written at once.
+    include_bookkeeping : bool, optional, default=False
+        Whether the bookkeeping tables ``BOOKKEEPING_TABLES`` are exported too,
+        e.g. the mission IDs selected by a filter in ``filter{N}_selection``.
 
     Raises
     ------
+    ValueError
+        If no table matches the include and exclude patterns.
     sqlite3.Error
         If there is an error executing an SQL query.
 
@@ -202,9 +1031,30 @@ def sqlite_to_excel(con: sqlite3.Connection, filepath: str) -> None:
         If there is an error saving the Excel file.
 
     """
+    # Argument processing
+    if max_rows < 2:
+        raise ValueError(
+            f"Maximum number of rows needs to be at least 2, not {max_rows}"
+        )
+    if batch_size < 1:
+        raise ValueError(f"Batch size needs to be positive, not {batch_size}")
+    tables = _get_table_names(con, include, exclude, include_bookkeeping)
+    if not tables:
+        raise ValueError("No table matches the include and exclude patterns.")
+    sheets = _iter_excel_sheets(con, tables, max_rows, batch_size)
+
+    # Write data to a file sheet by sheet and batch by batch
+    if streaming:
+        with _StreamingWorkbook(filepath) as workbook:
+            for name, columns, batches in sheets:
+                workbook.new_sheet(name, columns)
+                for rows in batches:
+                    workbook.write_rows(rows)
+        return
+
+    # Write data to a spreadsheet in memory
     import pyexcelerate
 
-    cursor = con.cursor()
     workbook = pyexcelerate.Workbook()
 
     # Define header format
@@ -213,15 +1063,44 @@ def sqlite_to_excel(con: sqlite3.Connection, filepath: str) -> None:
         alignment=pyexcelerate.Alignment(horizontal="center", vertical="top"),
     )
 
-    # Get table names
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [record[0] for record in cursor.fetchall()]
+    for name, columns, batches in sheets:
+        data = [columns]
+        for rows in batches:
+            data.extend(rows)
+        sheet = workbook.new_sheet(name, data=data)
 
+        # Apply header format
+        for i in range(1, len(columns) + 1):
+            sheet.set_cell_style(1, i, header_format)
+    workbook.save(filepath)
+
+
+def _iter_excel_sheets(
+    con: sqlite3.Connection, tables: List[str], max_rows: int, batch_size: int
+) -> Iterable[Tuple[str, List[str], Iterable[List[Tuple]]]]:
+    """Yield name, columns and batches of rows of each sheet.
+
+    The batches of a sheet need to be consumed before the next sheet is requested,
+    since they are fetched from the same cursor.
+
+    """
+
+    def fetch_batches(num_rows):
+        while num_rows > 0 and (rows := cursor.fetchmany(min(batch_size, num_rows))):
+            num_rows -= len(rows)
+            yield rows
+
+    cursor = con.cursor()
+    rows_per_sheet = max_rows - 1
     for table in tables:
-        # Get column names
-        cursor.execute(f"PRAGMA table_info({table})")
+        # Get column names, including generated columns like virtual datetimes
+        cursor.execute(f"PRAGMA table_xinfo({table})")
         columns = [row[1] for row in cursor.fetchall()]
 
+        # Get number of sheets
+        num_rows = cursor.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+        num_sheets = max(1, -(-num_rows // rows_per_sheet))
+
         # Get data
         if "engagement_score" in columns and "user_id" in columns:
             cursor.execute(
@@ -231,14 +1110,354 @@ def sqlite_to_excel(con: sqlite3.Connection, filepath: str) -> None:
             cursor.execute(f"SELECT * FROM {table} ORDER BY creation_timestamp;")
         else:
             cursor.execute(f"SELECT * FROM {table};")
-        data = cursor.fetchall()
-        data.insert(0, columns)
+        for i in range(1, num_sheets + 1):
+            name = table if num_sheets == 1 else f"{table}_{i}"
+            yield name, columns, fetch_batches(rows_per_sheet)
 
-        # Write data to spreadsheet
-        sheet = workbook.new_sheet(table, data=data)
 
-        # Apply header format
-        for i, header in enumerate(columns, 1):
-            sheet.set_cell_value(1, i, header)
-            sheet.set_cell_style(1, i, header_format)
-    workbook.save(filepath)
+class _StreamingWorkbook:
+    """Writer of xlsx files that writes the rows of one sheet after another.
+
+    Each sheet is a compressed member of the zip file that is written row batch by
+    row batch, using inline strings instead of a table of shared strings. The
+    workbook with the names of all sheets is written when the file is closed.
+
+    """
+
+    _NAMESPACE = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    _RELATIONSHIPS = (
+        "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    )
+    _CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+    _ILLEGAL_CHARACTERS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+    def __init__(self, filepath: str):
+        self._zip = zipfile.ZipFile(filepath, "w", zipfile.ZIP_DEFLATED)
+        self._filepath = filepath
+        self._sheet_names = []
+        self._sheet = None
+        self._cell_names = []
+        self._num_rows = 0
+
+    def __enter__(self) -> "_StreamingWorkbook":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+            os.remove(self._filepath)
+
+    def new_sheet(self, name: str, columns: List[str]) -> None:
+        """Start a new sheet with a header row."""
+        self._close_sheet()
+        self._sheet_names.append(name)
+        member = f"xl/worksheets/sheet{len(self._sheet_names)}.xml"
+        self._sheet = self._zip.open(member, "w", force_zip64=True)
+        self._sheet.write(
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<worksheet xmlns="{self._NAMESPACE}"><sheetData>'.encode()
+        )
+        self._cell_names = [_excel_column_name(i) for i in range(1, len(columns) + 1)]
+        self._num_rows = 0
+        self.write_rows([columns], style=1)
+
+    def write_rows(self, rows: Iterable[Tuple], style: int = 0) -> None:
+        """Write rows to the current sheet, leaving out cells with NULL."""
+        attributes = f' s="{style}"' if style else ""
+        parts = []
+        for row in rows:
+            self._num_rows += 1
+            parts.append(f'<row r="{self._num_rows}">')
+            for cell_name, value in zip(self._cell_names, row):
+                if value is None:
+                    continue
+                cell = f'<c r="{cell_name}{self._num_rows}"{attributes}'
+                if isinstance(value, (int, float)) and math.isfinite(value):
+                    parts.append(f"{cell}><v>{value}</v></c>")
+                else:
+                    text = escape(self._ILLEGAL_CHARACTERS.sub("", str(value)))
+                    parts.append(
+                        f'{cell} t="inlineStr"><is><t xml:space="preserve">'
+                        f"{text}</t></is></c>"
+                    )
+            parts.append("</row>")
+        self._sheet.write("".join(parts).encode())
+
+    def close(self) -> None:
+        """Finish the last sheet and write the workbook, styles and relationships."""
+        self._close_sheet()
+        sheets = "".join(
+            f'<sheet name={quoteattr(name)} sheetId="{i}" ' f'r:id="rId{i}"/>'
+            for i, name in enumerate(self._sheet_names, 1)
+        )
+        relationships = "".join(
+            f'<Relationship Id="rId{i}" Type="{self._RELATIONSHIPS}/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, len(self._sheet_names) + 1)
+        )
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            f'ContentType="{self._CONTENT_TYPE}.worksheet+xml"/>'
+            for i in range(1, len(self._sheet_names) + 1)
+        )
+        styles_id = f"rId{len(self._sheet_names) + 1}"
+        members = {
+            "xl/workbook.xml": (
+                f'<workbook xmlns="{self._NAMESPACE}" xmlns:r="{self._RELATIONSHIPS}">'
+                f"<sheets>{sheets}</sheets></workbook>"
+            ),
+            "xl/_rels/workbook.xml.rels": (
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+                f'2006/relationships">{relationships}<Relationship Id="{styles_id}" '
+                f'Type="{self._RELATIONSHIPS}/styles" Target="styles.xml"/>'
+                "</Relationships>"
+            ),
+            "xl/styles.xml": (
+                f'<styleSheet xmlns="{self._NAMESPACE}">'
+                '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+                '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+                '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+                '<fill><patternFill patternType="gray125"/></fill></fills>'
+                '<borders count="1"><border/></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" '
+                'borderId="0"/></cellStyleXfs><cellXfs count="2">'
+                '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+                '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" '
+                'applyFont="1" applyAlignment="1"><alignment horizontal="center" '
+                'vertical="top"/></xf></cellXfs><cellStyles><cellStyle name="Normal" '
+                'xfId="0" builtinId="0"/></cellStyles></styleSheet>'
+            ),
+            "_rels/.rels": (
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+                f'2006/relationships"><Relationship Id="rId1" Type="'
+                f'{self._RELATIONSHIPS}/officeDocument" Target="xl/workbook.xml"/>'
+                "</Relationships>"
+            ),
+            "[Content_Types].xml": (
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+                'content-types"><Default Extension="rels" ContentType="application/'
+                'vnd.openxmlformats-package.relationships+xml"/><Default '
+                'Extension="xml" ContentType="application/xml"/><Override '
+                'PartName="/xl/workbook.xml" '
+                f'ContentType="{self._CONTENT_TYPE}.sheet.main+xml"/>{overrides}'
+                '<Override PartName="/xl/styles.xml" '
+                f'ContentType="{self._CONTENT_TYPE}.styles+xml"/></Types>'
+            ),
+        }
+        for member, text in members.items():
+            self._zip.writestr(
+                member,
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + text,
+            )
+        self._zip.close()
+
+    def _close_sheet(self) -> None:
+        if self._sheet is not None:
+            self._sheet.write(b"</sheetData></worksheet>")
+            self._sheet.close()
+            self._sheet = None
+
+
+def _excel_column_name(index: int) -> str:
+    """Get the name of a column in Excel from its 1-based index, e.g. 28 -> "AB"."""
+    name = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def sqlite_to_parquet(
+    con: sqlite3.Connection,
+    dirpath: str,
+    compression: str = "zstd",
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+    include: Union[str, List[str], None] = None,
+    exclude: Union[str, List[str], None] = None,
+    workers: int = 1,
+    include_bookkeeping: bool = False,
+) -> Dict[str, Any]:
+    """Export all tables from an SQLite database to Parquet files.
+
+    Each table in the database, including derived tables with counts, scores and
+    rewards, will be saved as a separate Parquet file in the specified directory.
+    Rows are read from the database and written in row groups, so that a table
+    does not need to fit into memory. A file "manifest.json" describes the
+    number of rows and the schema of each file.
+
+    The type of each column is determined by the values stored in it: integers
+    become int64 (bool for BOOLEAN columns), reals or a mix of integers and reals
+    become float64, texts become string. Columns with texts and numbers become
+    string, columns that contain only NULL get the type of their declaration.
+
+    This function requires the optional dependency pyarrow.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        The SQLite database connection object.
+    dirpath : str
+        The directory path where the Parquet files will be stored.
+    compression : str, optional, default="zstd"
+        The compression codec, one of "zstd", "snappy", "gzip", "brotli", "lz4"
+        or "none".
+    row_group_size : int, optional, default=100_000
+        The number of rows that are fetched and written at once.
+    include : str or List[str], optional, default=None
+        Glob patterns of table names to export, e.g. "filter3_*". If None, all tables
+        are exported.
+    exclude : str or List[str], optional, default=None
+        Glob patterns of table names that are not exported, even if included.
+    workers : int, optional, default=1
+        The number of threads that export tables in parallel, each with its own
+        read-only connection. An in-memory database is always exported by one
+        thread, since its connection can not be shared.
+    include_bookkeeping : bool, optional, default=False
+        Whether the bookkeeping tables ``BOOKKEEPING_TABLES`` are exported too,
+        e.g. the mission IDs selected by a filter in ``filter{N}_selection``.
+
+    Returns
+    -------
+    manifest : Dict[str, Any]
+        The content of the manifest file.
+
+    Raises
+    ------
+    sqlite3.Error
+        If there is an error executing an SQL query.
+    FileNotFoundError
+        If the specified directory path does not exist and can not be created.
+
+    """
+    import pyarrow  # noqa: F401, fail early if the optional dependency is missing
+
+    # Argument processing
+    if compression not in PARQUET_COMPRESSIONS:
+        message = (
+            f'Unknown compression "{compression}". '
+            f"Valid: {', '.join(PARQUET_COMPRESSIONS)}"
+        )
+        raise ValueError(message)
+    if row_group_size < 1:
+        raise ValueError(f"Row group size needs to be positive, not {row_group_size}")
+
+    # Precondition: Target directory exists or is created
+    os.makedirs(dirpath, exist_ok=True)
+
+    # Export tables
+    tables = _get_table_names(con, include, exclude, include_bookkeeping)
+
+    def export(con, table):
+        return _table_to_parquet(con, table, dirpath, compression, row_group_size)
+
+    entries = _export_tables(con, tables, export, workers)
+
+    # Write manifest
+    manifest = dict(
+        compression=compression, tables={table: e for table, e in zip(tables, entries)}
+    )
+    with open(os.path.join(dirpath, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _table_to_parquet(
+    con: sqlite3.Connection,
+    table: str,
+    dirpath: str,
+    compression: str,
+    row_group_size: int,
+) -> Dict[str, Any]:
+    """Write one table to a Parquet file and return its manifest entry."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    storage_classes = ("integer", "real", "text", "blob")
+
+    # Get column names and declared types, including generated columns
+    table_info = con.execute(f"PRAGMA table_xinfo({table})").fetchall()
+    columns = [row[1] for row in table_info]
+    declared_types = [row[2].upper() for row in table_info]
+
+    # Storage classes present in each column, found with a single scan
+    aggregates = ", ".join(
+        f"MAX(typeof({col}) = '{storage_class}')"
+        for col in columns
+        for storage_class in storage_classes
+    )
+    flags = con.execute(f"SELECT {aggregates} FROM {table}").fetchone()
+
+    # Choose the type of each column by the widest storage class in it and cast
+    # narrower values to that class, e.g. integers in a column with reals
+    widening = [
+        ("blob", "BLOB", pa.binary()),
+        ("text", "TEXT", pa.string()),
+        ("real", "REAL", pa.float64()),
+        ("integer", "INTEGER", pa.int64()),
+    ]
+    fields = []
+    expressions = []
+    for i, (col, declared_type) in enumerate(zip(columns, declared_types)):
+        present = {
+            storage_class
+            for storage_class, flag in zip(storage_classes, flags[4 * i : 4 * i + 4])
+            if flag
+        }
+        dtype = _parquet_type_from_declaration(declared_type)
+        expression = col
+        for storage_class, sql_type, pa_type in widening:
+            if storage_class in present:
+                dtype = pa_type
+                if len(present) > 1:
+                    expression = f"CAST({col} AS {sql_type})"
+                break
+        if dtype == pa.int64() and declared_type == "BOOLEAN":
+            dtype = pa.bool_()
+        fields.append(pa.field(col, dtype))
+        expressions.append(expression)
+    schema = pa.schema(fields)
+
+    # Stream rows in row groups
+    filename = f"{table}.parquet"
+    cursor = con.execute(f"SELECT {', '.join(expressions)} FROM {table}")
+    num_rows = 0
+    with pq.ParquetWriter(
+        os.path.join(dirpath, filename), schema, compression=compression
+    ) as writer:
+        while True:
+            rows = cursor.fetchmany(row_group_size)
+            if not rows:
+                break
+            arrays = []
+            for values, field in zip(zip(*rows), schema):
+                if field.type == pa.bool_():
+                    # SQLite stores booleans as integers 0 and 1
+                    arrays.append(pa.array(values, pa.int64()).cast(pa.bool_()))
+                else:
+                    arrays.append(pa.array(values, field.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            num_rows += len(rows)
+    cursor.close()
+    return dict(
+        filename=filename,
+        num_rows=num_rows,
+        columns=[dict(name=field.name, type=str(field.type)) for field in schema],
+    )
+
+
+def _parquet_type_from_declaration(declared_type: str) -> Any:
+    """Choose the Parquet type of an empty column by SQLite's rules of type affinity."""
+    import pyarrow as pa
+
+    # https://www.sqlite.org/datatype3.html#determination_of_column_affinity
+    if declared_type == "BOOLEAN":
+        return pa.bool_()
+    if "INT" in declared_type:
+        return pa.int64()
+    if any(word in declared_type for word in ("CHAR", "CLOB", "TEXT")):
+        return pa.string()
+    if any(word in declared_type for word in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.null()
@@ -149,3 +149,33 @@ def get_rewards(
     )
     result = utils.execute_query(con, query)
     return result
+
+
+def get_stale_tables(con: sqlite3.Connection) -> List[Tuple]:
+    """Retrieve derived tables that are outdated because base tables have changed.
+
+    Tables are marked as stale by :func:`ces.swae_analysis.update_sqlite`. Their
+    content can be recalculated by creating them again with a new filter ID.
+
+    Parameters
+    ----------
+    con : Connection
+        The connection object to the SQLite database.
+
+    Returns
+    -------
+    stale_table_info : List[Tuple]
+        A list of tuples containing information about stale tables.
+
+        Each tuple has following items:
+
+        - table_name: str
+        - reason: str
+
+    """
+    query = "SELECT name FROM sqlite_master WHERE type='table' AND name='stale_tables';"
+    if not utils.execute_query(con, query):
+        return []
+    query = "SELECT table_name, reason FROM stale_tables ORDER BY table_name;"
+    result = utils.execute_query(con, query)
+    return result
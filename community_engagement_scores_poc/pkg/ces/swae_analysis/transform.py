@@ -1,13 +1,90 @@
-"""Module for transforming JSON data from Swae to structured tabular data."""
+"""Module for transforming JSON data from Swae to structured tabular data.
 
+Each table is declared once as a schema, i.e. a list of columns with a name, a
+datatype, a converter and the keys of the source fields in a JSON record. The
+engine converts records column by column: a converter first tries to unwrap and
+convert all values of a column in one pass and only falls back to converting
+values one by one with default values if this fails for any of them.
+Identifiers like user_id are interned, so that all rows share one string per ID.
+Integer, float and timestamp columns are converted into arrays, from which datetimes
+are formatted without a copy. Rows are built from the columns as lists of Python
+values, since they are inserted with executemany.
+
+Tables can be transformed in parallel by a pool of worker processes, with the
+records of large entities split into chunks. Each chunk is checked on its own
+and each table again after its chunks are merged.
+
+"""
+
+import array
 import datetime
 import hashlib
 import html
-from typing import Any, Dict, List, Tuple, Union
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress, repeat
+from operator import methodcaller
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+
+# Formats of the identifiers of reactions and views, which are derived from their fields
+ID_FORMATS = ("hex", "int64")
+
+# Ways to store datetime columns, see ces.swae_analysis.load_sqlite
+DATETIME_COLUMNS = ("stored", "virtual")
+
+# Start of the timestamps, which are formatted as datetimes in UTC
+UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+# Timestamps in milliseconds from 1900-01-01 to 9000-01-01 are formatted in bulk,
+# others one by one
+BULK_TIMESTAMP_RANGE = (-2_208_988_800_000, 221_845_392_000_000)
+
+# Large entities are split into chunks of this many records when workers are used
+CHUNK_SIZE = 50_000
+
+# Entities whose records form each table
+TABLE_SOURCES = {
+    "users": ["users"],
+    "missions": ["missions"],
+    "proposals": ["proposals"],
+    "ratings": ["ratings"],
+    "comments": ["comments"],
+    # Combine reactions (emojis), upvotes (thumbs up) and downvotes (thumbs down)
+    # into one reaction entity
+    "reactions": ["reactions", "upvotes", "downvotes"],
+    "views": ["views"],
+}
+
+
+class Column(NamedTuple):
+    """Declaration of a column of a table that is created from JSON records."""
+
+    name: str
+    dtype: str
+    converter: Callable[[List[Dict], Tuple[str, ...]], Sequence]
+    sources: Tuple[str, ...]
 
 
 def transform_swae_data(
-    swae_data: Dict[str, Any], filters_on: bool = True
+    swae_data: Dict[str, Any],
+    filters_on: bool = True,
+    workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+    id_format: str = "hex",
+    datetime_columns: str = "stored",
 ) -> Dict[str, Tuple]:
     """Transform semi-structured JSON data from Swae into structured tabular data.
 
@@ -19,6 +96,28 @@ def transform_swae_data(
         A flag that determines whether filters are enabled for the transformation.
         If True, individual rows can be skipped if they carry an attribute that indicates that
         they are inactive, e.g. a proposal being in draft status or a comment being deleted.
+    workers : int, optional, default=1
+        The number of worker processes. If greater than 1, the records of each entity
+        are split into chunks that are transformed by a pool of processes.
+        Records need to be sent to the workers and rows back, which only pays off
+        for large exports on machines with several idle cores.
+    chunk_size : int, optional, default=50_000
+        The maximum number of records in a chunk if workers are used.
+    id_format : str, optional, default="hex"
+        The format of the identifiers of reactions and views, which have none in the
+        raw data and are derived from a SHA-256 hash of their fields.
+
+        - "hex": A string of 64 hexadecimal characters, as in earlier versions.
+        - "int64": A signed 64-bit integer made of the first 8 bytes of the hash.
+          It is stored as INTEGER PRIMARY KEY by :func:`ces.swae_analysis.load_sqlite`,
+          which makes tables and indexes considerably smaller.
+    datetime_columns : str, optional, default="stored"
+        How the datetime columns like creation_datetime are going to be stored by
+        :func:`ces.swae_analysis.load_sqlite`.
+
+        - "stored": The datetimes are formatted as strings in UTC.
+        - "virtual": The datetime columns are left out, since SQLite computes
+          them from the timestamp columns like creation_timestamp.
 
     Returns
     -------
@@ -31,698 +130,431 @@ def transform_swae_data(
         If there are errors in the data transformation process.
 
     """
-    # Combine reactions (emojis), upvotes (thumbs up) and downvotes (thumbs down)
-    # into one reaction entity
-    r1, c1, d1 = _transform_reactions(swae_data["reactions"], filters_on)
-    r2, c2, d2 = _transform_upvotes(swae_data["upvotes"], filters_on)
-    r3, c3, d3 = _transform_downvotes(swae_data["downvotes"], filters_on)
-    reactions_rows = r1 + r2 + r3
-    reactions_cols = c1
-    reactions_dtypes = d1
-    transformed_reactions = (reactions_rows, reactions_cols, reactions_dtypes)
-
-    # Transform all entities
-    tabular_data = {
-        "users": _transform_users(swae_data["users"], filters_on),
-        "missions": _transform_missions(swae_data["missions"], filters_on),
-        "proposals": _transform_proposals(swae_data["proposals"], filters_on),
-        "ratings": _transform_ratings(swae_data["ratings"], filters_on),
-        "comments": _transform_comments(swae_data["comments"], filters_on),
-        "reactions": transformed_reactions,
-        "views": _transform_views(swae_data["views"], filters_on),
-    }
+    # Preconditions
+    if workers < 1:
+        raise ValueError(f"Number of workers needs to be positive, got {workers}")
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size needs to be positive, got {chunk_size}")
+    _check_id_format(id_format)
+    _check_datetime_columns(datetime_columns)
+
+    # Transform chunks of records of each entity
+    if workers == 1:
+        results = {
+            table_name: [
+                _transform_chunk(
+                    swae_data[entity], entity, filters_on, id_format, datetime_columns
+                )
+                for entity in entities
+            ]
+            for table_name, entities in TABLE_SOURCES.items()
+        }
+    else:
+        results = _transform_chunks_parallel(
+            swae_data, filters_on, workers, chunk_size, id_format, datetime_columns
+        )
+
+    # Merge the chunks of each table
+    tabular_data = {}
+    for table_name, entities in TABLE_SOURCES.items():
+        schema = _get_schema(entities[0], id_format, datetime_columns)
+        columns = [column.name for column in schema]
+        datatypes = [column.dtype for column in schema]
+        rows = []
+        num_skipped = 0
+        for chunk_rows, chunk_num_skipped in results[table_name]:
+            # Extend the first list in place instead of concatenating copies
+            if rows:
+                rows.extend(chunk_rows)
+            else:
+                rows = chunk_rows
+            num_skipped += chunk_num_skipped
+        num_records = sum(len(swae_data[entity]) for entity in entities)
+        _check_integrity(columns, datatypes, rows, num_records, num_skipped)
+        tabular_data[table_name] = (rows, columns, datatypes)
     return tabular_data
 
 
-def _transform_missions(
-    missions_json: List[Dict], filters_on: bool
+def transform_swae_records(
+    records: List[Dict],
+    entity: str,
+    filters_on: bool = True,
+    id_format: str = "hex",
+    datetime_columns: str = "stored",
 ) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "mission_id",
-        "user_id",
-        # Main attributes
-        "title",
-        "description",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-        "start_timestamp",
-        "start_datetime",
-        "end_timestamp",
-        "end_datetime",
-        # Counts
-        "num_total_unique_views",
-    ]
+    """Transform a batch of records of one entity into rows of its table.
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        # Main attributes
-        "str",
-        "str",
-        # Dates
-        "int",
-        "str",
-        "int",
-        "str",
-        "int",
-        "str",
-        # Counts
-        "int",
-    ]
+    This allows to transform records as they are extracted, e.g. by
+    :func:`ces.swae_analysis.iter_swae_records`, instead of all of them at once.
+    Reactions, upvotes and downvotes all result in rows of the reactions table,
+    see ``TABLE_SOURCES``.
 
-    rows = []
-    num_skipped = 0
-    for mission in missions_json:
-        # Skip missions that are not created, not public or deleted
-        if filters_on:
-            deleted = _conv_bool(mission.get("deleted"))
-            public = _conv_bool(mission.get("publicChallenge"))
-            state = _conv_str(mission.get("state"))
-            if deleted or (not public) or (state != "Created"):
-                num_skipped += 1
-                continue
-
-        # Transformation
-        row = [
-            # Identifiers
-            _conv_str(mission.get("challengeId")),
-            _conv_str(mission.get("createdBy")),
-            # Main attributes
-            _conv_str(mission.get("title")),
-            _conv_web_str(mission.get("description")),
-            # Dates
-            _conv_timestamp(mission.get("createdAt")),
-            _conv_datetime(mission.get("createdAt")),
-            _conv_timestamp(mission.get("startDate")),
-            _conv_datetime(mission.get("startDate")),
-            _conv_timestamp(mission.get("expiryDate")),
-            _conv_datetime(mission.get("expiryDate")),
-            # Counts
-            _conv_int(mission.get("totalUniqueViewCount")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, missions_json, num_skipped)
+    Parameters
+    ----------
+    records : List[Dict]
+        The records of the entity, each deserialized as a dictionary.
+    entity : str
+        The name of the entity, one of "missions", "proposals", "users", "ratings",
+        "comments", "reactions", "upvotes", "downvotes", "views".
+    filters_on : bool, optional, default=True
+        A flag that determines whether filters are enabled for the transformation.
+    id_format : str, optional, default="hex"
+        The format of the identifiers of reactions and views, "hex" or "int64".
+    datetime_columns : str, optional, default="stored"
+        Whether datetime columns are "stored" or left out for "virtual" columns.
+
+    Returns
+    -------
+    table : Tuple[List, List, List]
+        The rows, column names and datatypes of the transformed records.
+
+    Raises
+    ------
+    ValueError
+        If the entity, ID format or way to store datetime columns is unknown.
+        If there are errors in the data transformation process.
+
+    """
+    # Argument processing
+    if entity not in SCHEMAS:
+        valid = ", ".join(f'"{e}"' for e in SCHEMAS)
+        raise ValueError(f'Unknown entity "{entity}". Valid: {valid}')
+    _check_id_format(id_format)
+    _check_datetime_columns(datetime_columns)
+
+    schema = _get_schema(entity, id_format, datetime_columns)
+    columns = [column.name for column in schema]
+    datatypes = [column.dtype for column in schema]
+    rows, _ = _transform_chunk(records, entity, filters_on, id_format, datetime_columns)
     return rows, columns, datatypes
 
 
-def _transform_proposals(
-    proposals_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "proposal_id",
-        "mission_id",
-        "user_id",
-        # Main attributes
-        "title",
-        "summary",
-        "state",
-        "is_anonymous",
-        "is_rejected",
-        "time_spent_create",
-        "ratings",
-        "average_rating",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-        "publishing_timestamp",
-        "publishing_datetime",
-        # Counts
-        "num_files",
-        "num_total_unique_views",
-        "num_total_engagements",
-        "num_total_contributions",
-        "num_unique_contributions",
-        "num_total_ratings",
-        "num_total_comments",
-        "num_total_neutral_comments",
-        "num_total_positive_comments",
-        "num_total_negative_comments",
-        "num_total_inline_comments",
-        "num_total_suggestions",
-        "num_total_inline_suggestions",
-        "num_volunteers",
-    ]
+def _check_id_format(id_format: str) -> None:
+    if id_format not in ID_FORMATS:
+        message = f'Unknown ID format "{id_format}". Valid: {", ".join(ID_FORMATS)}'
+        raise ValueError(message)
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
-        # Main attributes
-        "str",
-        "str",
-        "str",
-        "bool",
-        "bool",
-        "int",
-        "str",
-        "float",
-        # Dates
-        "int",
-        "str",
-        "int",
-        "str",
-        # Counts
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-    ]
 
-    rows = []
+def _check_datetime_columns(datetime_columns: str) -> None:
+    if datetime_columns not in DATETIME_COLUMNS:
+        message = (
+            f'Unknown way to store datetime columns "{datetime_columns}". '
+            f'Valid: {", ".join(DATETIME_COLUMNS)}'
+        )
+        raise ValueError(message)
+
+
+def _transform_chunks_parallel(
+    swae_data: Dict[str, Any],
+    filters_on: bool,
+    workers: int,
+    chunk_size: int,
+    id_format: str,
+    datetime_columns: str,
+) -> Dict[str, List[Tuple[List, int]]]:
+    """Transform chunks of records with a pool of worker processes."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Submit the largest tables first so that small ones fill the gaps
+        futures = {}
+        for table_name, entities in sorted(
+            TABLE_SOURCES.items(),
+            key=lambda item: -sum(len(swae_data[entity]) for entity in item[1]),
+        ):
+            futures[table_name] = [
+                executor.submit(
+                    _transform_chunk,
+                    swae_data[entity][start : start + chunk_size],
+                    entity,
+                    filters_on,
+                    id_format,
+                    datetime_columns,
+                )
+                for entity in entities
+                for start in range(0, len(swae_data[entity]), chunk_size)
+            ]
+
+        # Collect results in the original order of records
+        results = {
+            table_name: [future.result() for future in futures[table_name]]
+            for table_name in TABLE_SOURCES
+        }
+    return results
+
+
+def _transform_chunk(
+    records: List[Dict],
+    entity: str,
+    filters_on: bool,
+    id_format: str = "hex",
+    datetime_columns: str = "stored",
+) -> Tuple[List, int]:
+    """Transform records of an entity according to its schema and filter."""
+    schema = _get_schema(entity, id_format, datetime_columns)
+    columns = [column.name for column in schema]
+    datatypes = [column.dtype for column in schema]
+
+    # Skip records that are marked as inactive
     num_skipped = 0
-    for proposal in proposals_json:
-        # Skip proposals that are drafts or deleted
-        if filters_on:
-            deleted = _conv_bool(proposal.get("deleted"))
-            state = _conv_str(proposal.get("state"))
-            if deleted or (state == "Draft"):  # Unclear if that category exists
-                num_skipped += 1
-                continue
-
-        # Transformation
-        row = [
-            # Identifiers
-            _conv_str(proposal.get("documentId")),
-            _conv_str(proposal.get("challengeId")),
-            _conv_str(proposal.get("createdBy")),
-            # Main attributes
-            _conv_str(proposal.get("title")),
-            _conv_web_str(proposal.get("summary")),
-            _conv_str(proposal.get("state")),
-            _conv_bool(proposal.get("isAnonymous")),
-            _conv_proposal_is_rejected(proposal.get("rejectedBy")),
-            _conv_int(proposal.get("timeSpentCreate")),
-            _conv_proposal_ratings(proposal.get("votesArr")),
-            _conv_float(proposal.get("averageVoteRating")),
-            # Dates
-            _conv_timestamp(proposal.get("createdAt")),
-            _conv_datetime(proposal.get("createdAt")),
-            _conv_timestamp(proposal.get("publishedAt")),
-            _conv_datetime(proposal.get("publishedAt")),
-            # Counts
-            _conv_proposal_num_files(proposal.get("files")),
-            _conv_int(proposal.get("totalUniqueViewCount")),
-            _conv_int(proposal.get("totalEngagementCount")),
-            _conv_int(proposal.get("ContributionTotalCount")),
-            _conv_int(proposal.get("ContributionUniqueCount")),
-            _conv_int(proposal.get("totalVoteCount")),
-            _conv_int(proposal.get("totalCommentCount")),
-            _conv_int(proposal.get("totalNeutralCommentCount")),
-            _conv_int(proposal.get("totalPositiveCommentCount")),
-            _conv_int(proposal.get("totalNegativeCommentCount")),
-            _conv_int(proposal.get("totalInlineCommentCount")),
-            _conv_int(proposal.get("totalSuggestionCount")),
-            _conv_int(proposal.get("totalInlineSuggestionCount")),
-            _conv_int(proposal.get("totalVolunteerCount")),
+    selected = records
+    keep = FILTERS.get(entity)
+    if filters_on and keep is not None:
+        selected = list(compress(records, keep(records)))
+        num_skipped = len(records) - len(selected)
+
+    # Transformation
+    values = [column.converter(selected, column.sources) for column in schema]
+    rows = list(map(list, zip(*values)))
+    _check_integrity(columns, datatypes, rows, len(records), num_skipped)
+    return rows, num_skipped
+
+
+def _get_schema(
+    entity: str, id_format: str, datetime_columns: str = "stored"
+) -> List[Column]:
+    """Get the schema of an entity with derived identifiers in the given format."""
+    schema = SCHEMAS[entity]
+    if id_format == "int64":
+        schema = [
+            column._replace(dtype="int", converter=_col_int64_id)
+            if column.converter is _col_unique_id
+            else column
+            for column in schema
         ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, proposals_json, num_skipped)
-    return rows, columns, datatypes
+    if datetime_columns == "virtual":
+        # Each datetime column follows the timestamp column it is computed from
+        schema = [column for column in schema if column.converter is not _col_datetime]
+    return schema
 
 
-def _transform_users(
-    users_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "user_id",
-        # Main attributes
-        "name",
-        "email_address",
-        "ethereum_address",
-        "cardano_address",
-        "web3_nonce",
-        # Further attributes
-        "handle",
-        "bio",
-        "timezone",
-        "age_range",
-        "gender",
-        "linkedin_link",
-        "medium_link",
-        "twitter_link",
-        "provider_name",
-        "last_seen_time",
-        "last_seen_location",
-        "sign_status",
-        "contribution_status",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-        # Counts
-        "num_votes",
-    ]
+# Filters: each returns a flag per record that is True if the record is kept
 
-    datatypes = [
-        # Identifiers
-        "str",
-        # Main attributes
-        "str",
-        "str",
-        "str",
-        "str",
-        "str",
-        # Further attributes
-        "str",
-        "str",
-        "str",
-        "str",
-        "str",
-        "str",
-        "str",
-        "str",
-        "str",
-        "int",
-        "str",
-        "bool",
-        "bool",
-        # Dates
-        "int",
-        "str",
-        # Counts
-        "int",
-    ]
 
-    rows = []
-    num_skipped = 0
-    for user in users_json:
-        # Skip users that are deleted
-        if filters_on:
-            deleted = _conv_bool(user.get("deleted"))
-            if deleted:
-                num_skipped += 1
-                continue
-
-        # Transformation
-        row = [
-            # Identifiers
-            _conv_str(user.get("userName")),
-            # Main attributes
-            _conv_user_name(user.get("firstName"), user.get("lastName")),
-            _conv_user_email_address(user.get("userName")),
-            _conv_user_ethereum_address(user.get("userName")),
-            _conv_str(user.get("additionalWalletAddress")),
-            _conv_str(user.get("web3Nonce")),
-            # Further attributes
-            _conv_str(user.get("myHandle")),
-            _conv_str(user.get("myBio")),
-            _conv_str(user.get("timeZone")),
-            _conv_str(user.get("age")),
-            _conv_str(user.get("gender")),
-            _conv_str(user.get("linkedInLink")),
-            _conv_str(user.get("mediumLink")),
-            _conv_str(user.get("twitterLink")),
-            _conv_str(user.get("providerName")),
-            _conv_timestamp(user.get("lastSeenAt")),
-            _conv_str(user.get("lastSeenCity")),
-            _conv_bool(user.get("signStatus")),
-            _conv_bool(user.get("contributionStatus")),
-            # Dates
-            _conv_timestamp(user.get("createdAt")),
-            _conv_datetime(user.get("createdAt")),
-            # Counts
-            _conv_int(user.get("voteCount")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, users_json, num_skipped)
-    return rows, columns, datatypes
+def _keep_missions(records: List[Dict]) -> List[bool]:
+    # Skip missions that are not created, not public or deleted
+    deleted = _col_bool(records, ("deleted",))
+    public = _col_bool(records, ("publicChallenge",))
+    state = _col_str(records, ("state",))
+    return [not d and p and s == "Created" for d, p, s in zip(deleted, public, state)]
 
 
-def _transform_ratings(
-    ratings_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "rating_id",
-        "proposal_id",
-        "user_id",
-        # Main attributes
-        "rating",
-        "is_anonymous",
-        "enable",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-    ]
+def _keep_proposals(records: List[Dict]) -> List[bool]:
+    # Skip proposals that are drafts or deleted
+    deleted = _col_bool(records, ("deleted",))
+    state = _col_str(records, ("state",))
+    return [not d and s != "Draft" for d, s in zip(deleted, state)]
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
-        # Main attributes
-        "int",
-        "bool",
-        "bool",
-        # Dates
-        "int",
-        "str",
-    ]
 
-    rows = []
-    for rating in ratings_json:
-        row = [
-            # Identifiers
-            _conv_str(rating.get("voteId")),
-            _conv_str(rating.get("documentId")),
-            _conv_str(rating.get("userName")),
-            # Main attributes
-            _conv_float(rating.get("rating")),
-            _conv_bool(rating.get("isAnonymous")),
-            _conv_bool(rating.get("enable")),
-            # Dates
-            _conv_timestamp(rating.get("createdAt")),
-            _conv_datetime(rating.get("createdAt")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, ratings_json)
-    return rows, columns, datatypes
+def _keep_not_deleted(records: List[Dict]) -> List[bool]:
+    # Skip users or comments that are deleted
+    return [not d for d in _col_bool(records, ("deleted",))]
 
 
-def _transform_comments(
-    comments_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "comment_id",
-        "proposal_id",
-        "user_id",
-        "parent_comment_id",
-        # Main attributes
-        "text",
-        "emotion",
-        "level",
-        "time_spent",
-        "is_anonymous",
-        "is_flagged",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-        # Counts
-        "num_total_replies",
-        "num_endorse_up_reactions",
-        "num_endorse_down_reactions",
-        "num_anger_reactions",
-        "num_celebrate_reactions",
-        "num_clap_reactions",
-        "num_curious_reactions",
-        "num_genius_reactions",
-        "num_happy_reactions",
-        "num_hot_reactions",
-        "num_laugh_reactions",
-        "num_love_reactions",
-        "num_sad_reactions",
-    ]
+# Column converters: each converts the source fields of all records into a column
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
-        "str",
-        # Main attributes
-        "str",
-        "str",
-        "int",
-        "int",
-        "bool",
-        "bool",
-        # Dates
-        "int",
-        "str",
-        # Counts
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-        "int",
-    ]
 
-    rows = []
-    num_skipped = 0
-    for comment in comments_json:
-        # Skip comments that are deleted
-        if filters_on:
-            deleted = _conv_bool(comment.get("deleted"))
-            if deleted:
-                num_skipped += 1
-                continue
-
-        # Transformation
-        row = [
-            # Identifiers
-            _conv_str(comment.get("commentId")),
-            _conv_str(comment.get("documentId")),
-            _conv_str(comment.get("createdBy")),
-            _conv_str(comment.get("parentCommentId")),
-            # Main attributes
-            _conv_web_str(comment.get("commentText")),
-            _conv_str(comment.get("commentEmotion")),
-            _conv_int(comment.get("commentLevel")),
-            _conv_int(comment.get("timeSpent")),
-            _conv_bool(comment.get("isAnonymous")),
-            _conv_bool(comment.get("flagged")),
-            # Dates
-            _conv_timestamp(comment.get("createdAt")),
-            _conv_datetime(comment.get("createdAt")),
-            # Counts
-            _conv_int(comment.get("totalReplyCount")),
-            _conv_int(comment.get("endorseUpCount")),
-            _conv_int(comment.get("endorseDownCount")),
-            _conv_int(comment.get("angerCount")),
-            _conv_int(comment.get("celebrateCount")),
-            _conv_int(comment.get("clapCount")),
-            _conv_int(comment.get("curiousCount")),
-            _conv_int(comment.get("geniusCount")),
-            _conv_int(comment.get("happyCount")),
-            _conv_int(comment.get("hotCount")),
-            _conv_int(comment.get("laughCount")),
-            _conv_int(comment.get("loveCount")),
-            _conv_int(comment.get("sadCount")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, comments_json, num_skipped)
-    return rows, columns, datatypes
+def _get_items(records: List[Dict], key: str) -> List[Optional[Dict]]:
+    return list(map(dict.get, records, repeat(key)))
 
 
-def _transform_reactions(
-    reactions_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "reaction_id",
-        "comment_id",
-        "user_id",
-        # Main attributes
-        "reaction_type",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-    ]
+def _unwrap(items: List[Optional[Dict]]) -> List[Any]:
+    """Get the values of items like ``{"S": "text"}`` or fail for any malformed one."""
+    values = list(map(next, map(iter, map(dict.values, items))))
+    if len(values) != len(items):
+        # next() ended the iteration early at an empty item
+        raise ValueError("Empty item")
+    return values
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
-        # Main attributes
-        "str",
-        # Dates
-        "int",
-        "str",
-    ]
 
-    rows = []
-    for reaction in reactions_json:
-        row = [
-            # Identifiers
-            _create_unique_id(
-                reaction.get("commentId"),
-                reaction.get("userName"),
-                reaction.get("reactionType"),
-                reaction.get("createdAt"),
-            ),
-            _conv_str(reaction.get("commentId")),
-            _conv_str(reaction.get("userName")),
-            # Main attributes
-            _conv_str(reaction.get("reactionType")),
-            # Dates
-            _conv_timestamp(reaction.get("createdAt")),
-            _conv_datetime(reaction.get("createdAt")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, reactions_json)
-    return rows, columns, datatypes
+def _convert(
+    items: List[Optional[Dict]],
+    fast: Callable[[List[Any]], Sequence],
+    slow: Callable[[Optional[Dict]], Any],
+    default: Any,
+) -> Sequence:
+    try:
+        return fast(_unwrap(items))
+    except Exception:
+        # Missing items get the default, all others are converted one by one
+        return [default if item is None else slow(item) for item in items]
 
 
-def _transform_upvotes(
-    upvotes_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "reaction_id",
-        "comment_id",
-        "user_id",
-        # Main attributes
-        "reaction_type",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-    ]
+def _col_str(records: List[Dict], keys: Tuple[str, ...]) -> List[str]:
+    def fast(values):
+        return list(map(str.strip, map(str, values)))
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
-        # Main attributes
-        "str",
-        # Dates
-        "int",
-        "str",
-    ]
+    return _convert(_get_items(records, keys[0]), fast, _conv_str, "")
 
-    rows = []
-    for upvote in upvotes_json:
-        row = [
-            # Identifiers
-            _create_unique_id(
-                upvote.get("commentId"),
-                upvote.get("userName"),
-                upvote.get("reactionType"),
-                upvote.get("createdAt"),
-            ),
-            _conv_str(upvote.get("commentId")),
-            _conv_str(upvote.get("userName")),
-            # Main attributes
-            "upvote",
-            # Dates
-            _conv_timestamp(upvote.get("createdAt")),
-            _conv_datetime(upvote.get("createdAt")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, upvotes_json)
-    return rows, columns, datatypes
 
+def _col_id(records: List[Dict], keys: Tuple[str, ...]) -> List[str]:
+    # Identifiers and categories repeat across many rows of several tables,
+    # so interning lets all of them share one string object per distinct value
+    return list(map(sys.intern, _col_str(records, keys)))
 
-def _transform_downvotes(
-    downvotes_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "reaction_id",
-        "comment_id",
-        "user_id",
-        # Main attributes
-        "reaction_type",
-        # Dates
-        "creation_timestamp",
-        "creation_datetime",
-    ]
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
-        # Main attributes
-        "str",
-        # Dates
-        "int",
-        "str",
-    ]
+def _col_web_str(records: List[Dict], keys: Tuple[str, ...]) -> List[str]:
+    def fast(values):
+        result = []
+        for val in map(str, values):
+            val = val.replace("</p>", "").replace("<p>", "\n").strip()
+            result.append(html.unescape(val))
+        return result
 
-    rows = []
-    for downvote in downvotes_json:
-        row = [
-            # Identifiers
-            _create_unique_id(
-                downvote.get("commentId"),
-                downvote.get("userName"),
-                downvote.get("reactionType"),
-                downvote.get("createdAt"),
-            ),
-            _conv_str(downvote.get("commentId")),
-            _conv_str(downvote.get("userName")),
-            # Main attributes
-            "downvote",
-            # Dates
-            _conv_timestamp(downvote.get("createdAt")),
-            _conv_datetime(downvote.get("createdAt")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, downvotes_json)
-    return rows, columns, datatypes
+    return _convert(_get_items(records, keys[0]), fast, _conv_web_str, "")
 
 
-def _transform_views(
-    views_json: List[Dict], filters_on: bool
-) -> Tuple[List, List, List]:
-    columns = [
-        # Identifiers
-        "view_id",
-        "proposal_id",
-        "user_id",
+def _col_int(records: List[Dict], keys: Tuple[str, ...]) -> Sequence[int]:
+    # Values beyond 64 bits raise an OverflowError and are kept as Python integers
+    def fast(values):
+        return array.array("q", map(int, values))
+
+    return _convert(_get_items(records, keys[0]), fast, _conv_int, 0)
+
+
+def _col_float(records: List[Dict], keys: Tuple[str, ...]) -> Sequence[float]:
+    def fast(values):
+        return array.array("d", map(float, values))
+
+    return _convert(_get_items(records, keys[0]), fast, _conv_float, 0.0)
+
+
+def _col_bool(records: List[Dict], keys: Tuple[str, ...]) -> List[bool]:
+    def fast(values):
+        return list(map(bool, values))
+
+    return _convert(_get_items(records, keys[0]), fast, _conv_bool, False)
+
+
+def _col_timestamp(records: List[Dict], keys: Tuple[str, ...]) -> Sequence[int]:
+    def fast(values):
+        return array.array("q", map(int, values))
+
+    return _convert(_get_items(records, keys[0]), fast, _conv_timestamp, 0)
+
+
+def _col_datetime(records: List[Dict], keys: Tuple[str, ...]) -> List[str]:
+    def fast(values):
+        return array.array("q", map(int, values))
+
+    def slow(item):
+        try:
+            return int(_get_val(item))
+        except Exception:
+            return None
+
+    timestamps = _convert(_get_items(records, keys[0]), fast, slow, None)
+    return _format_datetimes(timestamps)
+
+
+def _format_datetimes(timestamps: Sequence[Optional[int]]) -> List[str]:
+    """Format timestamps in milliseconds as UTC datetimes, an empty string for None.
+
+    UTC is used instead of the local time zone, so that the datetimes are the same
+    as those of virtual datetime columns, see :func:`ces.swae_analysis.load_sqlite`,
+    and do not depend on the machine that transforms the data.
+
+    """
+    lower, upper = BULK_TIMESTAMP_RANGE
+    try:
+        if isinstance(timestamps, array.array):
+            # View of the machine values without a copy
+            millis = np.frombuffer(timestamps, dtype=np.int64)
+        else:
+            millis = np.array(timestamps, dtype=np.int64)
+        in_bulk = (millis >= lower) & (millis < upper)
+    except (TypeError, OverflowError):
+        # Missing or very large timestamps
+        in_bulk = np.array(
+            [ts is not None and lower <= ts < upper for ts in timestamps], dtype=bool
+        )
+        millis = np.where(
+            in_bulk, [ts if ts is not None else 0 for ts in timestamps], 0
+        )
+    if in_bulk.all():
+        return _format_utc_datetimes(millis)
+
+    result = [""] * len(timestamps)
+    indices = np.flatnonzero(in_bulk)
+    for i, text in zip(indices.tolist(), _format_utc_datetimes(millis[indices])):
+        result[i] = text
+    for i in np.flatnonzero(~in_bulk).tolist():
+        if timestamps[i] is not None:
+            result[i] = _format_datetime(timestamps[i])
+    return result
+
+
+def _format_utc_datetimes(timestamps: np.ndarray) -> List[str]:
+    """Format timestamps like _format_datetime in bulk."""
+    strings = np.datetime_as_string(timestamps.astype("datetime64[ms]"), unit="ms")
+    return list(map(methodcaller("replace", "T", " "), strings.tolist()))
+
+
+def _format_datetime(timestamp: int) -> str:
+    try:
+        dt = UNIX_EPOCH + datetime.timedelta(milliseconds=timestamp)
+        result = dt.isoformat(sep=" ", timespec="milliseconds")
+    except Exception:
+        # Default
+        result = ""
+    return result
+
+
+def _col_unique_id(records: List[Dict], keys: Tuple[str, ...]) -> List[str]:
+    # Same result as _create_unique_id applied to the raw items of each record
+    sha256 = hashlib.sha256
+    columns = [_get_items(records, key) for key in keys]
+    return [
+        sha256("|".join(map(str, args)).encode("utf-8")).hexdigest()
+        for args in zip(*columns)
     ]
 
-    datatypes = [
-        # Identifiers
-        "str",
-        "str",
-        "str",
+
+def _col_int64_id(records: List[Dict], keys: Tuple[str, ...]) -> List[int]:
+    # First 8 bytes of the hash of _col_unique_id as signed integer, i.e. a valid rowid
+    sha256 = hashlib.sha256
+    from_bytes = int.from_bytes
+    columns = [_get_items(records, key) for key in keys]
+    return [
+        from_bytes(
+            sha256("|".join(map(str, args)).encode("utf-8")).digest()[:8],
+            "big",
+            signed=True,
+        )
+        for args in zip(*columns)
     ]
 
-    rows = []
-    for view in views_json:
-        row = [
-            _create_unique_id(
-                view.get("id"),
-                view.get("userName"),
-            ),
-            _conv_str(view.get("id")),
-            _conv_str(view.get("userName")),
-        ]
-        rows.append(row)
-    _check_integrity(columns, datatypes, rows, views_json)
-    return rows, columns, datatypes
+
+def _col_apply(func: Callable[..., Any]) -> Callable:
+    """Create a converter that applies a function to the raw items of each record."""
+
+    def converter(records: List[Dict], keys: Tuple[str, ...]) -> List:
+        columns = [_get_items(records, key) for key in keys]
+        return [func(*args) for args in zip(*columns)]
+
+    return converter
+
+
+def _col_constant(value: Any) -> Callable:
+    """Create a converter that returns the same value for each record."""
+
+    def converter(records: List[Dict], keys: Tuple[str, ...]) -> List:
+        return [value] * len(records)
+
+    return converter
 
 
 def _check_integrity(
     columns: List[str],
     datatypes: List[str],
     rows: List[List[Any]],
-    data_json: List[Dict],
+    num_records: int,
     num_skipped: int = 0,
 ) -> None:
     """Ensure that the result of a transformation fulfills some basic form criteria."""
     num_columns = len(columns)
     num_datatypes = len(datatypes)
     num_rows = len(rows)
-    num_entries = len(rows[0])
-    num_records = len(data_json)
+    # Note: A chunk may only consist of skipped records
+    num_entries = len(rows[0]) if rows else num_columns
     if num_columns != num_datatypes:
         message = (
             "Number of columns is not equal to "
@@ -832,17 +664,6 @@ def _conv_timestamp(item: Union[dict, None]) -> int:
     return result
 
 
-def _conv_datetime(item: Union[dict, None]) -> str:
-    try:
-        result = int(_get_val(item))
-        dt = datetime.datetime.fromtimestamp(result / 1000.0)
-        result = dt.isoformat(sep=" ", timespec="milliseconds")
-    except Exception:
-        # Default
-        result = ""
-    return result
-
-
 def _conv_proposal_ratings(item: Union[dict, None]) -> str:
     try:
         value_counts = _get_val(item)
@@ -928,3 +749,221 @@ def _conv_user_ethereum_address(item: Union[dict, None]) -> str:
         # Default
         ethereum_address = ""
     return ethereum_address
+
+
+# Schemas
+
+_REACTION_IDENTIFIERS = [
+    Column(
+        "reaction_id",
+        "str",
+        _col_unique_id,
+        ("commentId", "userName", "reactionType", "createdAt"),
+    ),
+    Column("comment_id", "str", _col_id, ("commentId",)),
+    Column("user_id", "str", _col_id, ("userName",)),
+]
+
+_REACTION_DATES = [
+    Column("creation_timestamp", "int", _col_timestamp, ("createdAt",)),
+    Column("creation_datetime", "str", _col_datetime, ("createdAt",)),
+]
+
+SCHEMAS = {
+    "missions": [
+        # Identifiers
+        Column("mission_id", "str", _col_id, ("challengeId",)),
+        Column("user_id", "str", _col_id, ("createdBy",)),
+        # Main attributes
+        Column("title", "str", _col_str, ("title",)),
+        Column("description", "str", _col_web_str, ("description",)),
+        # Dates
+        Column("creation_timestamp", "int", _col_timestamp, ("createdAt",)),
+        Column("creation_datetime", "str", _col_datetime, ("createdAt",)),
+        Column("start_timestamp", "int", _col_timestamp, ("startDate",)),
+        Column("start_datetime", "str", _col_datetime, ("startDate",)),
+        Column("end_timestamp", "int", _col_timestamp, ("expiryDate",)),
+        Column("end_datetime", "str", _col_datetime, ("expiryDate",)),
+        # Counts
+        Column("num_total_unique_views", "int", _col_int, ("totalUniqueViewCount",)),
+    ],
+    "proposals": [
+        # Identifiers
+        Column("proposal_id", "str", _col_id, ("documentId",)),
+        Column("mission_id", "str", _col_id, ("challengeId",)),
+        Column("user_id", "str", _col_id, ("createdBy",)),
+        # Main attributes
+        Column("title", "str", _col_str, ("title",)),
+        Column("summary", "str", _col_web_str, ("summary",)),
+        Column("state", "str", _col_id, ("state",)),
+        Column("is_anonymous", "bool", _col_bool, ("isAnonymous",)),
+        Column(
+            "is_rejected",
+            "bool",
+            _col_apply(_conv_proposal_is_rejected),
+            ("rejectedBy",),
+        ),
+        Column("time_spent_create", "int", _col_int, ("timeSpentCreate",)),
+        Column("ratings", "str", _col_apply(_conv_proposal_ratings), ("votesArr",)),
+        Column("average_rating", "float", _col_float, ("averageVoteRating",)),
+        # Dates
+        Column("creation_timestamp", "int", _col_timestamp, ("createdAt",)),
+        Column("creation_datetime", "str", _col_datetime, ("createdAt",)),
+        Column("publishing_timestamp", "int", _col_timestamp, ("publishedAt",)),
+        Column("publishing_datetime", "str", _col_datetime, ("publishedAt",)),
+        # Counts
+        Column("num_files", "int", _col_apply(_conv_proposal_num_files), ("files",)),
+        Column("num_total_unique_views", "int", _col_int, ("totalUniqueViewCount",)),
+        Column("num_total_engagements", "int", _col_int, ("totalEngagementCount",)),
+        Column("num_total_contributions", "int", _col_int, ("ContributionTotalCount",)),
+        Column(
+            "num_unique_contributions", "int", _col_int, ("ContributionUniqueCount",)
+        ),
+        Column("num_total_ratings", "int", _col_int, ("totalVoteCount",)),
+        Column("num_total_comments", "int", _col_int, ("totalCommentCount",)),
+        Column(
+            "num_total_neutral_comments", "int", _col_int, ("totalNeutralCommentCount",)
+        ),
+        Column(
+            "num_total_positive_comments",
+            "int",
+            _col_int,
+            ("totalPositiveCommentCount",),
+        ),
+        Column(
+            "num_total_negative_comments",
+            "int",
+            _col_int,
+            ("totalNegativeCommentCount",),
+        ),
+        Column(
+            "num_total_inline_comments", "int", _col_int, ("totalInlineCommentCount",)
+        ),
+        Column("num_total_suggestions", "int", _col_int, ("totalSuggestionCount",)),
+        Column(
+            "num_total_inline_suggestions",
+            "int",
+            _col_int,
+            ("totalInlineSuggestionCount",),
+        ),
+        Column("num_volunteers", "int", _col_int, ("totalVolunteerCount",)),
+    ],
+    "users": [
+        # Identifiers
+        Column("user_id", "str", _col_id, ("userName",)),
+        # Main attributes
+        Column("name", "str", _col_apply(_conv_user_name), ("firstName", "lastName")),
+        Column(
+            "email_address", "str", _col_apply(_conv_user_email_address), ("userName",)
+        ),
+        Column(
+            "ethereum_address",
+            "str",
+            _col_apply(_conv_user_ethereum_address),
+            ("userName",),
+        ),
+        Column("cardano_address", "str", _col_str, ("additionalWalletAddress",)),
+        Column("web3_nonce", "str", _col_str, ("web3Nonce",)),
+        # Further attributes
+        Column("handle", "str", _col_str, ("myHandle",)),
+        Column("bio", "str", _col_str, ("myBio",)),
+        Column("timezone", "str", _col_str, ("timeZone",)),
+        Column("age_range", "str", _col_str, ("age",)),
+        Column("gender", "str", _col_str, ("gender",)),
+        Column("linkedin_link", "str", _col_str, ("linkedInLink",)),
+        Column("medium_link", "str", _col_str, ("mediumLink",)),
+        Column("twitter_link", "str", _col_str, ("twitterLink",)),
+        Column("provider_name", "str", _col_str, ("providerName",)),
+        Column("last_seen_time", "int", _col_timestamp, ("lastSeenAt",)),
+        Column("last_seen_location", "str", _col_str, ("lastSeenCity",)),
+        Column("sign_status", "bool", _col_bool, ("signStatus",)),
+        Column("contribution_status", "bool", _col_bool, ("contributionStatus",)),
+        # Dates
+        Column("creation_timestamp", "int", _col_timestamp, ("createdAt",)),
+        Column("creation_datetime", "str", _col_datetime, ("createdAt",)),
+        # Counts
+        Column("num_votes", "int", _col_int, ("voteCount",)),
+    ],
+    "ratings": [
+        # Identifiers
+        Column("rating_id", "str", _col_str, ("voteId",)),
+        Column("proposal_id", "str", _col_id, ("documentId",)),
+        Column("user_id", "str", _col_id, ("userName",)),
+        # Main attributes
+        # Note: Values are converted to float, SQLite stores them as INTEGER if possible
+        Column("rating", "int", _col_float, ("rating",)),
+        Column("is_anonymous", "bool", _col_bool, ("isAnonymous",)),
+        Column("enable", "bool", _col_bool, ("enable",)),
+        # Dates
+        Column("creation_timestamp", "int", _col_timestamp, ("createdAt",)),
+        Column("creation_datetime", "str", _col_datetime, ("createdAt",)),
+    ],
+    "comments": [
+        # Identifiers
+        Column("comment_id", "str", _col_id, ("commentId",)),
+        Column("proposal_id", "str", _col_id, ("documentId",)),
+        Column("user_id", "str", _col_id, ("createdBy",)),
+        Column("parent_comment_id", "str", _col_id, ("parentCommentId",)),
+        # Main attributes
+        Column("text", "str", _col_web_str, ("commentText",)),
+        Column("emotion", "str", _col_id, ("commentEmotion",)),
+        Column("level", "int", _col_int, ("commentLevel",)),
+        Column("time_spent", "int", _col_int, ("timeSpent",)),
+        Column("is_anonymous", "bool", _col_bool, ("isAnonymous",)),
+        Column("is_flagged", "bool", _col_bool, ("flagged",)),
+        # Dates
+        Column("creation_timestamp", "int", _col_timestamp, ("createdAt",)),
+        Column("creation_datetime", "str", _col_datetime, ("createdAt",)),
+        # Counts
+        Column("num_total_replies", "int", _col_int, ("totalReplyCount",)),
+        Column("num_endorse_up_reactions", "int", _col_int, ("endorseUpCount",)),
+        Column("num_endorse_down_reactions", "int", _col_int, ("endorseDownCount",)),
+        Column("num_anger_reactions", "int", _col_int, ("angerCount",)),
+        Column("num_celebrate_reactions", "int", _col_int, ("celebrateCount",)),
+        Column("num_clap_reactions", "int", _col_int, ("clapCount",)),
+        Column("num_curious_reactions", "int", _col_int, ("curiousCount",)),
+        Column("num_genius_reactions", "int", _col_int, ("geniusCount",)),
+        Column("num_happy_reactions", "int", _col_int, ("happyCount",)),
+        Column("num_hot_reactions", "int", _col_int, ("hotCount",)),
+        Column("num_laugh_reactions", "int", _col_int, ("laughCount",)),
+        Column("num_love_reactions", "int", _col_int, ("loveCount",)),
+        Column("num_sad_reactions", "int", _col_int, ("sadCount",)),
+    ],
+    "reactions": [
+        # Identifiers
+        *_REACTION_IDENTIFIERS,
+        # Main attributes
+        Column("reaction_type", "str", _col_id, ("reactionType",)),
+        # Dates
+        *_REACTION_DATES,
+    ],
+    "upvotes": [
+        # Identifiers
+        *_REACTION_IDENTIFIERS,
+        # Main attributes
+        Column("reaction_type", "str", _col_constant("upvote"), ()),
+        # Dates
+        *_REACTION_DATES,
+    ],
+    "downvotes": [
+        # Identifiers
+        *_REACTION_IDENTIFIERS,
+        # Main attributes
+        Column("reaction_type", "str", _col_constant("downvote"), ()),
+        # Dates
+        *_REACTION_DATES,
+    ],
+    "views": [
+        # Identifiers
+        Column("view_id", "str", _col_unique_id, ("id", "userName")),
+        Column("proposal_id", "str", _col_id, ("id",)),
+        Column("user_id", "str", _col_id, ("userName",)),
+    ],
+}
+
+FILTERS = {
+    "missions": _keep_missions,
+    "proposals": _keep_proposals,
+    "users": _keep_not_deleted,
+    "comments": _keep_not_deleted,
+}
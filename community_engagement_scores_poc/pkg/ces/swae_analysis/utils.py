@@ -1,16 +1,143 @@
 """Module for basic shared functionality."""
 
+import os
+import re
 import sqlite3
-from typing import List, Tuple
+from typing import List, Tuple, Union
+from urllib.parse import quote
 
 
-def execute_query(con: sqlite3.Connection, query: str) -> List[Tuple]:
-    """Execute a single query on the database and return the result as a list of tuples.
+# Database backends. DuckDB is an optional dependency, a connection of it is
+# recognized by the module of its type, so that duckdb is not imported otherwise.
+BACKENDS = ("sqlite", "duckdb")
+Connection = Union[sqlite3.Connection, "duckdb.DuckDBPyConnection"]  # noqa: F821
+
+# Read-only connections: pages of a memory-mapped database file are read from the
+# page cache of the operating system, which is shared by all processes, instead of
+# being copied into the page cache of each connection, which holds the rest
+READ_ONLY_MMAP_SIZE = 256 * 1024**2
+READ_ONLY_CACHE_SIZE = 64 * 1024**2
+
+# Secondary indexes of base and derived tables, in addition to the unique index on
+# the first column of base tables. Keys are patterns of table names, values are the
+# indexed columns and whether they are unique.
+# - Filter views select proposals by mission within time ranges and ratings,
+#   comments and reactions within time ranges, which each are an OR of ranges
+# - Network construction and joins select by proposal or comment
+# - Materialized filter tables are joined by proposal or comment, and counts group
+#   the selected proposals by user
+# - Counts group all ratings by user
+# - Counts, scores and rewards are updated and joined by user
+# - Scores are retrieved ordered by engagement score
+INDEX_PLAN = {
+    r"proposals": [(("mission_id", "creation_timestamp"), False)],
+    r"ratings": [
+        (("creation_timestamp",), False),
+        (("proposal_id", "creation_timestamp"), False),
+        (("user_id",), False),
+    ],
+    r"comments": [
+        (("creation_timestamp",), False),
+        (("proposal_id", "creation_timestamp"), False),
+    ],
+    r"reactions": [
+        (("creation_timestamp",), False),
+        (("comment_id", "creation_timestamp"), False),
+    ],
+    r"filter\d+_missions": [(("mission_id",), True)],
+    r"filter\d+_proposals": [(("proposal_id",), True), (("user_id",), False)],
+    r"filter\d+_ratings": [(("proposal_id",), False)],
+    r"filter\d+_comments": [(("comment_id",), True), (("proposal_id",), False)],
+    r"filter\d+_reactions": [(("comment_id",), False)],
+    r"filter\d+_counts": [(("user_id",), True)],
+    r"filter\d+_var\d+_scores": [(("engagement_score", "user_id"), False)],
+    r"filter\d+_var\d+_dist\d+_rewards": [(("user_id",), True)],
+}
+
+
+def get_backend(con: Connection) -> str:
+    """Get the name of the database backend of a connection.
 
     Parameters
     ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
+
+    Returns
+    -------
+    backend : str
+        "sqlite" or "duckdb", see ``BACKENDS``.
+
+    Raises
+    ------
+    TypeError
+        If the connection belongs to none of the backends.
+
+    """
+    if isinstance(con, sqlite3.Connection):
+        return "sqlite"
+    if type(con).__module__.lstrip("_").split(".")[0] == "duckdb":
+        return "duckdb"
+    raise TypeError(f"Unsupported database connection of type {type(con)}")
+
+
+def connect_read_only(
+    filepath: str,
+    immutable: bool = False,
+    mmap_size: int = READ_ONLY_MMAP_SIZE,
+    cache_size: int = READ_ONLY_CACHE_SIZE,
+) -> sqlite3.Connection:
+    """Open a read-only connection to an SQLite database file.
+
+    The connection is opened with a URI in mode "ro", so that it takes no write
+    locks, and the file is memory-mapped. It can be passed to all functions that
+    only read, e.g. :func:`ces.swae_analysis.get_rewards`,
+    :func:`ces.swae_analysis.plot_rewards` or :func:`ces.swae_analysis.sqlite_to_csv`.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the SQLite database file.
+    immutable : bool, optional, default=False
+        Whether the file is opened as immutable, so that SQLite takes no locks at all
+        and does not check for changes by other connections. This is only safe if no
+        other connection writes to the file while this connection is open.
+    mmap_size : int, optional, default=256 MiB
+        The maximum number of bytes of the file that are memory-mapped.
+    cache_size : int, optional, default=64 MiB
+        The maximum number of bytes in the page cache of the connection.
+
+    Returns
+    -------
     con : sqlite3.Connection
         The SQLite database connection object.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist, since a read-only connection can not create it.
+
+    """
+    # Precondition: File exists
+    if not os.path.isfile(filepath):
+        raise FileNotFoundError(f"Database file could not be found: {filepath}")
+
+    uri = f"file:{quote(os.path.abspath(filepath))}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    con = sqlite3.connect(uri, uri=True)
+    con.execute(f"PRAGMA mmap_size = {mmap_size}")
+    con.execute(f"PRAGMA cache_size = {-(cache_size // 1024)}")  # KiB
+    return con
+
+
+def execute_query(con: Connection, query: str) -> List[Tuple]:
+    """Execute a single query on the database and return the result as a list of tuples.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
     query : str
         The SQL query to execute.
 
@@ -20,22 +147,93 @@ def execute_query(con: sqlite3.Connection, query: str) -> List[Tuple]:
         A list of tuples representing the result of the query.
 
     """
+    if get_backend(con) == "duckdb":
+        # DuckDB commits each statement itself, its context manager closes the connection
+        return con.execute(query).fetchall()
+
     # https://docs.python.org/3/library/sqlite3.html#sqlite3-connection-context-manager
     with con:
         result = con.execute(query).fetchall()
     return result
 
 
-def execute_script(con: sqlite3.Connection, script: str) -> None:
+def execute_script(con: Connection, script: str) -> None:
     """Execute multiple SQL statements as a script on the database.
 
     Parameters
     ----------
-    con : sqlite3.Connection
-        The SQLite database connection object.
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
     script : str
         The SQL script to execute.
 
     """
+    if get_backend(con) == "duckdb":
+        con.execute("BEGIN TRANSACTION")
+        try:
+            con.execute(script)
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        return
+
     with con:
         con.executescript(script)
+
+
+def execute_many(con: Connection, statement: str, rows: List[Tuple]) -> None:
+    """Execute a parametrized SQL statement once for each row of parameters.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
+    statement : str
+        The SQL statement with ``?`` placeholders for the parameters.
+    rows : List[Tuple]
+        The parameters of each execution.
+
+    """
+    if not rows:
+        return
+    if get_backend(con) == "duckdb":
+        con.execute("BEGIN TRANSACTION")
+        try:
+            con.executemany(statement, rows)
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        return
+
+    with con:
+        con.executemany(statement, rows)
+
+
+def get_index_statements(table_name: str) -> List[str]:
+    """Get the statements that create the planned secondary indexes of a table.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of a base table like "comments" or a derived table like
+        "filter1_counts".
+
+    Returns
+    -------
+    statements : List[str]
+        A list of CREATE INDEX statements, see ``INDEX_PLAN``.
+        It is empty if no indexes are planned for the table.
+
+    """
+    statements = []
+    for pattern, indexes in INDEX_PLAN.items():
+        if re.fullmatch(pattern, table_name):
+            for columns, unique in indexes:
+                index_name = f"idx_{table_name}_{'_'.join(columns)}"
+                statements.append(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+                    f"{index_name} ON {table_name} ({', '.join(columns)});"
+                )
+    return statements
@@ -0,0 +1,304 @@
+"""Module for calculating engagement scores in memory with NumPy.
+
+The counts of a filter are loaded once into a matrix with one row per user and one
+column per activity. Engagement scores for one or many sets of variables are then
+calculated with a single matrix product instead of one SQL script per set of
+variables, which makes it cheap to compare many weightings.
+
+"""
+
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from . import utils
+from .derive import DEFAULT_VARIABLES
+from .load import DATATYPE_MAP, DUCKDB_DATATYPE_MAP
+
+
+# Activities in the order of create_engagement_score_table.sql, each with the name
+# of its variable and the name of its column in the counts table
+REACTION_TYPES = [
+    "upvote",
+    "downvote",
+    "anger",
+    "celebrate",
+    "clap",
+    "curious",
+    "genius",
+    "happy",
+    "hot",
+    "laugh",
+    "love",
+    "sad",
+]
+ACTIVITIES = [
+    ("proposals_created", "num_created_proposals"),
+    ("ratings_created", "num_created_ratings"),
+    ("ratings_received", "num_received_ratings"),
+    ("comments_created", "num_created_comments"),
+    ("comments_received", "num_received_comments"),
+    *[(f"{t}_reactions_created", f"num_created_{t}_reactions") for t in REACTION_TYPES],
+    *[
+        (f"{t}_reactions_received", f"num_received_{t}_reactions")
+        for t in REACTION_TYPES
+    ],
+]
+FRACTION_VARIABLE = "fraction_of_engagement_scores_for_highly_rated_proposals"
+
+
+class Counts(NamedTuple):
+    """Counts of each user activity of a filter as arrays.
+
+    Attributes
+    ----------
+    user_ids : List
+        The user IDs in the order of the rows.
+    counts : numpy.ndarray
+        An integer matrix with one row per user and one column per activity of
+        ``ACTIVITIES``.
+    weight_received_ratings : numpy.ndarray
+        The weight of the ratings received by each user, NaN where it is NULL.
+
+    """
+
+    user_ids: List
+    counts: np.ndarray
+    weight_received_ratings: np.ndarray
+
+
+def load_counts(con: utils.Connection, filter_id: int) -> Counts:
+    """Load the counts table of a filter into memory.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
+    filter_id : int
+        The ID of the filter whose counts table was created by
+        :func:`create_counts_table`.
+
+    Returns
+    -------
+    counts : Counts
+        The user IDs, the matrix of counts and the weights of received ratings.
+
+    """
+    columns = ", ".join(column for _, column in ACTIVITIES)
+    query = (
+        f"SELECT user_id, weight_received_ratings, {columns} "
+        f"FROM filter{filter_id}_counts;"
+    )
+    rows = utils.execute_query(con, query)
+    user_ids = [row[0] for row in rows]
+    weight_received_ratings = np.array(
+        [np.nan if row[1] is None else row[1] for row in rows], dtype=np.float64
+    )
+    counts = np.array([row[2:] for row in rows], dtype=np.int64)
+    return Counts(
+        user_ids, counts.reshape(len(rows), len(ACTIVITIES)), weight_received_ratings
+    )
+
+
+def variables_to_weights(
+    variables: Union[Dict[str, Any], List[Dict[str, Any]]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert one or many sets of variables into arrays.
+
+    Parameters
+    ----------
+    variables : Dict[str, Any] or List[Dict[str, Any]]
+        One or many sets of variables with the same names as ``DEFAULT_VARIABLES``.
+
+    Returns
+    -------
+    weights : numpy.ndarray
+        A matrix with one row per set of variables and one column per activity of
+        ``ACTIVITIES``.
+    fractions : numpy.ndarray
+        The fraction of engagement scores for highly rated proposals of each set.
+
+    Raises
+    ------
+    ValueError
+        If a set of variables lacks one of the names.
+
+    """
+    if isinstance(variables, dict):
+        variables = [variables]
+    for item in variables:
+        missing = [name for name in DEFAULT_VARIABLES if name not in item]
+        if missing:
+            raise ValueError(f"Variables are missing: {', '.join(missing)}")
+    weights = np.array(
+        [[item[name] for name, _ in ACTIVITIES] for item in variables],
+        dtype=np.float64,
+    )
+    fractions = np.array(
+        [item[FRACTION_VARIABLE] for item in variables], dtype=np.float64
+    )
+    return weights.reshape(len(variables), len(ACTIVITIES)), fractions
+
+
+def compute_engagement_scores(
+    counts: Counts,
+    variables: Union[Dict[str, Any], List[Dict[str, Any]], None] = None,
+    as_dataframe: bool = False,
+) -> Any:
+    """Calculate engagement scores for one or many sets of variables.
+
+    The result is the same as that of :func:`create_engagement_score_table`:
+    the points for activities are the counts multiplied by their variables, and the
+    weights of received ratings are scaled so that they make up the given fraction
+    of the sum of all engagement scores. Where SQL yields NULL, e.g. for a fraction
+    of 1, the result is NaN.
+
+    Parameters
+    ----------
+    counts : Counts
+        The counts of a filter, see :func:`load_counts`.
+    variables : Dict[str, Any] or List[Dict[str, Any]], optional
+        One set of variables, or a list of sets that are all calculated at once.
+        If None, ``DEFAULT_VARIABLES`` are used.
+    as_dataframe : bool, optional, default=False
+        If True, a pandas DataFrame indexed by user ID is returned instead of an
+        array.
+
+    Returns
+    -------
+    engagement_scores : numpy.ndarray or pandas.DataFrame
+        For one set of variables, an array with one score per user or a DataFrame
+        with the column "engagement_score". For a list of sets, a matrix with one
+        row per user and one column per set, or a DataFrame with the columns
+        numbered like the sets.
+
+    """
+    # Argument processing
+    if variables is None:
+        variables = DEFAULT_VARIABLES
+    single = isinstance(variables, dict)
+    weights, fractions = variables_to_weights(variables)
+
+    # Points for activities of each user and set of variables
+    pts_for_activities = counts.counts.astype(np.float64) @ weights.T
+
+    # Scale the points received for proposal ratings, so they become a
+    # user-specified fraction of the total points
+    scale = _scale_received_ratings(
+        fractions, pts_for_activities.sum(axis=0), counts.weight_received_ratings
+    )
+    scores = pts_for_activities + counts.weight_received_ratings[:, None] * scale
+
+    if single:
+        scores = scores[:, 0]
+    if not as_dataframe:
+        return scores
+
+    import pandas as pd
+
+    index = pd.Index(counts.user_ids, name="user_id")
+    if single:
+        return pd.DataFrame({"engagement_score": scores}, index=index)
+    return pd.DataFrame(scores, index=index)
+
+
+def _scale_received_ratings(
+    fractions: np.ndarray,
+    sums_of_pts_for_activities: np.ndarray,
+    weight_received_ratings: np.ndarray,
+) -> np.ndarray:
+    """Calculate the factors for the weights of received ratings of each set of variables.
+
+    The order of operations is the same as in SQL, and NaN stands for NULL, which
+    SQL yields for a division by zero and for the sum of only NULL values.
+
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = fractions / (1.0 - fractions) * sums_of_pts_for_activities
+        scale = scale / np.nansum(weight_received_ratings)
+    return np.where(np.isfinite(scale), scale, np.nan)
+
+
+def store_engagement_scores(
+    con: utils.Connection,
+    counts: Counts,
+    filter_id: int,
+    variables_id: int,
+    variables: Dict[str, Any] = None,
+) -> None:
+    """Store the engagement scores of one set of variables as a database table.
+
+    The table has the same name, columns and values as one created by
+    :func:`create_engagement_score_table`, so that the rewards can be derived from
+    it as usual.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection or duckdb.DuckDBPyConnection
+        The database connection object.
+    counts : Counts
+        The counts of the filter, see :func:`load_counts`.
+    filter_id : int
+        The ID of the filter the counts belong to.
+    variables_id : int
+        The ID of the variables to use for the table name.
+    variables : Dict[str, Any], optional
+        The variables to calculate the engagement scores with.
+        If None, ``DEFAULT_VARIABLES`` are used.
+
+    """
+    # Argument processing
+    if variables is None:
+        variables = DEFAULT_VARIABLES
+    variables_to_weights(variables)
+    table_name = f"filter{filter_id}_var{variables_id}_scores"
+
+    # Points per activity keep integers where SQL does, and are summed in its order
+    columns = {}
+    for j, (name, _) in enumerate(ACTIVITIES):
+        columns[f"pts_{name}"] = counts.counts[:, j] * variables[name]
+    for kind in ["created", "received"]:
+        total = columns[f"pts_{REACTION_TYPES[0]}_reactions_{kind}"]
+        for reaction_type in REACTION_TYPES[1:]:
+            total = total + columns[f"pts_{reaction_type}_reactions_{kind}"]
+        columns[f"pts_total_reactions_{kind}"] = total
+    pts_for_activities = columns["pts_proposals_created"]
+    for name in [
+        "pts_ratings_created",
+        "pts_ratings_received",
+        "pts_comments_created",
+        "pts_comments_received",
+        "pts_total_reactions_created",
+        "pts_total_reactions_received",
+    ]:
+        pts_for_activities = pts_for_activities + columns[name]
+    columns["pts_for_activities"] = pts_for_activities
+    scale = _scale_received_ratings(
+        np.array([variables[FRACTION_VARIABLE]], dtype=np.float64),
+        np.array([pts_for_activities.sum()], dtype=np.float64),
+        counts.weight_received_ratings,
+    )
+    columns["pts_for_ratings_received"] = counts.weight_received_ratings * scale[0]
+    columns["engagement_score"] = (
+        pts_for_activities + columns["pts_for_ratings_received"]
+    )
+
+    # Create the table, NaN is stored as NULL
+    backend = utils.get_backend(con)
+    datatype_map = DATATYPE_MAP if backend == "sqlite" else DUCKDB_DATATYPE_MAP
+    user_id_type = "int" if all(isinstance(x, int) for x in counts.user_ids) else "str"
+    column_definition = [f"user_id {datatype_map[user_id_type]}"] + [
+        f"{name} {datatype_map['int' if values.dtype.kind == 'i' else 'float']}"
+        for name, values in columns.items()
+    ]
+    script = f"CREATE TABLE {table_name} ({', '.join(column_definition)});"
+    if backend == "sqlite":
+        script += "\n" + "\n".join(utils.get_index_statements(table_name))
+    utils.execute_script(con, script)
+    values = [counts.user_ids] + [
+        [None if x != x else x for x in array.tolist()] for array in columns.values()
+    ]
+    placeholders = ", ".join("?" * len(values))
+    utils.execute_many(
+        con, f"INSERT INTO {table_name} VALUES ({placeholders})", list(zip(*values))
+    )
@@ -111,6 +111,12 @@ setup(
         "pandas>=2",
         "pyexcelerate>=0.10",
     ],
+    # Optional dependencies that are installed with e.g. pip install .[parquet]
+    extras_require={
+        "duckdb": ["duckdb>=1.0"],
+        "parquet": ["pyarrow>=12"],
+        "zstd": ["zstandard>=0.21"],
+    },
     # Capability of running in compressed form
     zip_safe=False,
 )
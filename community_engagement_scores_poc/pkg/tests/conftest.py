@@ -0,0 +1,12 @@
+import os
+
+import pytest
+from synthetic import create_synthetic_export
+
+
+@pytest.fixture(scope="session")
+def synthetic_zip(tmp_path_factory):
+    """Path of a small synthetic Swae export that is shared by all tests."""
+    dirpath = tmp_path_factory.mktemp("synthetic")
+    filepath = os.path.join(dirpath, "synthetic.zip")
+    return create_synthetic_export(filepath)
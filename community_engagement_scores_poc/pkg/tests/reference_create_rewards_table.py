@@ -0,0 +1,120 @@
+"""Row-wise reference implementation of the calculation of rewards.
+
+This is a frozen copy of the original ``create_rewards_table`` for SQLite, which
+registered the reward formulas as SQL functions that call ``eval`` on the formula
+for every row. It is only used to check that the compiled formulas in
+``ces.swae_analysis`` produce identical rewards and to measure the speedup.
+
+"""
+
+import os
+import sqlite3
+from typing import List, Union
+
+import numpy as np
+
+from ces.swae_analysis import utils
+
+
+def create_rewards_table(
+    con: sqlite3.Connection,
+    filter_id: int,
+    variables_id: int,
+    distribution_id: int,
+    filtered_user_ids: Union[List[str], None] = None,
+    function_agix_reward: str = "x",
+    function_voting_weight: str = "x",
+    threshold_percentile: float = 20.0,
+    total_agix_reward: float = 100_000.0,
+    min_voting_weight: float = 1.0,
+    max_voting_weight: float = 5.0,
+) -> None:
+    """Create a table with rewards based on engagement scores and provided functions."""
+    # Argument processing
+    table_name_engagement_scores = f"filter{filter_id}_var{variables_id}_scores"
+    table_name_rewards = (
+        f"filter{filter_id}_var{variables_id}_dist{distribution_id}_rewards"
+    )
+
+    # Filtered users as string literals, NULL matches no user if there are none
+    filtered_user_ids = ", ".join(
+        "'{}'".format(uid.replace("'", "''")) for uid in filtered_user_ids or []
+    )
+    filtered_user_ids = filtered_user_ids or "NULL"
+
+    # Threshold calculation by percentile
+    query = (
+        f"SELECT engagement_score FROM {table_name_engagement_scores} "
+        "WHERE engagement_score > 0.0;"
+    )
+    engagement_scores = [row[0] for row in con.execute(query).fetchall()]
+    threshold_value = np.percentile(engagement_scores, threshold_percentile)
+
+    # Distribution calculation by provided functions
+    math_functions = dict(
+        abs=np.abs,
+        ceil=np.ceil,
+        floor=np.floor,
+        mod=np.mod,
+        sqrt=np.sqrt,
+        cbrt=np.cbrt,
+        sin=np.sin,
+        cos=np.cos,
+        tan=np.tan,
+        arcsin=np.arcsin,
+        arccos=np.arccos,
+        arctan=np.arctan,
+        cosh=np.cosh,
+        sinh=np.sinh,
+        tanh=np.tanh,
+        arcsinh=np.arcsinh,
+        arccosh=np.arccosh,
+        arctanh=np.arctanh,
+        exp=np.exp,
+        e=np.exp,
+        ln=np.log,
+        log=np.log,
+        log2=np.log2,
+        log10=np.log10,
+    )
+
+    def calc_agix_distribution(x):
+        try:
+            x = float(x)
+            scope = math_functions.copy()
+            scope["x"] = x
+            y = eval(function_agix_reward, scope)
+        except Exception:
+            y = 0.0
+        return y
+
+    def calc_vw_distribution(x):
+        try:
+            x = float(x)
+            scope = math_functions.copy()
+            scope["x"] = x
+            y = eval(function_voting_weight, scope)
+        except Exception:
+            y = 0.0
+        return y
+
+    con.create_function("calc_agix_distribution", 1, calc_agix_distribution)
+    con.create_function("calc_vw_distribution", 1, calc_vw_distribution)
+
+    # Create table with rewards
+    script_filepath = os.path.join(
+        os.path.dirname(__file__), "reference_create_rewards_table.sql"
+    )
+    with open(script_filepath) as f:
+        script_template = f.read()
+    script = script_template.format(
+        table_name_engagement_scores=table_name_engagement_scores,
+        table_name_rewards=table_name_rewards,
+        create_indexes="\n".join(utils.get_index_statements(table_name_rewards)),
+        filtered_user_ids=filtered_user_ids,
+        threshold_value=threshold_value,
+        total_agix_reward=total_agix_reward,
+        min_voting_weight=min_voting_weight,
+        max_voting_weight=max_voting_weight,
+    )
+    con.executescript(script)
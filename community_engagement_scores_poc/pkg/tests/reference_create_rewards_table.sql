@@ -1,3 +1,9 @@
+-- Reference implementation of create_rewards_table.sql with row-wise Python functions.
+--
+-- This is a frozen copy of the original script, which called the functions
+-- calc_agix_distribution and calc_vw_distribution once per row. It is only used by
+-- reference_create_rewards_table.py.
+
 CREATE TABLE {table_name_rewards} AS
 SELECT
     user_id,
@@ -16,12 +22,15 @@ SELECT
 FROM {table_name_engagement_scores}
 JOIN users USING (user_id);
 
+-- Index for the updates by user_id
+{create_indexes}
+
 
 -- Rank
 WITH ranked_users AS (
     SELECT
         user_id,
-        ROW_NUMBER() OVER (ORDER BY engagement_score DESC) AS rank
+        ROW_NUMBER() OVER (ORDER BY engagement_score DESC, user_id DESC) AS rank
     FROM {table_name_rewards}
 )
 UPDATE {table_name_rewards}
@@ -33,9 +42,9 @@ SET rank = ranked_users.rank
 -- Eligibility
 UPDATE {table_name_rewards}
 SET eligibility = CASE
-    WHEN user_id in ({filtered_user_ids}) THEN "filtered user"
-    WHEN engagement_score < {threshold_value} THEN "below score threshold"
-    ELSE "yes"
+    WHEN user_id in ({filtered_user_ids}) THEN 'filtered user'
+    WHEN engagement_score < {threshold_value} THEN 'below score threshold'
+    ELSE 'yes'
 END;
 
 
@@ -45,7 +54,7 @@ WITH number_assignment AS (
         user_id,
         ROW_NUMBER() OVER (ORDER BY rank DESC) AS x
     FROM {table_name_rewards}
-    WHERE eligibility = "yes"
+    WHERE eligibility = 'yes'
 )
 UPDATE {table_name_rewards}
 SET x = number_assignment.x
@@ -0,0 +1,249 @@
+"""Generator of synthetic Swae data exports for tests and benchmarks.
+
+The generated ZIP file mimics the structure of a real data export from Swae:
+nine JSON files inside a subdirectory, each value wrapped in a DynamoDB-style
+type descriptor such as ``{"S": "text"}`` or ``{"N": "42"}``.
+
+"""
+
+import json
+import os
+import random
+import zipfile
+
+
+REACTION_TYPES = [
+    "anger",
+    "celebrate",
+    "clap",
+    "curious",
+    "genius",
+    "happy",
+    "hot",
+    "laugh",
+    "love",
+    "sad",
+]
+
+DAY_IN_MS = 24 * 60 * 60 * 1000
+START_TIMESTAMP = 1_660_000_000_000
+
+
+def _s(value):
+    return {"S": str(value)}
+
+
+def _n(value):
+    return {"N": str(value)}
+
+
+def _b(value):
+    return {"BOOL": bool(value)}
+
+
+def create_synthetic_data(
+    num_users=60,
+    num_missions=6,
+    num_proposals_per_mission=5,
+    num_ratings_per_proposal=4,
+    num_comments_per_proposal=6,
+    num_reactions_per_comment=3,
+    num_votes_per_comment=2,
+    num_views_per_proposal=8,
+    seed=42,
+):
+    """Create the content of the nine JSON files of a Swae export."""
+    rng = random.Random(seed)
+
+    # Users: a mix of email and Ethereum addresses as user names
+    user_ids = []
+    users = []
+    for i in range(num_users):
+        if i % 3 == 0:
+            user_id = f"0x{i:040x}"
+        else:
+            user_id = f"user{i}@example.org"
+        user_ids.append(user_id)
+        users.append(
+            {
+                "userName": _s(user_id),
+                "firstName": _s(f"First{i}"),
+                "lastName": _s(f"Last{i}"),
+                "additionalWalletAddress": _s(f"addr1q{i:050d}"),
+                "myBio": _s(f"Bio of user {i}"),
+                "timeZone": _s("UTC"),
+                "signStatus": _b(True),
+                "contributionStatus": _b(i % 2),
+                "lastSeenAt": _n(START_TIMESTAMP + i * 1000),
+                "createdAt": _n(START_TIMESTAMP - DAY_IN_MS + i * 1000),
+                "voteCount": _n(i % 7),
+                "deleted": _b(i % 29 == 28),
+            }
+        )
+
+    # Missions: two funding rounds with several pools each
+    missions = []
+    for m in range(num_missions):
+        round_number = 1 if m < num_missions // 2 else 2
+        start = START_TIMESTAMP + (round_number - 1) * 40 * DAY_IN_MS + m * DAY_IN_MS
+        missions.append(
+            {
+                "challengeId": _s(f"mission-{m:04d}"),
+                "createdBy": _s(user_ids[m % num_users]),
+                "title": _s(f"Round {round_number} - Pool {m}"),
+                "description": _s(f"<p>Description of mission {m} &amp; more</p>"),
+                "createdAt": _n(start - DAY_IN_MS),
+                "startDate": _n(start),
+                "expiryDate": _n(start + 20 * DAY_IN_MS),
+                "totalUniqueViewCount": _n(rng.randint(0, 500)),
+                "publicChallenge": _b(True),
+                "state": _s("Created"),
+                "deleted": _b(False),
+            }
+        )
+
+    proposals = []
+    ratings_by_proposal = {}
+    comments_by_proposal = {}
+    reactions_by_comment_by_type = {}
+    upvotes_by_comment = {}
+    downvotes_by_comment = {}
+    views_by_proposal = {}
+    for m, mission in enumerate(missions):
+        mission_id = mission["challengeId"]["S"]
+        start = int(mission["startDate"]["N"])
+        for p in range(num_proposals_per_mission):
+            proposal_id = f"proposal-{m:04d}-{p:04d}"
+            author = rng.choice(user_ids)
+            created = start + rng.randint(0, 10 * DAY_IN_MS)
+            rating_values = [rng.randint(1, 5) for _ in range(num_ratings_per_proposal)]
+            value_counts = {}
+            for v in rating_values:
+                value_counts[str(v)] = value_counts.get(str(v), 0) + 1
+            proposals.append(
+                {
+                    "documentId": _s(proposal_id),
+                    "challengeId": _s(mission_id),
+                    "createdBy": _s(author),
+                    "title": _s(f"Proposal {m}-{p}"),
+                    "summary": _s(f"<p>Summary of proposal {m}-{p}</p>"),
+                    "state": _s("Published"),
+                    "isAnonymous": _b(False),
+                    "rejectedBy": _s("reviewer" if p % 11 == 10 else ""),
+                    "timeSpentCreate": _n(rng.randint(0, 10_000)),
+                    "votesArr": {"M": {k: _n(v) for k, v in value_counts.items()}},
+                    "averageVoteRating": _n(
+                        sum(rating_values) / max(len(rating_values), 1)
+                    ),
+                    "createdAt": _n(created),
+                    "publishedAt": _n(created + 1000),
+                    "files": {"L": [_s("file.pdf")] * (p % 3)},
+                    "totalUniqueViewCount": _n(num_views_per_proposal),
+                    "totalVoteCount": _n(len(rating_values)),
+                    "totalCommentCount": _n(num_comments_per_proposal),
+                    "deleted": _b(p % 13 == 12),
+                }
+            )
+
+            # Ratings
+            ratings_by_proposal[proposal_id] = [
+                {
+                    "voteId": _s(f"rating-{m:04d}-{p:04d}-{r:04d}"),
+                    "documentId": _s(proposal_id),
+                    "userName": _s(rng.choice(user_ids)),
+                    "rating": _n(value),
+                    "isAnonymous": _b(False),
+                    "enable": _b(True),
+                    "createdAt": _n(created + rng.randint(1, 5 * DAY_IN_MS)),
+                }
+                for r, value in enumerate(rating_values)
+            ]
+
+            # Comments and reactions to them
+            comments = []
+            for c in range(num_comments_per_proposal):
+                comment_id = f"comment-{m:04d}-{p:04d}-{c:04d}"
+                comment_created = created + rng.randint(1, 8 * DAY_IN_MS)
+                parent = comments[-1]["commentId"]["S"] if c % 4 == 3 else ""
+                comments.append(
+                    {
+                        "commentId": _s(comment_id),
+                        "documentId": _s(proposal_id),
+                        "createdBy": _s(rng.choice(user_ids)),
+                        "parentCommentId": _s(parent),
+                        "commentText": _s(f"<p>Comment {c} &lt;3</p>"),
+                        "commentEmotion": _s(rng.choice(["neutral", "positive"])),
+                        "commentLevel": _n(1 if parent else 0),
+                        "timeSpent": _n(rng.randint(0, 1000)),
+                        "isAnonymous": _b(False),
+                        "flagged": _b(False),
+                        "createdAt": _n(comment_created),
+                        "totalReplyCount": _n(0),
+                        "deleted": _b(c % 17 == 16),
+                    }
+                )
+
+                reactions_by_type = {}
+                for _ in range(num_reactions_per_comment):
+                    reaction_type = rng.choice(REACTION_TYPES)
+                    reactions_by_type.setdefault(reaction_type, []).append(
+                        {
+                            "commentId": _s(comment_id),
+                            "userName": _s(rng.choice(user_ids)),
+                            "reactionType": _s(reaction_type),
+                            "createdAt": _n(
+                                comment_created + rng.randint(1, DAY_IN_MS)
+                            ),
+                        }
+                    )
+                if c % 5 == 4:
+                    reactions_by_type["love"] = []
+                reactions_by_comment_by_type[comment_id] = reactions_by_type
+
+                votes = [
+                    {
+                        "commentId": _s(comment_id),
+                        "userName": _s(rng.choice(user_ids)),
+                        "createdAt": _n(comment_created + rng.randint(1, DAY_IN_MS)),
+                    }
+                    for _ in range(num_votes_per_comment)
+                ]
+                half = len(votes) // 2 + len(votes) % 2
+                upvotes_by_comment[comment_id] = votes[:half]
+                downvotes_by_comment[comment_id] = votes[half:]
+            comments_by_proposal[proposal_id] = comments
+
+            # Views
+            views_by_proposal[proposal_id] = [
+                {"id": _s(proposal_id), "userName": _s(user_id)}
+                for user_id in rng.sample(user_ids, num_views_per_proposal)
+            ]
+
+    data = {
+        "missions.json": missions,
+        "proposals.json": proposals,
+        "users.json": users,
+        "votesByProposalId.json": ratings_by_proposal,
+        "commentsByProposalId.json": comments_by_proposal,
+        "reactionsByCommentIdByType.json": reactions_by_comment_by_type,
+        "upvotesByCommentId.json": upvotes_by_comment,
+        "downvotesByCommentId.json": downvotes_by_comment,
+        "viewsByProposalId.json": views_by_proposal,
+    }
+    return data
+
+
+def create_synthetic_export(filepath, subdir="swae_export", **kwargs):
+    """Write a synthetic Swae export as ZIP file and return its path.
+
+    Keyword arguments are passed on to :func:`create_synthetic_data`.
+
+    """
+    data = create_synthetic_data(**kwargs)
+    dirpath = os.path.dirname(filepath)
+    if dirpath:
+        os.makedirs(dirpath, exist_ok=True)
+    with zipfile.ZipFile(filepath, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for filename, content in data.items():
+            zf.writestr(f"{subdir}/{filename}", json.dumps(content))
+    return filepath
@@ -1,6 +1,10 @@
+import gzip
+import json
 import os
 
+import numpy as np
 import pandas as pd
+import pytest
 
 from ces import swae_analysis as swa
 
@@ -154,3 +158,1082 @@ def test_equality_between_manual_and_automatic_score_calculation_on_deep_funding
 
     # Compare the results
     assert df1.shape != df2.shape
+
+
+def test_zip_to_sqlite_with_cache(synthetic_zip, tmpdir):
+    cache_dirpath = os.path.join(tmpdir, "cache")
+
+    def table_counts(con):
+        tables = ["users", "missions", "proposals", "comments", "reactions", "views"]
+        return [con.execute(f"SELECT COUNT(*) FROM {t}").fetchone() for t in tables]
+
+    # Miss: ETL is executed and its result is stored
+    con = swa.zip_to_sqlite(synthetic_zip, cache_dirpath=cache_dirpath)
+    expected = table_counts(con)
+    con.close()
+    stats = swa.get_cache_stats(cache_dirpath)
+    assert (stats["hits"], stats["misses"], stats["num_entries"]) == (0, 1, 1)
+
+    # Hit: each restore method delivers the same database
+    for i, how in enumerate(["copy", "link", "backup"]):
+        filepath = os.path.join(tmpdir, f"db_{how}.sqlite")
+        con = swa.zip_to_sqlite(
+            synthetic_zip, filepath, cache_dirpath=cache_dirpath, cache_restore=how
+        )
+        assert table_counts(con) == expected
+        con.close()
+    con = swa.zip_to_sqlite(synthetic_zip, cache_dirpath=cache_dirpath)
+    assert table_counts(con) == expected
+    con.close()
+    stats = swa.get_cache_stats(cache_dirpath)
+    assert (stats["hits"], stats["misses"]) == (4, 1)
+
+    # Different options are a different entry
+    con = swa.zip_to_sqlite(
+        synthetic_zip, filters_on=False, cache_dirpath=cache_dirpath
+    )
+    con.close()
+    entries = swa.list_cache_entries(cache_dirpath)
+    assert len(entries) == 2
+    assert entries[0]["description"]["filters_on"] is False
+
+    # Purge
+    assert swa.purge_cache(cache_dirpath, entries[0]["key"]) == 1
+    assert swa.purge_cache(cache_dirpath) == 1
+    assert swa.get_cache_stats(cache_dirpath)["num_entries"] == 0
+
+
+def test_update_sqlite(synthetic_zip, tmpdir):
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    def table_contents(con, tables):
+        return {t: sorted(con.execute(f"SELECT * FROM {t}").fetchall()) for t in tables}
+
+    tabular_data = transform_swae_data(extract_swae_data(synthetic_zip))
+    con = swa.load_sqlite(tabular_data)
+    swa.create_filter_views(con, 1, ["mission-0000"])
+    swa.create_counts_table(con, 1)
+    swa.create_filter_views(con, 2, ["mission-0005"])
+    swa.create_counts_table(con, 2)
+
+    # Views only: no derived table becomes stale
+    rows, columns, datatypes = tabular_data["views"]
+    new_row = list(rows[0])
+    new_row[0] = "new-view"
+    tabular_data["views"] = (rows + [new_row], columns, datatypes)
+    changes = swa.update_sqlite(con, {"views": tabular_data["views"]})
+    assert changes == {"views": {"inserted": 1, "updated": 0, "deleted": 0}}
+    assert swa.get_stale_tables(con) == []
+
+    # Comments and reactions of the first mission change
+    rows, columns, datatypes = tabular_data["comments"]
+    kept = [row for row in rows if not row[0].startswith("comment-0000-0000-")]
+    tabular_data["comments"] = (kept, columns, datatypes)
+    rows, columns, datatypes = tabular_data["reactions"]
+    idx = [i for i, row in enumerate(rows) if "comment-0000-0001-" in str(row)][0]
+    rows[idx] = list(rows[idx])
+    rows[idx][columns.index("reaction_type")] = "changed"
+    changes = swa.update_sqlite(con, tabular_data)
+    assert changes["comments"] == {"inserted": 0, "updated": 0, "deleted": 6}
+    assert changes["reactions"] == {"inserted": 0, "updated": 1, "deleted": 0}
+    assert changes["users"] == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert [name for name, _ in swa.get_stale_tables(con)] == ["filter1_counts"]
+
+    # The table of stale tables is only exported on request
+    for include_bookkeeping in [False, True]:
+        dirpath = os.path.join(tmpdir, str(include_bookkeeping))
+        swa.sqlite_to_csv(
+            con, dirpath, include="stale_*", include_bookkeeping=include_bookkeeping
+        )
+        expected = ["stale_tables.csv"] if include_bookkeeping else []
+        assert os.listdir(dirpath) == expected
+
+    # The result equals a database that is loaded from scratch
+    expected = swa.load_sqlite(tabular_data)
+    assert table_contents(con, tabular_data) == table_contents(expected, tabular_data)
+
+    # Changed columns are rejected
+    rows, columns, datatypes = tabular_data["views"]
+    with pytest.raises(ValueError):
+        swa.update_sqlite(con, {"views": (rows, columns[:-1], datatypes[:-1])})
+
+
+def test_int64_ids(synthetic_zip, tmpdir):
+    # desired functionality: same database content except the type of derived IDs
+    con_hex = swa.zip_to_sqlite(synthetic_zip)
+    con_int = swa.zip_to_sqlite(synthetic_zip, id_format="int64")
+    for table, key in [("reactions", "reaction_id"), ("views", "view_id")]:
+        query = f"SELECT typeof({key}), COUNT(DISTINCT {key}) FROM {table} GROUP BY 1"
+        (type_hex, num_hex), (type_int, num_int) = [
+            con.execute(query).fetchone() for con in (con_hex, con_int)
+        ]
+        assert (type_hex, type_int) == ("text", "integer")
+        assert num_hex == num_int
+    query = "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='views'"
+    assert con_hex.execute(query).fetchall() == [("idx_views_view_id",)]
+    assert con_int.execute(query).fetchall() == []
+
+    for con in (con_hex, con_int):
+        swa.create_filter_views(con, 1, ["mission-0000", "mission-0001"])
+        swa.create_counts_table(con, 1)
+    query = "SELECT * FROM filter1_counts ORDER BY user_id"
+    assert con_hex.execute(query).fetchall() == con_int.execute(query).fetchall()
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.zip_to_sqlite(synthetic_zip, id_format="nonexistent_format")
+
+
+def test_virtual_datetime_columns(synthetic_zip, tmpdir, monkeypatch):
+    import time
+
+    # Stored and virtual datetimes are both in UTC, whatever the local time zone
+    monkeypatch.setenv("TZ", "Australia/Lord_Howe")
+    time.tzset()
+    try:
+        filepaths = {}
+        cons = {}
+        for how in ["stored", "virtual"]:
+            filepaths[how] = os.path.join(tmpdir, f"{how}.sqlite")
+            cons[how] = swa.zip_to_sqlite(
+                synthetic_zip, filepaths[how], datetime_columns=how
+            )
+        cons["streaming"] = swa.zip_to_sqlite(
+            synthetic_zip, datetime_columns="virtual", streaming=True
+        )
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    # desired functionality: the transformation leaves out virtual datetime columns
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    swae_data = extract_swae_data(synthetic_zip)
+    tabular_data = transform_swae_data(swae_data, datetime_columns="virtual")
+    for rows, columns, datatypes in tabular_data.values():
+        assert not any(col.endswith("_datetime") for col in columns)
+    cons["transformed"] = swa.load_sqlite(
+        transform_swae_data(swae_data), datetime_columns="virtual"
+    )
+
+    # desired functionality: same content but less storage, also when the datetime
+    # strings of a stored transformation are skipped
+    for table in ["users", "missions", "proposals", "comments", "reactions"]:
+        query = f"SELECT * FROM {table} ORDER BY 1"
+        expected = cons["stored"].execute(query).fetchall()
+        for how in ["virtual", "streaming", "transformed"]:
+            assert cons[how].execute(query).fetchall() == expected, how
+    assert os.path.getsize(filepaths["virtual"]) < os.path.getsize(filepaths["stored"])
+
+    # desired functionality: exports contain the datetimes
+    for how in ["stored", "virtual"]:
+        swa.sqlite_to_csv(cons[how], os.path.join(tmpdir, how))
+    for table in ["missions", "reactions"]:
+        contents = []
+        for how in ["stored", "virtual"]:
+            with open(os.path.join(tmpdir, how, f"{table}.csv")) as f:
+                contents.append(f.read())
+        assert contents[0] == contents[1]
+        assert "creation_datetime" in contents[0]
+
+    # desired functionality: delta import skips or leaves out virtual columns
+    for shift, how in [(1000, "stored"), (2000, "virtual")]:
+        tabular_data = transform_swae_data(swae_data, datetime_columns=how)
+        rows, columns, datatypes = tabular_data["missions"]
+        rows[0][columns.index("creation_timestamp")] += shift
+        changes = swa.update_sqlite(
+            cons["virtual"], {"missions": tabular_data["missions"]}
+        )
+        expected = {"inserted": 0, "updated": 1, "deleted": 0}
+        assert changes["missions"] == expected
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        transform_swae_data(swae_data, datetime_columns="nonexistent")
+
+
+def test_zip_to_sqlite_streaming(synthetic_zip, tmpdir, monkeypatch):
+    from ces.swae_analysis import combine
+
+    # desired functionality: same database as without streaming, for any batch size
+    con = swa.zip_to_sqlite(synthetic_zip)
+    tables = con.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall()
+    monkeypatch.setattr(combine, "STREAMING_BATCH_SIZE", 7)
+    for memory_budget in [1, combine.STREAMING_MEMORY_BUDGET]:
+        filepath = os.path.join(tmpdir, f"streaming_{memory_budget}.sqlite")
+        con_streaming = swa.zip_to_sqlite(
+            synthetic_zip, filepath, streaming=True, memory_budget=memory_budget
+        )
+        query = "SELECT name, sql FROM sqlite_master ORDER BY name"
+        assert con_streaming.execute(query).fetchall() == tables
+        for table, _ in tables:
+            if table.startswith("idx_"):
+                continue
+            query = f"SELECT * FROM {table} ORDER BY 1"
+            expected = con.execute(query).fetchall()
+            assert con_streaming.execute(query).fetchall() == expected
+
+    # desired exceptions: errors of the background thread reach the caller
+    def failing_transform(records, entity, *args):
+        if entity == "comments":
+            raise ValueError("Transform failed")
+        return transform_swae_records(records, entity, *args)
+
+    transform_swae_records = combine.transform_swae_records
+    monkeypatch.setattr(combine, "transform_swae_records", failing_transform)
+    with pytest.raises(ValueError, match="Transform failed"):
+        swa.zip_to_sqlite(synthetic_zip, streaming=True)
+
+
+@pytest.mark.parametrize("build_in_memory", [False, True])
+def test_load_sqlite_fast(synthetic_zip, tmpdir, monkeypatch, build_in_memory):
+    import sqlite3
+
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    tabular_data = transform_swae_data(extract_swae_data(synthetic_zip))
+    con = swa.load_sqlite(tabular_data)
+    filepath = os.path.join(tmpdir, "fast.sqlite")
+
+    # desired functionality: same tables, indexes and rows, plus statistics
+    con_fast = swa.load_sqlite(
+        tabular_data, filepath, fast=True, build_in_memory=build_in_memory
+    )
+    query = "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+    assert sorted(con_fast.execute(query)) == sorted(con.execute(query))
+    for table in tabular_data:
+        query = f"SELECT * FROM {table} ORDER BY 1"
+        assert con_fast.execute(query).fetchall() == con.execute(query).fetchall()
+    assert con_fast.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    swa.sqlite_to_csv(con_fast, os.path.join(tmpdir, "csv"))
+    assert not os.path.exists(os.path.join(tmpdir, "csv", "sqlite_stat1.csv"))
+    con_fast.close()
+
+    # desired exceptions: a failed load leaves the existing file untouched
+    # and closes the connections to the database that was being built
+    connections = []
+
+    def connect(*args, **kwargs):
+        connections.append(connect_sqlite(*args, **kwargs))
+        return connections[-1]
+
+    connect_sqlite = sqlite3.connect
+    monkeypatch.setattr(sqlite3, "connect", connect)
+    rows, columns, datatypes = tabular_data["users"]
+    tabular_data["users"] = (rows + rows[:1], columns, datatypes)
+    for fast in [True, False]:
+        with pytest.raises(sqlite3.IntegrityError, match="UNIQUE"):
+            swa.load_sqlite(
+                tabular_data,
+                filepath if fast else os.path.join(tmpdir, "slow.sqlite"),
+                fast=fast,
+                build_in_memory=build_in_memory,
+            )
+    monkeypatch.undo()
+    assert len(connections) == 2
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+            connection.execute("SELECT 1")
+    assert sorted(os.listdir(tmpdir)) == ["csv", "fast.sqlite", "slow.sqlite"]
+    con_fast = sqlite3.connect(filepath)
+    query = "SELECT COUNT(*) FROM users"
+    assert con_fast.execute(query).fetchone() == con.execute(query).fetchone()
+
+
+def test_index_plan(synthetic_zip, monkeypatch):
+    import re
+    import sqlite3
+
+    from ces.swae_analysis import derive, utils
+
+    def iter_statements(script):
+        statement = ""
+        for line in script.splitlines(keepends=True):
+            if not line.lstrip().startswith("--"):
+                statement += line
+            if statement.strip() and sqlite3.complete_statement(statement):
+                yield statement.strip()
+                statement = ""
+
+    def execute_script_with_plans(con, script):
+        with con:
+            for statement in iter_statements(script):
+                if not statement.startswith(("CREATE INDEX", "CREATE UNIQUE", "DROP")):
+                    plan = con.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+                    plans.append((statement, [row[3] for row in plan]))
+                con.execute(statement)
+
+    con = swa.zip_to_sqlite(synthetic_zip)
+    mission_ids = [row[0] for row in swa.get_missions(con)][:2]
+    plans = []
+    monkeypatch.setattr(derive.utils, "execute_script", execute_script_with_plans)
+    swa.create_filter_views(con, 1, mission_ids)
+    for view in ["proposals", "ratings", "comments", "reactions"]:
+        query = f"EXPLAIN QUERY PLAN SELECT * FROM filter1_{view}"
+        plans.append((query, [row[3] for row in con.execute(query)]))
+    swa.create_counts_table(con, 1)
+    swa.create_engagement_score_table(con, 1, 1)
+    swa.create_rewards_table(con, 1, 1, 1)
+    monkeypatch.undo()
+
+    # desired functionality: derived tables have their indexes
+    query = (
+        "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx_filter%'"
+    )
+    assert sorted(name for (name,) in con.execute(query)) == [
+        "idx_filter1_counts_user_id",
+        "idx_filter1_var1_dist1_rewards_user_id",
+        "idx_filter1_var1_scores_engagement_score_user_id",
+    ]
+
+    # desired functionality: tables are only scanned by statements that write
+    # or copy all their rows, all other lookups use indexes
+    query = "SELECT name FROM sqlite_master WHERE type='table'"
+    tables = {name for (name,) in con.execute(query)}
+    pattern = re.compile(
+        r"^(?:WITH .*?\)\s*)?(?:CREATE (?:TEMP\w* )?TABLE|UPDATE|DELETE FROM) (\w+)"
+        r"(?: AS\s+SELECT\s.*?\sFROM (\w+))?",
+        re.DOTALL,
+    )
+    for statement, plan in plans:
+        match = pattern.match(statement)
+        allowed = set(match.groups()) if match else set()
+        # the selection of a filter is small and drives its lookups
+        allowed.update(["filter1_selection", "filter1_time_ranges"])
+        for detail in plan:
+            if "AUTOMATIC" in detail:
+                # only transient results of subqueries may get automatic indexes
+                searched = re.match(r"SEARCH (\w+) USING AUTOMATIC", detail)
+                assert searched and searched.group(1) not in tables, (statement, detail)
+            scanned = re.fullmatch(r"SCAN (\w+)", detail)
+            if scanned and scanned.group(1) in tables:
+                assert scanned.group(1) in allowed, (statement, detail)
+
+    # desired functionality: indexes of older databases can be added
+    con.execute("DROP INDEX idx_comments_creation_timestamp")
+    con.execute("DROP INDEX idx_filter1_counts_user_id")
+    assert swa.create_indexes(con) == [
+        "idx_comments_creation_timestamp",
+        "idx_filter1_counts_user_id",
+    ]
+    assert swa.create_indexes(con) == []
+    assert utils.get_index_statements("stale_tables") == []
+
+
+def test_sqlite_to_parquet(synthetic_zip, tmpdir):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    filepath = os.path.join(tmpdir, "swae.sqlite")
+    con = swa.zip_to_sqlite(synthetic_zip, filepath, datetime_columns="virtual")
+    mission_ids = [row[0] for row in swa.get_missions(con)][:2]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_counts_table(con, 1)
+    swa.create_engagement_score_table(con, 1, 1)
+    swa.create_rewards_table(con, 1, 1, 1)
+
+    # desired functionality: typed columns with the same values, in parallel or not
+    for workers in [1, 3]:
+        dirpath = os.path.join(tmpdir, f"parquet{workers}")
+        manifest = swa.sqlite_to_parquet(
+            con, dirpath, row_group_size=50, workers=workers
+        )
+        assert "filter1_var1_dist1_rewards" in manifest["tables"]
+        assert "sqlite_stat1" not in manifest["tables"]
+        for table, entry in manifest["tables"].items():
+            parquet_file = pq.ParquetFile(os.path.join(dirpath, entry["filename"]))
+            expected = con.execute(f"SELECT * FROM {table}").fetchall()
+            assert parquet_file.metadata.num_rows == entry["num_rows"] == len(expected)
+            assert parquet_file.metadata.num_row_groups == -(-len(expected) // 50)
+            result = [tuple(row.values()) for row in parquet_file.read().to_pylist()]
+            assert result == expected
+    types = {
+        column["name"]: column["type"]
+        for column in manifest["tables"]["filter1_var1_dist1_rewards"]["columns"]
+    }
+    assert types["rank"] == "int64"
+    assert types["engagement_score"] == "double"
+    assert types["eligibility"] == "string"
+    types = {
+        column["name"]: column["type"]
+        for column in manifest["tables"]["missions"]["columns"]
+    }
+    assert types["creation_datetime"] == "string"
+    with open(os.path.join(tmpdir, "parquet3", "manifest.json")) as f:
+        assert json.load(f) == manifest
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.sqlite_to_parquet(con, dirpath, compression="nonexistent_codec")
+    with pytest.raises(ValueError):
+        swa.sqlite_to_parquet(con, dirpath, row_group_size=0)
+
+    # desired functionality: only tables that match the patterns are exported
+    dirpath = os.path.join(tmpdir, "parquet_selection")
+    manifest = swa.sqlite_to_parquet(con, dirpath, include="filter1_*")
+    assert sorted(manifest["tables"]) == [
+        "filter1_counts",
+        "filter1_var1_dist1_rewards",
+        "filter1_var1_scores",
+    ]
+
+
+def test_sqlite_to_csv_streaming(synthetic_zip, tmpdir):
+    filepath = os.path.join(tmpdir, "swae.sqlite")
+    con = swa.zip_to_sqlite(synthetic_zip, filepath)
+    mission_ids = [row[0] for row in swa.get_missions(con)][:2]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_counts_table(con, 1)
+    swa.create_engagement_score_table(con, 1, 1)
+    tables = [
+        row[0]
+        for row in con.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' "
+            "AND name NOT LIKE 'sqlite_%'"
+        )
+    ]
+    bookkeeping_tables = ["filter1_selection", "filter1_time_ranges"]
+    assert set(bookkeeping_tables) <= set(tables)
+    tables = [t for t in tables if t not in bookkeeping_tables]
+
+    def read_files(dirpath, open_file=open):
+        result = {}
+        for filename in os.listdir(dirpath):
+            with open_file(os.path.join(dirpath, filename), "rt") as f:
+                result[filename.split(".")[0]] = f.read()
+        return result
+
+    # desired functionality: same content in batches, in parallel or compressed
+    dirpath = os.path.join(tmpdir, "csv")
+    swa.sqlite_to_csv(con, dirpath)
+    expected = read_files(dirpath)
+    assert sorted(expected) == sorted(tables)
+    assert expected["proposals"].splitlines()[0].startswith('"proposal_id",')
+    num_rows = con.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+    assert len(expected["ratings"].splitlines()) == num_rows + 1
+
+    dirpath = os.path.join(tmpdir, "csv_batches")
+    swa.sqlite_to_csv(con, dirpath, batch_size=7, workers=3)
+    assert read_files(dirpath) == expected
+
+    dirpath = os.path.join(tmpdir, "csv_gzip")
+    swa.sqlite_to_csv(con, dirpath, compression="gzip", workers=2)
+    assert all(filename.endswith(".csv.gz") for filename in os.listdir(dirpath))
+    assert read_files(dirpath, gzip.open) == expected
+
+    # desired functionality: only tables that match the patterns are exported
+    dirpath = os.path.join(tmpdir, "csv_selection")
+    swa.sqlite_to_csv(con, dirpath, include=["filter1_*", "missions"])
+    expected_tables = [t for t in tables if t.startswith("filter1_")] + ["missions"]
+    assert sorted(read_files(dirpath)) == sorted(expected_tables)
+
+    dirpath = os.path.join(tmpdir, "csv_exclusion")
+    swa.sqlite_to_csv(con, dirpath, include="filter1_*", exclude="*_scores")
+    assert sorted(read_files(dirpath)) == ["filter1_counts"]
+
+    # desired functionality: bookkeeping tables are only exported on request
+    dirpath = os.path.join(tmpdir, "csv_bookkeeping")
+    swa.sqlite_to_csv(con, dirpath, include="filter1_*", include_bookkeeping=True)
+    assert sorted(read_files(dirpath)) == [
+        "filter1_counts",
+        "filter1_selection",
+        "filter1_time_ranges",
+        "filter1_var1_scores",
+    ]
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.sqlite_to_csv(con, dirpath, compression="nonexistent_codec")
+    with pytest.raises(ValueError):
+        swa.sqlite_to_csv(con, dirpath, batch_size=0)
+
+
+def test_sqlite_to_csv_zstd(synthetic_zip, tmpdir):
+    zstandard = pytest.importorskip("zstandard")
+
+    con = swa.zip_to_sqlite(synthetic_zip)
+    swa.sqlite_to_csv(con, os.path.join(tmpdir, "csv"), include="comments")
+    swa.sqlite_to_csv(
+        con, os.path.join(tmpdir, "zstd"), compression="zstd", include="comments"
+    )
+    with open(os.path.join(tmpdir, "csv", "comments.csv")) as f:
+        expected = f.read()
+    with zstandard.open(os.path.join(tmpdir, "zstd", "comments.csv.zst"), "rt") as f:
+        assert f.read() == expected
+
+
+def test_sqlite_to_excel_streaming(synthetic_zip, tmpdir):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    con = swa.zip_to_sqlite(synthetic_zip, datetime_columns="virtual")
+    mission_ids = [row[0] for row in swa.get_missions(con)][:2]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_counts_table(con, 1)
+    swa.create_engagement_score_table(con, 1, 1)
+
+    def read_sheets(filepath):
+        workbook = openpyxl.load_workbook(filepath, read_only=True)
+        return {
+            sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in workbook
+        }
+
+    # desired functionality: same sheets as the in-memory workbook, with a bold header
+    filepath = os.path.join(tmpdir, "memory.xlsx")
+    swa.sqlite_to_excel(con, filepath)
+    expected = read_sheets(filepath)
+    filepath = os.path.join(tmpdir, "streaming.xlsx")
+    swa.sqlite_to_excel(con, filepath, streaming=True, batch_size=7)
+    assert read_sheets(filepath) == expected
+    assert "filter1_var1_scores" in expected
+    assert openpyxl.load_workbook(filepath)["missions"]["A1"].font.b
+
+    # desired functionality: large tables are split across sheets
+    num_rows = con.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+    for streaming in [False, True]:
+        filepath = os.path.join(tmpdir, f"split_{streaming}.xlsx")
+        swa.sqlite_to_excel(
+            con, filepath, include="ratings", streaming=streaming, max_rows=101
+        )
+        sheets = read_sheets(filepath)
+        assert list(sheets) == [f"ratings_{i}" for i in range(1, len(sheets) + 1)]
+        assert len(sheets) == -(-num_rows // 100) > 1
+        assert all(rows[0] == expected["ratings"][0] for rows in sheets.values())
+        rows = [row for rows in sheets.values() for row in rows[1:]]
+        assert rows == expected["ratings"][1:]
+
+    # desired functionality: only tables that match the patterns are exported
+    filepath = os.path.join(tmpdir, "selection.xlsx")
+    exclude = ["ratings", "comments", "reactions", "views"]
+    swa.sqlite_to_excel(con, filepath, exclude=exclude, streaming=True)
+    assert sorted(read_sheets(filepath)) == sorted(set(expected) - set(exclude))
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.sqlite_to_excel(con, filepath, include="nonexistent_table")
+    with pytest.raises(ValueError):
+        swa.sqlite_to_excel(con, filepath, max_rows=1)
+    with pytest.raises(ValueError):
+        swa.sqlite_to_excel(con, filepath, batch_size=0)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(),
+        dict(
+            streaming=True,
+            id_format="int64",
+            variables=dict(
+                swa.derive.DEFAULT_VARIABLES,
+                fraction_of_engagement_scores_for_highly_rated_proposals=0.25,
+                ratings_received=0.5,
+                upvote_reactions_received=1.5,
+            ),
+            rewards=dict(
+                filtered_user_ids=2,
+                function_agix_reward="sqrt(x)",
+                function_voting_weight="log(x) + 1",
+                threshold_percentile=50.0,
+            ),
+        ),
+    ],
+)
+def test_duckdb_backend_parity(synthetic_zip, tmpdir, options):
+    pytest.importorskip("duckdb")
+
+    # desired functionality: same tables and results on both backends
+    cons = {}
+    for backend in swa.utils.BACKENDS:
+        cons[backend] = con = swa.zip_to_sqlite(
+            synthetic_zip,
+            os.path.join(tmpdir, f"ces.{backend}"),
+            id_format=options.get("id_format", "hex"),
+            streaming=options.get("streaming", False),
+            backend=backend,
+        )
+        mission_ids = [row[0] for row in swa.get_missions(con)]
+        rewards = dict(options.get("rewards", {}))
+        user_ids = [row[0] for row in swa.get_users(con)]
+        rewards["filtered_user_ids"] = user_ids[: rewards.get("filtered_user_ids", 0)]
+        for filter_id, selected_mission_ids in [(1, mission_ids), (2, mission_ids[:2])]:
+            swa.create_filter_views(con, filter_id, selected_mission_ids)
+            swa.create_counts_table(con, filter_id)
+            swa.create_engagement_score_table(
+                con, filter_id, 1, options.get("variables")
+            )
+            swa.create_rewards_table(con, filter_id, 1, 1, **rewards)
+    assert swa.utils.get_backend(cons["sqlite"]) == "sqlite"
+    assert swa.utils.get_backend(cons["duckdb"]) == "duckdb"
+
+    def assert_equal(result_sqlite, result_duckdb):
+        assert len(result_sqlite) == len(result_duckdb) > 0
+        for row_sqlite, row_duckdb in zip(result_sqlite, result_duckdb):
+            assert row_duckdb == pytest.approx(row_sqlite, rel=1e-12)
+
+    query = "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
+    tables = swa.utils.execute_query(cons["sqlite"], query)
+    assert tables == swa.utils.execute_query(cons["duckdb"], query)
+    assert len(tables) == 17
+    for (table,) in tables:
+        results = [
+            swa.utils.execute_query(con, f"SELECT * FROM {table} ORDER BY 1")
+            for con in cons.values()
+        ]
+        assert_equal(*results)
+    for filter_id in [1, 2]:
+        assert_equal(*[swa.get_users(con, filter_id) for con in cons.values()])
+        assert_equal(
+            *[swa.get_engagement_scores(con, filter_id, 1) for con in cons.values()]
+        )
+        assert_equal(*[swa.get_rewards(con, filter_id, 1, 1) for con in cons.values()])
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.zip_to_sqlite(synthetic_zip, backend="nonexistent_backend")
+    with pytest.raises(ValueError):
+        swa.zip_to_sqlite(synthetic_zip, backend="duckdb", cache_dirpath=str(tmpdir))
+    with pytest.raises(TypeError):
+        swa.utils.get_backend(object())
+
+
+def test_counts_table_parity_with_reference(synthetic_zip):
+    from ces.swae_analysis import utils
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    reference_filepath = os.path.join(
+        os.path.dirname(__file__), "reference_create_counts_table.sql"
+    )
+    with open(reference_filepath) as f:
+        reference_template = f.read()
+
+    tabular_data = transform_swae_data(extract_swae_data(synthetic_zip))
+    cons = [swa.load_sqlite(tabular_data) for _ in range(2)]
+    mission_ids = [row[0] for row in swa.get_missions(cons[0])]
+    for con in cons:
+        # Values that end up in the corner cases of the counts
+        con.execute("UPDATE proposals SET average_rating = NULL WHERE rowid = 1")
+        con.execute("UPDATE proposals SET average_rating = -1.0 WHERE rowid = 2")
+        con.execute("UPDATE reactions SET reaction_type = NULL WHERE rowid = 1")
+        con.execute("UPDATE reactions SET comment_id = 'unknown' WHERE rowid = 2")
+        con.execute("UPDATE ratings SET user_id = NULL WHERE rowid = 1")
+        con.commit()
+
+    # desired functionality: identical table as the UPDATE-based reference script
+    selections = [mission_ids, mission_ids[:2], mission_ids[-1:]]
+    for filter_id, selected_mission_ids in enumerate(selections, 1):
+        table_name = f"filter{filter_id}_counts"
+        for con in cons:
+            swa.create_filter_views(con, filter_id, selected_mission_ids)
+        swa.create_counts_table(cons[0], filter_id)
+        reference_script = reference_template.format(
+            filter_id=filter_id,
+            create_indexes="\n".join(utils.get_index_statements(table_name)),
+            positive_reactions=(
+                "'celebrate', 'clap', 'curious', 'genius', "
+                "'happy', 'hot', 'laugh', 'love'"
+            ),
+            negative_reactions="'anger', 'sad'",
+        )
+        utils.execute_script(cons[1], reference_script)
+
+        result, expected = [
+            (
+                con.execute(f"PRAGMA table_info({table_name})").fetchall(),
+                con.execute(f"SELECT * FROM {table_name}").fetchall(),
+            )
+            for con in cons
+        ]
+        assert len(result[1]) > 0
+        assert result == expected
+
+
+def test_materialized_filter_tables(synthetic_zip):
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    tabular_data = transform_swae_data(extract_swae_data(synthetic_zip))
+    con = swa.load_sqlite(tabular_data)
+    mission_ids = [row[0] for row in swa.get_missions(con)][:2]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_filter_views(con, 2, mission_ids, materialize=True)
+    for filter_id in [1, 2]:
+        swa.create_counts_table(con, filter_id)
+
+    # desired functionality: tables with indexes and the same content as the views
+    entities = ["missions", "proposals", "ratings", "comments", "reactions"]
+    query = "SELECT type FROM sqlite_master WHERE name = ?"
+    for entity in entities:
+        assert con.execute(query, (f"filter1_{entity}",)).fetchone() == ("view",)
+        assert con.execute(query, (f"filter2_{entity}",)).fetchone() == ("table",)
+        results = [
+            con.execute(f"SELECT * FROM filter{filter_id}_{entity}").fetchall()
+            for filter_id in [1, 2]
+        ]
+        assert sorted(results[0]) == sorted(results[1])
+    query = "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE ?"
+    assert sorted(name for (name,) in con.execute(query, ("idx_filter2_%",))) == [
+        "idx_filter2_comments_comment_id",
+        "idx_filter2_comments_proposal_id",
+        "idx_filter2_counts_user_id",
+        "idx_filter2_missions_mission_id",
+        "idx_filter2_proposals_proposal_id",
+        "idx_filter2_proposals_user_id",
+        "idx_filter2_ratings_proposal_id",
+        "idx_filter2_reactions_comment_id",
+    ]
+    assert swa.get_users(con, 1) == swa.get_users(con, 2)
+    graphs = [swa.sqlite_to_graph(con, filter_id=filter_id) for filter_id in [1, 2]]
+    assert list(graphs[0].nodes(data=True)) == list(graphs[1].nodes(data=True))
+    assert list(graphs[0].edges(data=True)) == list(graphs[1].edges(data=True))
+
+    # desired functionality: materialized tables become stale when entities change
+    rows, columns, datatypes = tabular_data["views"]
+    tabular_data["views"] = (rows[1:], columns, datatypes)
+    swa.update_sqlite(con, {"views": tabular_data["views"]})
+    assert swa.get_stale_tables(con) == []
+    rows, columns, datatypes = tabular_data["reactions"]
+    tabular_data["reactions"] = (rows[1:], columns, datatypes)
+    swa.update_sqlite(con, {"reactions": tabular_data["reactions"]})
+    stale_tables = [name for name, _ in swa.get_stale_tables(con)]
+    assert sorted(name for name in stale_tables if name.startswith("filter2_")) == [
+        "filter2_comments",
+        "filter2_counts",
+        "filter2_missions",
+        "filter2_proposals",
+        "filter2_ratings",
+        "filter2_reactions",
+    ]
+
+    # desired functionality: all views and tables of a filter are dropped together
+    names = [f"filter{{}}_{entity}" for entity in sorted(entities)]
+    tables = ["filter{}_counts", "filter{}_selection", "filter{}_time_ranges"]
+    assert swa.drop_filter(con, 2) == sorted(name.format(2) for name in names + tables)
+    query = "SELECT name FROM sqlite_master WHERE name LIKE '%filter2_%'"
+    assert con.execute(query).fetchall() == []
+    assert all(not name.startswith("filter2_") for name, _ in swa.get_stale_tables(con))
+    assert swa.drop_filter(con, 2) == []
+    # views are dropped before the tables
+    assert swa.drop_filter(con, 1) == [name.format(1) for name in names + tables]
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.sqlite_to_graph(con)
+    with pytest.raises(ValueError):
+        swa.sqlite_to_graph(con, mission_ids, filter_id=1)
+
+
+def test_filter_views_parity_with_reference(synthetic_zip):
+    from ces.swae_analysis import utils
+
+    reference_filepath = os.path.join(
+        os.path.dirname(__file__), "reference_create_filter_views.sql"
+    )
+    with open(reference_filepath) as f:
+        reference_template = f.read()
+
+    def create_reference_filter_views(con, filter_id, mission_ids, extra_time_in_days):
+        mission_ids_str = ", ".join(f"'{x}'" for x in mission_ids)
+        query = (
+            "SELECT start_timestamp, end_timestamp FROM missions "
+            f"WHERE mission_id IN ({mission_ids_str})"
+        )
+        extra_time_in_ms = extra_time_in_days * 24 * 60 * 60 * 1000
+        conditions = "\n        OR\n        ".join(
+            f"(creation_timestamp >= {start} "
+            f"AND creation_timestamp <= {end + extra_time_in_ms})"
+            for start, end in set(con.execute(query).fetchall())
+        )
+        script = reference_template.format(
+            filter_id=filter_id,
+            mission_ids=mission_ids_str,
+            timerange_conditions=conditions,
+        )
+        utils.execute_script(con, script)
+
+    con = swa.zip_to_sqlite(synthetic_zip)
+    mission_ids = [row[0] for row in swa.get_missions(con)]
+
+    # desired functionality: the same rows as the literal conditions select
+    selections = [mission_ids, mission_ids[:2], mission_ids[-1:], mission_ids[::2]]
+    filter_id = 0
+    for selected_mission_ids in selections:
+        for extra_time_in_days in [0, 21, 100]:
+            filter_id += 1
+            create_reference_filter_views(
+                con, 100 + filter_id, selected_mission_ids, extra_time_in_days
+            )
+            swa.create_filter_views(
+                con, filter_id, selected_mission_ids, extra_time_in_days
+            )
+            for entity in ["missions", "proposals", "ratings", "comments", "reactions"]:
+                result, expected = [
+                    sorted(con.execute(f"SELECT * FROM filter{i}_{entity}").fetchall())
+                    for i in [filter_id, 100 + filter_id]
+                ]
+                assert result == expected, (entity, filter_id)
+
+    # desired functionality: an empty selection selects nothing
+    swa.create_filter_views(con, 99, [])
+    assert con.execute("SELECT COUNT(*) FROM filter99_reactions").fetchone() == (0,)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "duckdb"])
+def test_vectorized_engagement_scores(synthetic_zip, tmpdir, backend):
+    if backend == "duckdb":
+        pytest.importorskip("duckdb")
+
+    con = swa.zip_to_sqlite(
+        synthetic_zip, os.path.join(tmpdir, f"ces.{backend}"), backend=backend
+    )
+    mission_ids = [row[0] for row in swa.get_missions(con)]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_counts_table(con, 1)
+    variables = [
+        swa.derive.DEFAULT_VARIABLES,
+        dict(
+            swa.derive.DEFAULT_VARIABLES, comments_created=1.5, sad_reactions_created=-1
+        ),
+        dict(
+            {name: i for i, name in enumerate(swa.derive.DEFAULT_VARIABLES)},
+            fraction_of_engagement_scores_for_highly_rated_proposals=0.3,
+        ),
+        dict(
+            swa.derive.DEFAULT_VARIABLES,
+            fraction_of_engagement_scores_for_highly_rated_proposals=1.0,
+        ),
+    ]
+    counts = swa.load_counts(con, 1)
+
+    # desired functionality: same tables as the SQL script
+    for variables_id, item in enumerate(variables, 1):
+        swa.create_engagement_score_table(con, 1, variables_id, item)
+        swa.store_engagement_scores(con, counts, 2, variables_id, item)
+        results = [
+            swa.utils.execute_query(
+                con,
+                f"SELECT * FROM filter{filter_id}_var{variables_id}_scores "
+                "ORDER BY user_id",
+            )
+            for filter_id in [1, 2]
+        ]
+        assert len(results[0]) == len(results[1]) > 0
+        for row_sql, row_numpy in zip(*results):
+            assert row_numpy == pytest.approx(row_sql, rel=1e-12)
+
+    # desired functionality: many sets of variables at once
+    scores = swa.compute_engagement_scores(counts, variables)
+    assert scores.shape == (len(counts.user_ids), len(variables))
+    for j, item in enumerate(variables):
+        expected = swa.compute_engagement_scores(counts, item)
+        assert scores[:, j] == pytest.approx(expected, rel=1e-12, nan_ok=True)
+    assert np.isnan(scores[:, 3]).all()
+    df = swa.compute_engagement_scores(counts, as_dataframe=True)
+    assert df.index.name == "user_id"
+    assert list(df.index) == counts.user_ids
+    assert df["engagement_score"].tolist() == scores[:, 0].tolist()
+    df = swa.compute_engagement_scores(counts, variables, as_dataframe=True)
+    assert df.shape == (len(counts.user_ids), len(variables))
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.compute_engagement_scores(counts, {"comments_created": 3})
+
+
+def test_rewards_parity_with_reference(synthetic_zip, tmpdir):
+    import reference_create_rewards_table
+
+    con = swa.zip_to_sqlite(synthetic_zip, os.path.join(tmpdir, "ces.sqlite"))
+    mission_ids = [row[0] for row in swa.get_missions(con)]
+    user_ids = [row[0] for row in swa.get_users(con)]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_counts_table(con, 1)
+    swa.create_engagement_score_table(con, 1, 1)
+
+    # desired functionality: same rewards as with one eval per row, including
+    # formulas that are undefined for some x
+    distributions = [
+        dict(),
+        dict(function_agix_reward="x**2", function_voting_weight="sqrt(x) + 1"),
+        dict(
+            filtered_user_ids=user_ids[:3],
+            function_agix_reward="log(x) * mod(x, 4)",
+            function_voting_weight="1 / (x - 2)",
+            threshold_percentile=50.0,
+        ),
+        dict(function_agix_reward="0 * x", function_voting_weight="3"),
+        dict(function_agix_reward="-x", function_voting_weight="mod(x, 2) - 1"),
+    ]
+    for distribution_id, distribution in enumerate(distributions, 1):
+        reference_create_rewards_table.create_rewards_table(
+            con, 1, 1, distribution_id, **distribution
+        )
+        expected = swa.utils.execute_query(
+            con, f"SELECT * FROM filter1_var1_dist{distribution_id}_rewards"
+        )
+        con.execute(f"DROP TABLE filter1_var1_dist{distribution_id}_rewards")
+        swa.create_rewards_table(con, 1, 1, distribution_id, **distribution)
+        result = swa.utils.execute_query(
+            con, f"SELECT * FROM filter1_var1_dist{distribution_id}_rewards"
+        )
+        assert len(result) == len(expected) > 0
+        for row, expected_row in zip(result, expected):
+            assert row == pytest.approx(expected_row, rel=1e-12)
+
+    # desired exceptions: invalid formulas before any table is created
+    for formula in ["x +", "y", "__import__('os')"]:
+        with pytest.raises(ValueError):
+            swa.create_rewards_table(con, 1, 1, 9, function_agix_reward=formula)
+        with pytest.raises(ValueError):
+            swa.create_rewards_table(con, 1, 1, 9, function_voting_weight=formula)
+    query = "SELECT name FROM sqlite_master WHERE name LIKE '%dist9%'"
+    assert swa.utils.execute_query(con, query) == []
+
+
+def test_sweep(synthetic_zip, tmpdir):
+    con = swa.zip_to_sqlite(synthetic_zip, os.path.join(tmpdir, "ces.sqlite"))
+    mission_ids = [row[0] for row in swa.get_missions(con)]
+    user_ids = [row[0] for row in swa.get_users(con)]
+    for filter_id in [1, 2]:
+        swa.create_filter_views(con, filter_id, mission_ids)
+        swa.create_counts_table(con, filter_id)
+    grid = dict(
+        comments_created=[1, 3],
+        upvote_reactions_received=[2.0],
+        threshold_percentile=[10.0, 50.0],
+        function_agix_reward=["x", "sqrt(x)"],
+        max_voting_weight=[5.0, 10.0],
+    )
+    calls = []
+
+    # desired functionality: one result per configuration in the order of the grid
+    results = swa.sweep(
+        con,
+        1,
+        grid,
+        filtered_user_ids=user_ids[:2],
+        progress=lambda num_done, num_total: calls.append((num_done, num_total)),
+        persist=[6, 11],
+    )
+    assert len(results) == 16
+    assert calls[-1] == (16, 16)
+    assert [num_done for num_done, _ in calls] == sorted(
+        num_done for num_done, _ in calls
+    )
+    assert [r["distribution_id"] for r in results] == list(range(1, 17))
+    assert [r["variables_id"] for r in results] == [1] * 8 + [2] * 8
+    assert results[5]["comments_created"] == 1
+    assert results[5]["threshold_percentile"] == 50.0
+    assert results[5]["function_agix_reward"] == "x"
+    assert results[5]["max_voting_weight"] == 10.0
+    for result in results:
+        assert 0 < result["num_eligible_users"] <= len(user_ids)
+        assert 0.0 <= result["gini"] < 1.0
+        assert 0.1 <= result["top10_share"] <= 1.0
+        assert 0.0 < result["min_agix_reward"] <= result["max_agix_reward"]
+
+    # desired functionality: persisted tables and metrics equal those of SQL
+    for result in [results[5], results[10]]:
+        variables_id = result["variables_id"]
+        distribution_id = result["distribution_id"]
+        variables = dict(
+            swa.derive.DEFAULT_VARIABLES,
+            comments_created=result["comments_created"],
+            upvote_reactions_received=result["upvote_reactions_received"],
+        )
+        swa.create_engagement_score_table(con, 2, variables_id, variables)
+        swa.create_rewards_table(
+            con,
+            2,
+            variables_id,
+            distribution_id,
+            user_ids[:2],
+            function_agix_reward=result["function_agix_reward"],
+            threshold_percentile=result["threshold_percentile"],
+            max_voting_weight=result["max_voting_weight"],
+        )
+        for table in ["var{}_scores", "var{}_dist{}_rewards"]:
+            table = table.format(variables_id, distribution_id)
+            query = "SELECT * FROM filter{}_" + table + " ORDER BY user_id"
+            expected = swa.utils.execute_query(con, query.format(2))
+            result_rows = swa.utils.execute_query(con, query.format(1))
+            assert len(result_rows) == len(expected) > 0
+            for row, expected_row in zip(result_rows, expected):
+                assert row == pytest.approx(expected_row, rel=1e-12)
+        query = (
+            f"SELECT agix_reward FROM filter2_var{variables_id}_dist{distribution_id}"
+            "_rewards WHERE eligibility = 'yes' ORDER BY agix_reward"
+        )
+        agix_rewards = [row[0] for row in swa.utils.execute_query(con, query)]
+        assert result["num_eligible_users"] == len(agix_rewards)
+        assert result["max_agix_reward"] == pytest.approx(agix_rewards[-1])
+        assert result["min_agix_reward"] == pytest.approx(agix_rewards[0])
+    query = "SELECT name FROM sqlite_master WHERE name LIKE 'filter1_var%'"
+    assert sorted(row[0] for row in swa.utils.execute_query(con, query)) == [
+        "filter1_var1_dist6_rewards",
+        "filter1_var1_scores",
+        "filter1_var2_dist11_rewards",
+        "filter1_var2_scores",
+    ]
+
+    # desired functionality: same results with parallel workers
+    assert swa.sweep(con, 1, grid, filtered_user_ids=user_ids[:2], workers=2) == results
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        swa.sweep(con, 1, dict(nonexistent_parameter=[1]))
+    with pytest.raises(ValueError):
+        swa.sweep(con, 1, dict(threshold_percentile=[]))
+    with pytest.raises(ValueError):
+        swa.sweep(con, 1, dict(function_voting_weight=["x", "x +"]))
+    with pytest.raises(ValueError):
+        swa.sweep(con, 1, grid, persist=[17])
+    with pytest.raises(ValueError):
+        swa.sweep(con, 1, grid, workers=0)
+
+
+def test_sweep_persist_existing_tables(synthetic_zip, tmpdir):
+    con = swa.zip_to_sqlite(synthetic_zip, os.path.join(tmpdir, "ces.sqlite"))
+    mission_ids = [row[0] for row in swa.get_missions(con)]
+    swa.create_filter_views(con, 1, mission_ids)
+    swa.create_counts_table(con, 1)
+    swa.create_engagement_score_table(con, 1, 1)
+    swa.create_rewards_table(con, 1, 1, 1)
+    grid = dict(threshold_percentile=[10.0, 20.0])
+    query = "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+    tables = swa.utils.execute_query(con, query)
+    calls = []
+
+    # desired exceptions: existing tables are detected before anything is evaluated
+    for persist in [[1], [2]]:
+        with pytest.raises(ValueError, match="filter1_var1_scores"):
+            swa.sweep(
+                con,
+                1,
+                grid,
+                progress=lambda *args: calls.append(args),
+                persist=persist,
+            )
+    assert calls == []
+    assert swa.utils.execute_query(con, query) == tables
+
+    # desired functionality: offsets keep persisted tables apart from existing ones
+    results = swa.sweep(
+        con,
+        1,
+        grid,
+        persist=[12],
+        variables_id_offset=2,
+        distribution_id_offset=10,
+    )
+    assert [(r["variables_id"], r["distribution_id"]) for r in results] == [
+        (3, 11),
+        (3, 12),
+    ]
+    new_tables = set(swa.utils.execute_query(con, query)) - set(tables)
+    assert new_tables == {("filter1_var3_scores",), ("filter1_var3_dist12_rewards",)}
+    assert swa.get_rewards(con, 1, 3, 12) == swa.get_rewards(con, 1, 1, 1)
+    with pytest.raises(ValueError):
+        swa.sweep(con, 1, grid, persist=[1], distribution_id_offset=10)
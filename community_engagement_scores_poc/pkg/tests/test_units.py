@@ -3,6 +3,7 @@ import random
 import shutil
 import string
 
+import numpy as np
 import pytest
 
 
@@ -85,3 +86,439 @@ def test_etl(tmpdir):
         con = load_sqlite(tabular_data, filepath)
         assert os.path.isfile(filepath)
         con.close()
+
+
+def test_find_zip_members(synthetic_zip):
+    import zipfile
+
+    from ces.swae_analysis.extract import FILENAMES, _find_zip_members
+
+    # desired functionality
+    with zipfile.ZipFile(synthetic_zip) as zf:
+        members = _find_zip_members(zf, FILENAMES)
+        assert [os.path.basename(m.filename) for m in members] == FILENAMES
+
+    # desired exceptions
+    with zipfile.ZipFile(synthetic_zip) as zf:
+        with pytest.raises(FileNotFoundError):
+            _find_zip_members(zf, ["nonexistent_file.json"])
+
+
+def test_extract_modes(synthetic_zip, tmpdir):
+    from ces.swae_analysis.extract import FILENAMES, extract_swae_data
+
+    # desired functionality: both modes deliver the same data
+    stats = {}
+    data1 = extract_swae_data(synthetic_zip, mode="stream", stats=stats)
+    data2 = extract_swae_data(synthetic_zip, mode="unpack")
+    assert data1 == data2
+    assert sorted(stats) == sorted(FILENAMES)
+    assert all(s["bytes_read"] > 0 and s["seconds"] >= 0.0 for s in stats.values())
+
+    # desired exceptions
+    with pytest.raises(FileNotFoundError):
+        extract_swae_data("nonexistent_zip_file")
+    with pytest.raises(ValueError):
+        extract_swae_data(JSON_FILEPATH)
+    with pytest.raises(ValueError):
+        extract_swae_data(synthetic_zip, mode="nonexistent_mode")
+
+
+def test_transform_parity_with_row_wise_reference(synthetic_zip, monkeypatch):
+    import copy
+    import time
+
+    import reference_transform
+
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    swae_data = extract_swae_data(synthetic_zip)
+
+    # Malformed values that need the fallback to the default values
+    malformed = [None, {}, "text", {"N": "not a number"}, {"N": "1e99999"}]
+    rng = random.Random(0)
+    for entity, records in swae_data.items():
+        if not isinstance(records, list):
+            continue
+        for record in rng.sample(records, min(len(records), 10)):
+            key = rng.choice(sorted(record))
+            if rng.random() < 0.2:
+                del record[key]
+            else:
+                record[key] = rng.choice(malformed)
+    # A number beyond 64 bits that does not fit into an array of integers
+    swae_data["comments"][0]["commentLevel"] = {"N": str(2**70)}
+
+    # desired functionality: identical output with and without filters. The
+    # reference formats datetimes in the local time zone, which is set to UTC.
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    try:
+        expected_data = {
+            filters_on: reference_transform.transform_swae_data(
+                copy.deepcopy(swae_data), filters_on
+            )
+            for filters_on in (True, False)
+        }
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    for filters_on, expected in expected_data.items():
+        result = transform_swae_data(copy.deepcopy(swae_data), filters_on)
+        assert result.keys() == expected.keys()
+        for table_name in expected:
+            assert result[table_name] == expected[table_name], table_name
+            # Array-backed columns yield plain Python values that executemany binds
+            for row, expected_row in zip(
+                result[table_name][0], expected[table_name][0]
+            ):
+                assert list(map(type, row)) == list(map(type, expected_row))
+
+
+def test_transform_parallel(synthetic_zip):
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    swae_data = extract_swae_data(synthetic_zip)
+
+    # desired functionality: chunks and workers do not change the result
+    expected = transform_swae_data(swae_data)
+    result = transform_swae_data(swae_data, workers=2, chunk_size=7)
+    assert result == expected
+
+    # desired functionality: chunks that only contain skipped records
+    swae_data["comments"][:7] = [{"deleted": {"BOOL": True}}] * 7
+    result = transform_swae_data(swae_data, workers=2, chunk_size=7)
+    assert len(result["comments"][0]) == len(expected["comments"][0]) - 7
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        transform_swae_data(swae_data, workers=0)
+    with pytest.raises(ValueError):
+        transform_swae_data(swae_data, workers=2, chunk_size=0)
+
+
+def test_transform_interns_identifiers(synthetic_zip):
+    from ces.swae_analysis.extract import extract_swae_data
+    from ces.swae_analysis.transform import transform_swae_data
+
+    tabular_data = transform_swae_data(extract_swae_data(synthetic_zip))
+
+    # desired functionality: one string object per distinct identifier
+    user_ids = {}
+    for table_name in ["users", "proposals", "comments", "reactions", "views"]:
+        rows, columns, _ = tabular_data[table_name]
+        i = columns.index("user_id")
+        for row in rows:
+            assert user_ids.setdefault(row[i], row[i]) is row[i]
+
+
+def test_load_sqlite_key_collisions():
+    import sqlite3
+
+    from ces.swae_analysis.load import load_sqlite, load_sqlite_batches
+
+    columns = ["view_id", "proposal_id", "user_id"]
+    datatypes = ["int", "str", "str"]
+
+    # desired functionality: integer keys are rowids
+    rows = [[-5, "p1", "u1"], [7, "p1", "u2"]]
+    con = load_sqlite({"views": (rows, columns, datatypes)})
+    result = con.execute("SELECT rowid, view_id FROM views").fetchall()
+    assert result == [(-5, -5), (7, 7)]
+
+    # desired exceptions: duplicates and collisions are told apart
+    rows = [[7, "p1", "u1"], [7, "p1", "u1"]]
+    with pytest.raises(sqlite3.IntegrityError, match="UNIQUE"):
+        load_sqlite({"views": (rows, columns, datatypes)})
+    rows = [[7, "p1", "u1"], [7, "p2", "u2"]]
+    with pytest.raises(sqlite3.IntegrityError, match="Collision"):
+        load_sqlite({"views": (rows, columns, datatypes)})
+
+    # desired exceptions: also across batches of a streaming load
+    for row, match in [([7, "p1", "u1"], "UNIQUE"), ([7, "p2", "u2"], "Collision")]:
+        batches = [
+            ("views", ([[7, "p1", "u1"], [8, "p1", "u1"]], columns, datatypes)),
+            ("views", ([[9, "p1", "u1"], row], columns, datatypes)),
+        ]
+        with pytest.raises(sqlite3.IntegrityError, match=match):
+            load_sqlite_batches(batches)
+
+
+@pytest.mark.parametrize("timezone", ["UTC", "Europe/Berlin", "Australia/Lord_Howe"])
+def test_format_datetimes(timezone, monkeypatch):
+    import datetime
+    import time
+
+    from ces.swae_analysis.transform import _format_datetimes
+
+    monkeypatch.setenv("TZ", timezone)
+    time.tzset()
+    try:
+        # Every 7 minutes over two years, which includes changes of daylight saving time
+        start = 1_640_000_000_000
+        timestamps = list(range(start, start + 2 * 365 * 86_400_000, 7 * 60_000 + 1))
+        timestamps += [0, -1, -500, 1_999, -3_000_000_000_000, 10**15, 10**30, None]
+        # desired functionality: UTC datetimes in any local time zone
+        utc = datetime.timezone.utc
+        expected = [
+            datetime.datetime.fromtimestamp(ts // 1000, utc)
+            .replace(tzinfo=None, microsecond=ts % 1000 * 1000)
+            .isoformat(sep=" ", timespec="milliseconds")
+            if ts is not None and ts < 10**15
+            else ""
+            for ts in timestamps
+        ]
+        assert _format_datetimes(timestamps) == expected
+        assert _format_datetimes(timestamps[:-3]) == expected[:-3]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_iter_swae_records(synthetic_zip, tmpdir):
+    import zipfile
+
+    from ces.swae_analysis.extract import ENTITIES, extract_swae_data, iter_swae_records
+
+    # desired functionality: same records as the dict-returning extraction
+    data = extract_swae_data(synthetic_zip)
+    for entity in ENTITIES:
+        records = iter_swae_records(synthetic_zip, entity, chunk_size=7)
+        assert list(records) == data[entity]
+    stats = {}
+    assert extract_swae_data(synthetic_zip, mode="incremental", stats=stats) == data
+    assert all(s["bytes_read"] > 0 for s in stats.values())
+
+    # desired exceptions
+    with pytest.raises(FileNotFoundError):
+        iter_swae_records("nonexistent_zip_file", "views")
+    with pytest.raises(ValueError):
+        iter_swae_records(synthetic_zip, "nonexistent_entity")
+
+    broken_zip = os.path.join(tmpdir, "broken.zip")
+    with zipfile.ZipFile(synthetic_zip) as src, zipfile.ZipFile(broken_zip, "w") as dst:
+        for info in src.infolist():
+            content = src.read(info)
+            if info.filename.endswith("viewsByProposalId.json"):
+                content = content[:-10]
+            dst.writestr(info, content)
+    with pytest.raises(ValueError):
+        list(iter_swae_records(broken_zip, "views"))
+    with pytest.raises(ValueError):
+        extract_swae_data(broken_zip, mode="incremental")
+
+
+def test_extract_parallel(synthetic_zip, monkeypatch):
+    from ces.swae_analysis import extract
+
+    # desired functionality: same data with shards of every nested file
+    monkeypatch.setattr(extract, "SHARD_MIN_BYTES", 0)
+    stats = {}
+    data = extract.extract_swae_data(synthetic_zip, workers=3, stats=stats)
+    assert data == extract.extract_swae_data(synthetic_zip)
+    assert sorted(stats) == sorted(extract.FILENAMES)
+
+    # desired functionality: same data with whole files and with single shards
+    monkeypatch.setattr(extract, "SHARD_MIN_BYTES", 2**40)
+    assert extract.extract_swae_data(synthetic_zip, workers=2) == data
+    monkeypatch.setattr(extract, "SHARD_MIN_BYTES", 0)
+    monkeypatch.setattr(extract, "_split_json_object", lambda raw, num: [raw])
+    assert extract.extract_swae_data(synthetic_zip, workers=2) == data
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        extract.extract_swae_data(synthetic_zip, workers=0)
+    with pytest.raises(ValueError):
+        extract.extract_swae_data(synthetic_zip, mode="unpack", workers=2)
+
+
+def test_split_json_object():
+    import json
+
+    from ces.swae_analysis.extract import _split_json_object
+
+    # desired functionality
+    data = {"a": [{"x": {"S": "1"}}], 'b"}': [{"y": "]}"}], "c": {"t": [1, 2]}}
+    for num_shards in (1, 2, 3, 5):
+        shards = _split_json_object(json.dumps(data).encode(), num_shards)
+        assert 1 <= len(shards) <= min(num_shards, len(data))
+        merged = {}
+        for shard in shards:
+            merged.update(json.loads(shard))
+        assert list(merged.items()) == list(data.items())
+
+    # not splittable
+    assert _split_json_object(b"{}", 2) is None
+    assert _split_json_object(b"[1, 2]", 2) is None
+    assert _split_json_object(b'{"a": 1, "b": 2}', 2) is None
+
+
+def test_cache_eviction(tmpdir):
+    import sqlite3
+
+    from ces.swae_analysis import cache
+
+    cache_dirpath = os.path.join(tmpdir, "cache")
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (x TEXT)")
+    con.executemany("INSERT INTO t VALUES (?)", [("a" * 1000,)] * 100)
+    con.commit()
+
+    # desired functionality: least recently used entries are evicted
+    assert cache.store(cache_dirpath, "key1", con, 1.0)
+    size = cache.get_cache_stats(cache_dirpath)["size"]
+    max_bytes = 2 * size
+    assert cache.store(cache_dirpath, "key2", con, 1.0, max_bytes)
+    assert cache.restore(cache_dirpath, "key1") is not None
+    assert cache.store(cache_dirpath, "key3", con, 1.0, max_bytes)
+    keys = [entry["key"] for entry in cache.list_cache_entries(cache_dirpath)]
+    assert keys == ["key3", "key1"]
+    assert sorted(os.listdir(cache_dirpath)) == [
+        "index.sqlite",
+        "key1.sqlite",
+        "key3.sqlite",
+    ]
+    assert cache.restore(cache_dirpath, "key2") is None
+
+    # entries larger than the whole cache are not stored
+    assert not cache.store(cache_dirpath, "key4", con, 1.0, size // 2)
+
+    # desired exceptions
+    with pytest.raises(FileNotFoundError):
+        cache.compute_key("nonexistent_zip_file", filters_on=True)
+    with pytest.raises(ValueError):
+        cache.restore(cache_dirpath, "key1", how="nonexistent_method")
+
+
+def test_connect_read_only(synthetic_zip, tmpdir):
+    import sqlite3
+
+    from ces import swae_analysis as swa
+    from ces.swae_analysis import utils
+
+    filepath = os.path.join(tmpdir, "swae.sqlite")
+    swa.zip_to_sqlite(synthetic_zip, filepath).close()
+
+    # desired functionality: retrieval works, writes are rejected
+    for immutable in [False, True]:
+        con = utils.connect_read_only(filepath, immutable=immutable)
+        assert con.execute("PRAGMA mmap_size").fetchone()[0] > 0
+        assert len(swa.get_missions(con)) > 0
+        assert len(swa.get_users(con)) > 0
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            con.execute("CREATE TABLE t (x INTEGER)")
+        con.close()
+
+    # desired exceptions
+    with pytest.raises(FileNotFoundError):
+        utils.connect_read_only(os.path.join(tmpdir, "nonexistent.sqlite"))
+
+
+def test_merge_time_ranges():
+    from ces.swae_analysis.derive import _merge_time_ranges
+
+    # desired functionality: overlapping and touching ranges are merged
+    assert _merge_time_ranges([]) == []
+    assert _merge_time_ranges([(5, 9), (1, 3), (2, 4), (4, 4), (9, 12)]) == [
+        (1, 4),
+        (5, 12),
+    ]
+    assert _merge_time_ranges([(1, 10), (2, 3), (11, 12)]) == [(1, 10), (11, 12)]
+    assert _merge_time_ranges([(1, 2), (1, 2)]) == [(1, 2)]
+
+
+def test_compile_formula():
+    from ces.swae_analysis.formula import compile_formula
+
+    x = np.arange(1, 6)
+
+    # desired functionality: whole arrays are evaluated like one value at a time
+    for formula in ["x", "x**2", "sqrt(x)", "log(x) + 1", "mod(x, 3) * -2.5", "1"]:
+        func = compile_formula(formula)
+        expected = [
+            float(
+                eval(formula, {"sqrt": np.sqrt, "log": np.log, "mod": np.mod, "x": v})
+            )
+            for v in x.tolist()
+        ]
+        assert func(x).tolist() == expected
+    assert np.isinf(compile_formula("1 / (x - 1)")(x)[0])
+
+    # desired exceptions: anything but arithmetic of x and known functions
+    for formula in [
+        "",
+        "x +",
+        "y",
+        "sqrt",
+        "sqrt(x, 2)",
+        "mod(x)",
+        "x.real",
+        "x < 1",
+        "'x'",
+        "True",
+        "[x]",
+        "__import__('os').getcwd()",
+        "(lambda: 1)()",
+        "10**400",
+    ]:
+        with pytest.raises(ValueError):
+            compile_formula(formula)
+
+    # desired exceptions: long or deeply nested formulas do not exhaust the stack
+    for formula in [
+        "x**" * 2000 + "x",
+        "(x" + "+x" * 5000 + ")",
+        "-" * 999 + "x",
+        "(" * 300 + "x" + ")" * 300,
+    ]:
+        with pytest.raises(ValueError):
+            compile_formula(formula)
+
+
+def test_compute_rewards():
+    from ces.swae_analysis.distribute import compute_rewards
+
+    user_ids = ["a", "b", "c", "d", "e", "f"]
+    scores = np.array([4.0, 8.0, 4.0, 0.0, np.nan, 6.0])
+
+    # desired functionality: rank, eligibility, formula input and tied rewards
+    rewards = compute_rewards(
+        user_ids,
+        scores,
+        filtered_user_ids=["f"],
+        function_agix_reward="x",
+        function_voting_weight="x**2",
+        threshold_percentile=0.0,
+        total_agix_reward=100.0,
+        min_voting_weight=1.0,
+        max_voting_weight=2.0,
+    )
+    assert rewards.rank.tolist() == [4, 1, 3, 5, 6, 2]
+    assert rewards.eligibility.tolist() == [
+        "yes",
+        "yes",
+        "yes",
+        "below score threshold",
+        "yes",
+        "filtered user",
+    ]
+    assert rewards.x.tolist() == [2, 4, 3, 0, 1, 0]
+    assert rewards.agix_reward_fraction.tolist() == pytest.approx(
+        [0.2, 0.4, 0.3, 0.0, 0.1, 0.0]
+    )
+    assert rewards.agix_reward.tolist() == pytest.approx([25, 40, 25, 0, 10, 0])
+    assert rewards.voting_weight.tolist() == pytest.approx(
+        [1.40625, 2.0, 1.40625, 1.0, 1.0625, 1.0]
+    )
+
+    # desired functionality: NULL where the distribution sums to zero
+    rewards = compute_rewards(user_ids, scores, function_agix_reward="0")
+    assert np.isnan(rewards.agix_reward).all()
+
+    # desired exceptions
+    with pytest.raises(ValueError):
+        compute_rewards(user_ids, scores[:-1])
+    with pytest.raises(ValueError):
+        compute_rewards(user_ids, scores, function_voting_weight="x +")